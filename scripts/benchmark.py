@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark Script for vHTML
+Measures throughput and memory of individual pipeline stages
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+from typing import Dict
+
+# Add parent directory to path so we can import vhtml
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Document measured when no benchmark is selected (e.g. `make benchmark`)
+DEFAULT_PDF = "invoices/Invoice-30392B3C-0001.pdf"
+
+
+def _peak_rss_mb(who: int) -> float:
+    """Peak resident set size in MB (ru_maxrss is reported in KB on Linux)"""
+    return resource.getrusage(who).ru_maxrss / 1024.0
+
+
+def _rasterize_worker(backend: str, pdf_path: str, dpi: int, colorspace: str,
+                      repeat: int, queue: multiprocessing.Queue) -> None:
+    """Renders the whole document in a fresh process so peak RSS is not shared between backends"""
+    from vhtml.core.rasterizer import get_rasterizer
+
+    rasterizer = get_rasterizer(backend)
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for array in rasterizer.iter_pages(pdf_path, dpi, colorspace):
+            pages += 1
+            del array
+    elapsed = time.perf_counter() - start
+
+    queue.put({
+        'backend': backend,
+        'pages': pages,
+        'seconds': elapsed,
+        'pages_per_second': pages / elapsed if elapsed else 0.0,
+        'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+        'peak_child_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    })
+
+
+def benchmark_rasterizers(args: argparse.Namespace) -> None:
+    """Compare PDF rasterizer backends on pages per second and peak RSS"""
+    print(f"📄 {args.pdf_file} @ {args.dpi} DPI ({args.colorspace}), repeat={args.repeat}")
+    print(f"{'backend':<10} {'pages':>6} {'seconds':>9} {'pages/s':>9} {'RSS MB':>9} {'child RSS MB':>13}")
+
+    context = multiprocessing.get_context('spawn')
+    for backend in args.backends:
+        queue = context.Queue()
+        process = context.Process(
+            target=_rasterize_worker,
+            args=(backend, args.pdf_file, args.dpi, args.colorspace, args.repeat, queue)
+        )
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"{backend:<10} failed (exit code {process.exitcode})")
+            continue
+        result: Dict = queue.get()
+        print(f"{result['backend']:<10} {result['pages']:>6} {result['seconds']:>9.2f} "
+              f"{result['pages_per_second']:>9.2f} {result['peak_rss_mb']:>9.1f} "
+              f"{result['peak_child_rss_mb']:>13.1f}")
+
+
+def benchmark_deskew(args: argparse.Namespace) -> None:
+    """Per-page deskew time (estimate + warp) at several rendering resolutions"""
+    import cv2
+    from vhtml.core.pdf_processor import PDFProcessor
+    from vhtml.core.rasterizer import get_rasterizer
+
+    rasterizer = get_rasterizer("pymupdf")
+    page_count = min(rasterizer.page_count(args.pdf_file), args.pages)
+    print(f"📄 {args.pdf_file}: {page_count} page(s), synthetic skew {args.angle}°")
+    print(f"{'dpi':>5} {'max side':>9} {'estimate ms':>12} {'warp ms':>9} {'total ms/page':>14} {'angle':>7}")
+
+    for dpi in args.dpis:
+        pages = []
+        for array in rasterizer.iter_pages(args.pdf_file, dpi, "gray", 0, page_count):
+            h, w = array.shape
+            rotation = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), args.angle, 1.0)
+            pages.append(cv2.warpAffine(array, rotation, (w, h), borderValue=255))
+
+        for max_side in (args.max_side, None):
+            processor = PDFProcessor(dpi=dpi)
+            processor.deskew_max_side = max_side
+            estimate = warp = 0.0
+            angle = None
+            for page in pages:
+                start = time.perf_counter()
+                angle = processor._estimate_skew_angle(page)
+                middle = time.perf_counter()
+                processor._deskew(page, angle)
+                estimate += middle - start
+                warp += time.perf_counter() - middle
+            n = len(pages)
+            print(f"{dpi:>5} {str(max_side or 'full'):>9} {estimate / n * 1000:>12.1f} "
+                  f"{warp / n * 1000:>9.1f} {(estimate + warp) / n * 1000:>14.1f} {angle!s:>7}")
+
+
+def benchmark_ocr(args: argparse.Namespace) -> None:
+    """Compare page-level OCR throughput of the pytesseract and in-process tesserocr backends"""
+    from concurrent.futures import ThreadPoolExecutor
+    from PIL import Image
+    from vhtml.core.ocr_engine import OCREngine
+    from vhtml.core.rasterizer import get_rasterizer
+
+    rasterizer = get_rasterizer("pymupdf")
+    page_count = min(rasterizer.page_count(args.pdf_file), args.pages)
+    pages = [Image.fromarray(array) for array in
+             rasterizer.iter_pages(args.pdf_file, args.dpi, "gray", 0, page_count)]
+    print(f"📄 {args.pdf_file}: {page_count} page(s) @ {args.dpi} DPI, "
+          f"repeat={args.repeat}, threads={args.threads}")
+    print(f"{'backend':<12} {'calls':>6} {'seconds':>9} {'pages/s':>9} {'words':>7}")
+
+    for backend in args.backends:
+        engine = OCREngine(tesseract_backend=backend, tesseract_pool_size=args.threads)
+        if backend == "tesserocr" and engine.tesseract_pool is None:
+            print(f"{backend:<12} unavailable (pip install tesserocr)")
+            continue
+        langs = "+".join(engine.languages.values())
+        work = pages * args.repeat
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=args.threads) as executor:
+                results = list(executor.map(lambda page: engine._tesseract_to_data(page, langs), work))
+        except Exception as e:
+            print(f"{backend:<12} failed ({e})")
+            continue
+        elapsed = time.perf_counter() - start
+        words = sum(1 for data in results for word in data["text"] if str(word).strip())
+        print(f"{backend:<12} {len(work):>6} {elapsed:>9.2f} "
+              f"{len(work) / elapsed if elapsed else 0.0:>9.2f} {words:>7}")
+        if engine.tesseract_pool is not None:
+            engine.tesseract_pool.close()
+
+
+def main():
+    """Run the selected benchmark, or all of them with default settings on DEFAULT_PDF"""
+    parser = argparse.ArgumentParser(description="vHTML Benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark")
+
+    rasterize = subparsers.add_parser("rasterize", help="Compare PDF rasterizer backends")
+    rasterize.add_argument("pdf_file", help="Path to PDF file")
+    rasterize.add_argument("--dpi", type=int, default=300, help="Rendering resolution")
+    rasterize.add_argument("--colorspace", choices=["rgb", "gray"], default="rgb")
+    rasterize.add_argument("--repeat", type=int, default=1, help="Render the document N times")
+    rasterize.add_argument("--backends", nargs="+", default=["poppler", "pymupdf"])
+    rasterize.set_defaults(func=benchmark_rasterizers)
+
+    deskew = subparsers.add_parser("deskew", help="Per-page deskew time at several DPIs")
+    deskew.add_argument("pdf_file", help="Path to PDF file")
+    deskew.add_argument("--dpis", type=int, nargs="+", default=[150, 300, 600])
+    deskew.add_argument("--angle", type=float, default=2.0, help="Synthetic skew applied before deskew")
+    deskew.add_argument("--pages", type=int, default=3, help="Maximum number of pages to measure")
+    deskew.add_argument("--max-side", type=int, default=1000,
+                        help="Longest side of the copy used for angle estimation")
+    deskew.set_defaults(func=benchmark_deskew)
+
+    ocr = subparsers.add_parser("ocr", help="Compare Tesseract backends (subprocess vs in-process pool)")
+    ocr.add_argument("pdf_file", help="Path to PDF file")
+    ocr.add_argument("--dpi", type=int, default=300, help="Rendering resolution")
+    ocr.add_argument("--pages", type=int, default=3, help="Maximum number of pages to OCR")
+    ocr.add_argument("--repeat", type=int, default=1, help="OCR every page N times")
+    ocr.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                     help="Concurrent OCR calls (and tesserocr pool size)")
+    ocr.add_argument("--backends", nargs="+", default=["pytesseract", "tesserocr"])
+    ocr.set_defaults(func=benchmark_ocr)
+
+    args = parser.parse_args()
+    if args.benchmark is None:
+        runs = [parser.parse_args([name, DEFAULT_PDF]) for name in subparsers.choices]
+    else:
+        runs = [args]
+    for run in runs:
+        if not os.path.exists(run.pdf_file):
+            print(f"Error: File not found: {run.pdf_file}")
+            sys.exit(1)
+    for run in runs:
+        if len(runs) > 1:
+            print(f"\n=== {run.benchmark} ===")
+        run.func(run)
+
+
+if __name__ == "__main__":
+    main()
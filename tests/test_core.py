@@ -33,6 +33,144 @@ def test_pdf_to_images(pdf_processor, sample_pdf_path):
     assert len(images) > 0
     assert all(isinstance(img, Image.Image) for img in images)
 
+def test_iter_pages(pdf_processor, sample_pdf_path):
+    """Test streaming page rendering"""
+    pages = pdf_processor.iter_pages(sample_pdf_path)
+    first_page = next(pages)
+    assert isinstance(first_page, Image.Image)
+    assert 1 + sum(1 for _ in pages) == pdf_processor.page_count(sample_pdf_path)
+
+def test_pymupdf_rasterizer_gray(sample_pdf_path):
+    """Test in-process rendering straight into a grayscale numpy buffer"""
+    from vhtml.core.rasterizer import get_rasterizer
+    page = get_rasterizer('pymupdf').render_page(sample_pdf_path, 0, dpi=72, colorspace='gray')
+    assert page.ndim == 2
+    assert page.dtype.name == 'uint8'
+
+def test_pymupdf_renders_from_several_threads(sample_pdf_path):
+    """Test that page renders and clip renders running in parallel threads match serial output"""
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    from vhtml.core.rasterizer import get_rasterizer
+    rasterizer = get_rasterizer('pymupdf')
+    page = rasterizer.render_page(sample_pdf_path, 0, dpi=72, colorspace='gray')
+    clip = rasterizer.render_clips(sample_pdf_path, 0, 150, [(10, 10, 200, 100)], 'gray')[0]
+    
+    def render(index):
+        if index % 2:
+            return rasterizer.render_clips(sample_pdf_path, 0, 150, [(10, 10, 200, 100)], 'gray')[0], clip
+        return next(rasterizer.iter_pages(sample_pdf_path, 72, 'gray')), page
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for result, expected in executor.map(render, range(16)):
+            assert np.array_equal(result, expected)
+
+def test_render_regions_matches_full_page(sample_pdf_path):
+    """Test that block regions re-rendered at OCR DPI line up with the full-page render"""
+    import numpy as np
+    processor = PDFProcessor(dpi=300, denoise='none')
+    full = processor._to_gray(next(processor.iter_pages(sample_pdf_path)))
+    position, region = processor.render_regions(
+        sample_pdf_path, 0, [{'x': 20, 'y': 20, 'width': 200, 'height': 100}], source_dpi=100
+    )[0]
+    
+    assert position['x'] == 60 and position['y'] == 60
+    assert abs(position['width'] - 600) <= 1 and abs(position['height'] - 300) <= 1
+    expected = full[position['y']:position['y'] + region.shape[0], position['x']:position['x'] + region.shape[1]]
+    assert np.abs(region.astype(int) - expected).mean() < 1.0
+
+def test_extract_text_blocks(pdf_processor, sample_pdf_path):
+    """Test building blocks from the PDF text layer"""
+    blocks = pdf_processor.extract_text_blocks(sample_pdf_path, 0)
+    if blocks is None:
+        pytest.skip("Sample PDF has no usable text layer")
+    assert all(block['source'] in ('text_layer', 'ocr') for block in blocks)
+    assert all('position' in block for block in blocks)
+
+def test_parallel_preprocessing_keeps_page_order(sample_pdf_path):
+    """Test that page-parallel preprocessing returns pages in document order"""
+    processor = PDFProcessor(dpi=72, workers=2, pages_per_shard=1)
+    page_indices = [index for index, _, _ in processor.iter_preprocessed_pages(sample_pdf_path)]
+    assert page_indices == list(range(processor.page_count(sample_pdf_path)))
+
+def test_worker_processor_keeps_tuned_preprocessing(tmp_path):
+    """Test that a processor rebuilt in a worker process uses the parent's tuned settings and cache keys"""
+    import pickle
+    from vhtml.core.page_cache import PageCache
+    processor = PDFProcessor(dpi=200, cache=PageCache(str(tmp_path)), denoise='nlmeans', deskew=False)
+    processor.noise_thresholds = (2.0, 6.0)
+    processor.denoise_params = (5, 7, 15)
+    processor.deskew_min_angle = 1.0
+    processor.deskew_max_side = 800
+    processor.deskew_max_angle = 5
+    
+    worker = PDFProcessor._from_worker_config(pickle.loads(pickle.dumps(processor._worker_config())))
+    assert worker._preprocess_config() == processor._preprocess_config()
+    assert worker._cache_key(("doc", 0), 'preprocess') == processor._cache_key(("doc", 0), 'preprocess')
+
+def test_page_cache_roundtrip_and_eviction(tmp_path):
+    """Test page cache hits, misses and size-bounded eviction"""
+    import numpy as np
+    from vhtml.core.page_cache import PageCache
+    cache = PageCache(str(tmp_path), max_bytes=10_000)
+    page = np.random.default_rng(0).integers(0, 255, (60, 80), dtype=np.uint8)
+    keys = [PageCache.make_key("doc", index, 300, "preprocess", {}) for index in range(3)]
+    
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], page)
+    size = cache.stats()['size_bytes']
+    cache.put(keys[0], page)
+    assert cache.stats()['size_bytes'] == size
+    assert np.array_equal(cache.get(keys[0]), page)
+    for key in keys[1:]:
+        cache.put(key, page)
+    
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['evictions'] > 0
+    assert stats['size_bytes'] <= 10_000
+
+def test_page_context_computes_each_transform_once():
+    """Test that gray/denoised/binary page arrays are computed at most once"""
+    import numpy as np
+    from vhtml.core.page_context import PageContext
+    page = Image.fromarray(np.full((40, 60, 3), 255, dtype=np.uint8))
+    context = PageContext(page)
+    
+    for _ in range(3):
+        context.binary
+        context.crop({'x': 0, 'y': 0, 'width': 10, 'height': 10})
+    
+    assert context.steps['denoise']['computed'] == 1
+    assert context.steps['binarize']['computed'] == 1
+    assert context.steps['gray']['computed'] == 1
+
+def test_adaptive_denoise_skips_clean_pages():
+    """Test that the noise estimator keeps NL-means off clean pages only"""
+    import numpy as np
+    processor = PDFProcessor()
+    clean = np.full((400, 300), 255, dtype=np.uint8)
+    clean[100:110, 50:250] = 0
+    noisy = np.clip(clean + np.random.default_rng(0).normal(0, 25, clean.shape), 0, 255).astype(np.uint8)
+    
+    assert processor._denoise(clean)[1]['denoise_method'] == 'none'
+    assert processor._denoise(noisy)[1]['denoise_method'] == 'nlmeans'
+
+def test_deskew_estimates_angle_on_downscaled_page():
+    """Test that the skew angle is recovered and corrected with a single warp"""
+    import numpy as np
+    import cv2
+    page = np.full((1650, 1275), 255, dtype=np.uint8)
+    for y in range(100, 1550, 40):
+        cv2.putText(page, "Lorem ipsum dolor sit amet 12345", (80, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    rotation = cv2.getRotationMatrix2D((637.5, 825.0), 3.0, 1.0)
+    skewed = cv2.warpAffine(page, rotation, (1275, 1650), borderValue=255)
+
+    processor = PDFProcessor()
+    angle = processor._estimate_skew_angle(skewed)
+    assert angle == pytest.approx(-3.0, abs=0.2)
+    assert abs(processor._estimate_skew_angle(processor._deskew(skewed, angle))) < processor.deskew_min_angle
+    assert processor._deskew(page) is page
+
 def test_ocr_engine(ocr_engine, sample_pdf_path):
     """Test OCR engine with a sample image"""
     images = PDFProcessor().pdf_to_images(sample_pdf_path)
@@ -47,6 +185,42 @@ def test_ocr_engine(ocr_engine, sample_pdf_path):
     assert lang in ['pl', 'en', 'de', 'unknown']
     assert 0 <= confidence <= 1.0
 
+def test_page_ocr_assigns_words_to_smallest_containing_block():
+    """Test word-to-block assignment used by the single-pass page OCR"""
+    import numpy as np
+    words = np.array([[10, 10, 60, 20], [20, 160, 40, 20], [900, 900, 10, 10]], dtype=float)
+    blocks = [
+        {'x': 0, 'y': 0, 'width': 500, 'height': 500},
+        {'x': 0, 'y': 150, 'width': 200, 'height': 100},
+    ]
+    assert OCREngine._assign_words_to_blocks(words, blocks).tolist() == [0, 1, -1]
+
+def test_block_executor_keeps_order_and_isolates_errors():
+    """Test that concurrent block OCR returns results in block order and isolates failures"""
+    import time
+    from vhtml.core.block_executor import BlockOCRExecutor
+    
+    def task(index):
+        time.sleep(0.01 * (5 - index))
+        if index == 2:
+            raise RuntimeError("OCR failed")
+        return index
+    
+    with BlockOCRExecutor(max_workers=4) as executor:
+        outcomes = executor.run([lambda index=index: task(index) for index in range(5)])
+    
+    assert [outcome['result'] for outcome in outcomes] == [0, 1, None, 3, 4]
+    assert isinstance(outcomes[2]['error'], RuntimeError)
+    assert all(outcome['duration_seconds'] > 0 for outcome in outcomes)
+
+def test_document_language_from_text_sample(ocr_engine):
+    """Test document-level language detection used to pick a single OCR model"""
+    sample = "Faktura VAT nr 12/2024. Sprzedawca i nabywca potwierdzają kwotę do zapłaty w terminie."
+    assert ocr_engine.detect_document_language(sample) == 'pl'
+    assert ocr_engine.detect_document_language("") is None
+    assert ocr_engine._tesseract_lang('pl') == 'pol'
+    assert ocr_engine._tesseract_lang(None) == 'pol+eng+deu'
+
 def test_layout_analysis(layout_analyzer, sample_pdf_path):
     """Test layout analysis on a sample PDF"""
     images = PDFProcessor().pdf_to_images(sample_pdf_path)
@@ -88,3 +262,401 @@ def test_html_generation(html_generator, sample_pdf_path, tmp_path):
     
     assert os.path.exists(output_path)
     assert os.path.getsize(output_path) > 0
+
+def test_ocr_cache_shares_results_across_instances(tmp_path):
+    """Test crop-hash OCR cache keys and the persistent SQLite store"""
+    import numpy as np
+    from vhtml.core.ocr_cache import OCRCache
+    block = np.full((40, 120), 255, dtype=np.uint8)
+    block[15:25, 10:100] = 0
+    framed = np.full((60, 160), 255, dtype=np.uint8)
+    framed[25:35, 30:120] = 0
+    settings = {'engine': 'tesseract', 'lang': 'pol', 'psm': 3, 'scope': 'block'}
+    key = OCRCache.make_key(Image.fromarray(block), settings)
+    
+    assert OCRCache.make_key(Image.fromarray(framed), settings) == key
+    assert OCRCache.make_key(Image.fromarray(block), {**settings, 'psm': 6}) != key
+    
+    cache = OCRCache(str(tmp_path), memory_entries=1)
+    assert cache.get(key) is None
+    cache.put(key, ("Faktura", "pl", 0.9))
+    cache.close()
+    
+    assert OCRCache(str(tmp_path)).get(key) == ("Faktura", "pl", 0.9)
+
+def test_ocr_failure_is_not_cached(tmp_path, monkeypatch):
+    """Test that an empty result from a failed OCR call does not blank the block in later documents"""
+    import numpy as np
+    from vhtml.core.ocr_cache import OCRCache
+    block = np.full((40, 120), 255, dtype=np.uint8)
+    block[15:25, 10:100] = 0
+    engine = OCREngine(cache=OCRCache(str(tmp_path)))
+    
+    def fail(image, lang):
+        raise RuntimeError("tesseract crashed")
+    monkeypatch.setattr(engine, '_tesseract_to_string', fail)
+    assert engine.extract_text_from_image(Image.fromarray(block), 'en') == ("", "unknown", 0.0)
+    
+    monkeypatch.setattr(engine, '_tesseract_to_string', lambda image, lang: "Invoice")
+    monkeypatch.setattr(engine, '_calculate_ocr_confidence', lambda image, text, lang: 0.9)
+    assert engine.extract_text_from_image(Image.fromarray(block), 'en')[0] == "Invoice"
+
+def test_easyocr_batch_pads_crops_and_keeps_order():
+    """Test batched EasyOCR recognition of differently sized block crops"""
+    import numpy as np
+    from vhtml.core.easyocr_reader import SharedReader
+    
+    class Reader:
+        calls = []
+        def readtext_batched(self, images, batch_size=1):
+            self.calls.append([image.shape for image in images])
+            return [[([], f"{int((image < 128).sum())}", 0.9)] for image in images]
+    
+    crops = [np.full((20, 50), 255, np.uint8), np.zeros((10, 10), np.uint8), np.zeros((30, 5), np.uint8)]
+    results = SharedReader(Reader()).readtext_batched(crops, batch_size=2)
+    
+    assert [result[0][1] for result in results] == ['0', '100', '150']
+    assert Reader.calls == [[(20, 50), (20, 50)], [(30, 5)]]
+    assert OCREngine._join_easyocr(results[1] + results[2]) == ('100 150', 0.9)
+
+def test_cascade_escalates_only_uncertain_blocks(monkeypatch):
+    """Test that the cascade re-runs only low-confidence or sparse blocks and keeps the better result"""
+    import vhtml.core.ocr_engine as ocr_engine_module
+    
+    class Reader:
+        def readtext_batched(self, images):
+            return [[([], "Faktura VAT", 0.85)] for _ in images]
+    
+    monkeypatch.setattr(ocr_engine_module, 'get_reader', lambda languages: Reader())
+    engine = OCREngine(cascade=True)
+    images = [Image.new('L', (400, 50), 255) for _ in range(3)]
+    results = [("Sprzedawca ABC sp. z o.o.", "pl", 0.95), ("Fakt", "pl", 0.4), ("x", "pl", 0.8)]
+    
+    escalated = engine._escalate(images, results)
+    
+    assert escalated[0] == results[0]
+    assert escalated[1][0] == "Faktura VAT" and escalated[2][0] == "Faktura VAT"
+    assert engine.cascade_stats()['escalated'] == 2
+
+def test_block_classifier_separates_text_graphics_and_blank():
+    """Test that blank and decorative blocks are tagged before OCR"""
+    import numpy as np
+    import cv2
+    from vhtml.core.block_classifier import BlockContentClassifier
+    page = np.full((1200, 1600), 255, dtype=np.uint8)
+    cv2.putText(page, "Faktura VAT 12/2024", (100, 200), cv2.FONT_HERSHEY_SIMPLEX, 2.0, 0, 4)
+    cv2.line(page, (100, 400), (1500, 400), 0, 6)
+    cv2.rectangle(page, (100, 600), (700, 1000), 0, 4)
+    _, binary = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    positions = [
+        {'x': 80, 'y': 130, 'width': 1000, 'height': 100},
+        {'x': 90, 'y': 390, 'width': 1420, 'height': 20},
+        {'x': 95, 'y': 595, 'width': 610, 'height': 410},
+        {'x': 900, 'y': 600, 'width': 500, 'height': 400},
+    ]
+    assert BlockContentClassifier().classify(binary, positions) == ['text', 'graphic', 'graphic', 'blank']
+
+def test_block_detector_merges_nested_and_overlapping_boxes(layout_analyzer):
+    """Test that detected blocks never overlap (nested and touching boxes are merged)"""
+    import numpy as np
+    import cv2
+    from vhtml.core.spatial_index import merge_boxes
+    boxes = np.array([[0, 0, 10, 10], [5, 5, 20, 20], [100, 100, 110, 110], [21, 0, 30, 5], [40, 0, 50, 10]])
+    merged, groups = merge_boxes(boxes, gap=1)
+    assert merged.tolist() == [[0, 0, 30, 20], [100, 100, 110, 110], [40, 0, 50, 10]]
+    assert groups.tolist() == [0, 0, 1, 0, 2]
+    
+    page = np.full((1200, 1200), 255, dtype=np.uint8)
+    cv2.rectangle(page, (100, 100), (700, 700), 0, 140)
+    cv2.rectangle(page, (300, 300), (500, 500), 0, -1)
+    cv2.rectangle(page, (850, 900), (1100, 1100), 0, -1)
+    blocks = layout_analyzer._detect_text_blocks(page)
+    assert len(blocks) == 2
+    frame = blocks[0]['position']
+    assert frame['x'] < 300 and frame['x'] + frame['width'] > 500
+
+def test_reading_order_columns_and_table_rows(layout_analyzer):
+    """Test reading order: sections top-down, text columns left-right, table grids row by row"""
+    from vhtml.core.reading_order import reading_order
+    def box(x, y, width, height):
+        return {'position': {'x': x, 'y': y, 'width': width, 'height': height}}
+    # Stopka, dwie kolumny akapitów i nagłówek - podane od dołu strony
+    page = [box(100, 3000, 2000, 80), box(1300, 1500, 900, 300), box(100, 1500, 900, 500),
+            box(1300, 700, 900, 600), box(100, 700, 900, 700), box(100, 100, 2000, 150)]
+    ordered = layout_analyzer.order_blocks(page)
+    assert [block['position']['y'] for block in ordered] == [100, 700, 1500, 700, 1500, 3000]
+    assert [block['column'] for block in ordered] == [0, 0, 0, 1, 1, 0]
+    
+    # Dwie kolumny, każda podzielona na dwie węższe - numery kolumn nie mogą się powtarzać
+    nested = [{'x': x, 'y': y + shift, 'width': 400, 'height': 300}
+              for x, shift in ((0, 0), (550, 20), (1400, 40), (1950, 60)) for y in (100, 450)]
+    order, _, columns = reading_order(nested)
+    assert [(nested[i]['x'], columns[i]) for i in order[::2]] == [(0, 0), (550, 1), (1400, 2), (1950, 3)]
+    
+    table = [{'x': x, 'y': 100 + row * 50, 'width': 200, 'height': 40}
+             for row in range(4) for x in (900, 500, 100)]
+    order, lines, _ = reading_order(table)
+    assert [(table[i]['y'], table[i]['x']) for i in order[:4]] == [(100, 100), (100, 500), (100, 900), (150, 100)]
+    assert lines[order[3]] == 1
+
+def test_table_detector_finds_ruled_and_line_item_tables():
+    """Test table grids: full ruling, horizontal-only line items, and a lone rule that is not a table"""
+    import numpy as np
+    import cv2
+    from vhtml.core.table_detector import TableDetector
+    page = np.zeros((2000, 1600), dtype=np.uint8)
+    # Pełna siatka 3 wiersze x 4 kolumny
+    for y in (100, 180, 260, 340):
+        cv2.line(page, (100, y), (1300, y), 255, 3)
+    for x in (100, 400, 700, 1000, 1300):
+        cv2.line(page, (x, 100), (x, 340), 255, 3)
+    # Pozycje faktury - tylko linie poziome, kolumny rozdzielone pustymi pasami
+    for y in (800, 880, 960, 1040):
+        cv2.line(page, (100, y), (1300, y), 255, 3)
+    for row in range(3):
+        for x in (150, 550, 950):
+            cv2.putText(page, "ITEM-42", (x, 855 + row * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 255, 3)
+    # Pojedyncza linia (podkreślenie podpisu)
+    cv2.line(page, (100, 1600), (900, 1600), 255, 3)
+    
+    detector = TableDetector()
+    tables = detector.detect(page)
+    assert len(tables) == 2
+    grid, items = tables
+    assert (len(grid['cells']), len(grid['cells'][0])) == (3, 4)
+    assert (len(items['cells']), len(items['cells'][0])) == (3, 3)
+    assert all(200 < cell['width'] < 500 for cell in items['cells'][0])
+    
+    gray = 255 - page
+    cleaned = detector.erase_lines(gray)
+    assert (cleaned[100] == 255).all() and (cleaned[820:860, 150:350] == 0).any()
+
+def test_layout_index_matches_known_vendor_layout(tmp_path):
+    """Test that a stored page layout is matched again (also after reopening) and other layouts are not"""
+    import numpy as np
+    import cv2
+    from vhtml.core.layout_index import LayoutIndex
+    def page(lines):
+        gray = np.full((1100, 850), 255, dtype=np.uint8)
+        for text, (x, y) in lines:
+            cv2.putText(gray, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        return gray, (gray < 128).astype(np.uint8) * 255
+    header = [("ACME SUPPLIES", (60, 80)), ("Warszawa", (60, 130))]
+    invoice, binary = page(header + [("INVOICE 001", (500, 220))])
+    blocks = [{'position': {'x': 50, 'y': 40, 'width': 300, 'height': 110}, 'content_type': 'text'},
+              {'position': {'x': 490, 'y': 190, 'width': 220, 'height': 45}, 'content_type': 'text'}]
+    settings = {'layout_dpi': 100}
+    
+    index = LayoutIndex(str(tmp_path))
+    template_id = index.add(invoice, settings, 'universal', blocks, [])
+    index.close()
+    index = LayoutIndex(str(tmp_path))
+    other_invoice, other_binary = page(header + [("INVOICE 877", (500, 220))])
+    assert index.match(other_invoice, other_binary, settings)['id'] == template_id
+    assert index.match(other_invoice, other_binary, {'layout_dpi': 150}) is None
+    other_vendor, other_vendor_binary = page([("OTHER GMBH", (300, 600)), ("Rechnung", (60, 900))])
+    assert index.match(other_vendor, other_vendor_binary, settings) is None
+    assert index.stats() == {'templates': 1, 'hits': 1, 'misses': 2}
+
+def test_stage_pipeline_keeps_order_and_reports_stage_metrics():
+    """Test that pipelined stages overlap, return results in input order and surface stage errors"""
+    import time
+    from vhtml.core.pipeline import StagePipeline
+    def slow_for_even(item):
+        time.sleep(0.02 if item % 2 == 0 else 0.0)
+        return item * 10
+    pipeline = StagePipeline([('render', lambda item: item + 1, 1), ('analyze', slow_for_even, 3)], queue_size=1)
+    assert list(pipeline.run(range(8))) == [10, 20, 30, 40, 50, 60, 70, 80]
+    metrics = pipeline.metrics()
+    assert metrics['render']['items'] == metrics['analyze']['items'] == 8
+    assert metrics['analyze']['workers'] == 3 and metrics['analyze']['busy_seconds'] > 0
+    
+    def fail_on_three(item):
+        if item == 3:
+            raise ValueError("bad page")
+        return item
+    results = []
+    with pytest.raises(ValueError):
+        for result in StagePipeline([('analyze', fail_on_three, 2)]).run(range(6)):
+            results.append(result)
+    assert results == [0, 1, 2]
+
+def test_batch_analyze_in_worker_processes_keeps_results_shape(tmp_path):
+    """Test that the process-pool batch returns the same per-file results as the serial batch"""
+    import fitz
+    from vhtml.main import AdvancedAnalyzer
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for name, pages in (("small.pdf", 1), ("large.pdf", 3)):
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page()
+        doc.save(str(pdf_dir / name))
+    (pdf_dir / "broken.pdf").write_text("not a pdf")
+    
+    analyzer = AdvancedAnalyzer(batch_workers=2)
+    results = analyzer.batch_analyze(str(pdf_dir), str(tmp_path / "out"))
+    assert set(results) == {"small.pdf", "large.pdf", "broken.pdf"}
+    assert results["large.pdf"]["status"] == "success"
+    assert os.path.exists(results["small.pdf"]["html_path"])
+    assert set(results["broken.pdf"]) == {"status", "error"}
+    assert analyzer.statistics['batch']['succeeded'] == 2
+    # Dokumenty analizowały procesy robocze - analizator procesu głównego nie powstał
+    assert 'ocr_engine' not in vars(analyzer)
+
+def test_batch_survives_worker_crash(tmp_path, monkeypatch):
+    """Test that a dying worker process fails only the documents of its pool and the batch finishes"""
+    import fitz
+    from vhtml.main import AdvancedAnalyzer, DocumentAnalyzer
+    from vhtml.core.batch_journal import BatchJournal
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for index, pages in enumerate((6, 1, 1, 1, 1, 1, 1)):
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page()
+        doc.save(str(pdf_dir / ("crash.pdf" if index == 0 else f"doc{index}.pdf")))
+    
+    analyze_document = DocumentAnalyzer.analyze_document
+    def crash_on_first(self, pdf_path, output_dir="output"):
+        if pdf_path.endswith("crash.pdf"):
+            os._exit(1)
+        return analyze_document(self, pdf_path, output_dir)
+    # Procesy robocze powstają przez fork - dziedziczą podmienioną metodę
+    monkeypatch.setattr(DocumentAnalyzer, 'analyze_document', crash_on_first)
+    
+    out = tmp_path / "out"
+    analyzer = AdvancedAnalyzer(batch_workers=2)
+    results = analyzer.batch_analyze(str(pdf_dir), str(out))
+    assert len(results) == 7
+    assert results["crash.pdf"]["status"] == "error"
+    assert analyzer.statistics['batch']['succeeded'] >= 1
+    journal = BatchJournal(str(out / "batch_journal.sqlite"))
+    assert journal.entry(str(pdf_dir / "crash.pdf"))['status'] == 'error'
+
+def test_batch_journal_resumes_and_limits_retries(tmp_path, monkeypatch):
+    """Test that a rerun skips finished documents and retries failures only up to the attempt limit"""
+    import fitz
+    from vhtml.main import AdvancedAnalyzer
+    from vhtml.core.batch_journal import BatchJournal
+    from vhtml.core.page_cache import PageCache
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(pdf_dir / "ok.pdf"))
+    (pdf_dir / "broken.pdf").write_text("not a pdf")
+    out = tmp_path / "out"
+    
+    analyzer = AdvancedAnalyzer(max_attempts=2)
+    file_hash = PageCache.file_hash
+    hashed = []
+    monkeypatch.setattr(PageCache, 'file_hash', staticmethod(lambda path: hashed.append(path) or file_hash(path)))
+    for run in range(3):
+        hashed.clear()
+        results = analyzer.batch_analyze(str(pdf_dir), str(out))
+        assert results["ok.pdf"]["status"] == "success" and results["broken.pdf"]["status"] == "error"
+        assert analyzer.statistics['batch']['processed'] == [2, 1, 0][run]
+        assert sorted(hashed) == sorted(str(pdf_dir / name) for name in ("ok.pdf", "broken.pdf"))
+    
+    journal = BatchJournal(str(out / "batch_journal.sqlite"))
+    assert journal.entry(str(pdf_dir / "ok.pdf"))['attempts'] == 1
+    assert journal.entry(str(pdf_dir / "broken.pdf"))['attempts'] == 2
+
+def test_layout_template_is_not_reused_across_ocr_settings(tmp_path):
+    """Test that a template recorded with one OCR language (or mode) misses for another"""
+    import numpy as np
+    import cv2
+    from vhtml.main import DocumentAnalyzer
+    gray = np.full((1100, 850), 255, dtype=np.uint8)
+    cv2.putText(gray, "ACME SUPPLIES", (60, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    binary = (gray < 128).astype(np.uint8) * 255
+    blocks = [{'position': {'x': 50, 'y': 40, 'width': 300, 'height': 60}, 'content_type': 'text',
+               'table': None, 'digest': 'd', 'result': ("ACME SUPPLIES", "en", 0.9)}]
+    
+    english = DocumentAnalyzer(layout_index_dir=str(tmp_path), ocr_language='en')
+    english.layout_index.add(gray, english.layout_settings, 'universal', blocks, [])
+    assert english.layout_index.match(gray, binary, english.layout_settings) is not None
+    for settings in ({'ocr_language': 'pl'}, {'ocr_language': 'auto'}, {'ocr_language': 'en', 'ocr_mode': 'block'}):
+        other = DocumentAnalyzer(layout_index_dir=str(tmp_path), **settings)
+        assert other.layout_index.match(gray, binary, other.layout_settings) is None
+
+def test_block_thumbnails_come_from_their_own_page(tmp_path):
+    """Test that blocks on every page (not only the first) get an image cut from their page"""
+    import json
+    import fitz
+    from vhtml.main import DocumentAnalyzer
+    pdf_path = tmp_path / "two_pages.pdf"
+    doc = fitz.open()
+    for text in ("Invoice 1001 issued to ACME Supplies", "Payment terms: thirty days net"):
+        page = doc.new_page()
+        page.insert_text((72, 100), text, fontsize=24)
+    doc.save(str(pdf_path))
+    out = tmp_path / "out"
+    out.mkdir()
+    
+    html_path = DocumentAnalyzer(use_text_layer=True).analyze_document(str(pdf_path), str(out))
+    with open(f"{os.path.splitext(html_path)[0]}_metadata.json", encoding='utf-8') as f:
+        blocks = json.load(f)['blocks']
+    assert {block['page'] for block in blocks} == {1, 2}
+    assert all(block['image_data'].startswith("data:image/png;base64,") for block in blocks)
+    page_two = [block for block in blocks if block['page'] == 2]
+    assert "Payment" in page_two[0]['content']
+    assert page_two[0]['image_data'] != blocks[0]['image_data']
+
+def test_document_confidence_ignores_skipped_blocks(tmp_path, monkeypatch):
+    """Test that blank and graphic blocks (confidence 0.0, never OCR'd) do not lower the document confidence"""
+    import json
+    import fitz
+    from vhtml.main import DocumentAnalyzer
+    pdf_path = tmp_path / "page.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(pdf_path))
+    out = tmp_path / "out"
+    out.mkdir()
+    
+    analyze_page = DocumentAnalyzer._analyze_page
+    def with_blocks(self, *args, **kwargs):
+        result = analyze_page(self, *args, **kwargs)
+        position = {'x': 0, 'y': 0, 'width': 10, 'height': 10}
+        result['blocks'] = [
+            {'position': position, 'text': "Faktura VAT", 'language': 'pl', 'confidence': 0.9,
+             'formatting': self._analyze_formatting("Faktura VAT")},
+            {'position': position, 'text': "", 'language': 'unknown', 'confidence': 0.0,
+             'formatting': self._analyze_formatting(""), 'content_type': 'graphic'}
+        ]
+        return result
+    monkeypatch.setattr(DocumentAnalyzer, '_analyze_page', with_blocks)
+    
+    html_path = DocumentAnalyzer().analyze_document(str(pdf_path), str(out))
+    with open(f"{os.path.splitext(html_path)[0]}_metadata.json", encoding='utf-8') as f:
+        assert json.load(f)['confidence'] == pytest.approx(0.9)
+
+def test_failed_table_keeps_ocr_pixel_position_with_layout_dpi(tmp_path, monkeypatch):
+    """Test that a table whose OCR failed is still scaled from layout to OCR pixels"""
+    import json
+    import fitz
+    from vhtml.main import DocumentAnalyzer
+    pdf_path = tmp_path / "table.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(pdf_path))
+    out = tmp_path / "out"
+    out.mkdir()
+    
+    analyzer = DocumentAnalyzer(layout_dpi=100)
+    cell = {'x': 10, 'y': 20, 'width': 100, 'height': 50}
+    monkeypatch.setattr(analyzer.layout_analyzer, 'analyze_layout', lambda page_context, dpi: ('universal', []))
+    monkeypatch.setattr(analyzer.table_detector, 'detect',
+                        lambda binary, scale: [{'position': dict(cell), 'cells': [[dict(cell)]]}])
+    def fail(*args):
+        raise RuntimeError("table OCR failed")
+    monkeypatch.setattr(analyzer, '_recognize_table', fail)
+    
+    html_path = analyzer.analyze_document(str(pdf_path), str(out))
+    with open(f"{os.path.splitext(html_path)[0]}_metadata.json", encoding='utf-8') as f:
+        table, = json.load(f)['tables']
+    factor = analyzer.pdf_processor.dpi / 100
+    assert table['position'] == {key: int(value * factor) for key, value in cell.items()}
+    assert table['rows'][0][0]['position'] == table['position']
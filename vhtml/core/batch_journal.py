@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Batch Journal Module
+Trwały dziennik zadań trybu wsadowego - wznawianie przerwanej partii dokumentów
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from vhtml.core.page_cache import PageCache
+
+
+class BatchJournal:
+    """
+    Dziennik dokumentów partii w bazie SQLite
+
+    Dla każdego dokumentu zapisywany jest stan ('running', 'success',
+    'error'), skrót treści, ścieżki wyników, czasy i liczba prób. Baza działa
+    w trybie WAL z oczekiwaniem na blokadę, więc zapisy mogą wykonywać
+    równolegle procesy robocze - każdy przez własne połączenie. Po ponownym
+    uruchomieniu partii dokumenty ukończone i niezmienione są pomijane,
+    a nieudane (także przerwane w trakcie) ponawiane do limitu prób.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        """
+        Inicjalizacja dziennika
+
+        Args:
+            db_path: Ścieżka pliku bazy (np. w katalogu wyjściowym partii)
+            max_attempts: Maksymalna liczba prób przetworzenia dokumentu
+        """
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA busy_timeout=30000')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            'input_path TEXT PRIMARY KEY, input_hash TEXT, status TEXT, attempts INTEGER, '
+            'output_dir TEXT, html_path TEXT, error TEXT, started_at REAL, finished_at REAL, '
+            'duration_seconds REAL, worker_pid INTEGER)'
+        )
+        self._db.commit()
+
+    def entry(self, input_path: str) -> Optional[Dict]:
+        """
+        Odczytuje wpis dokumentu
+
+        Args:
+            input_path: Ścieżka pliku wejściowego
+
+        Returns:
+            Wpis (kolumny dziennika) lub None, jeśli dokument nie był przetwarzany
+        """
+        with self._lock:
+            cursor = self._db.execute('SELECT * FROM documents WHERE input_path = ?',
+                                      (os.path.abspath(input_path),))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+
+    def skip_entry(self, input_path: str, input_hash: Optional[str] = None) -> Optional[Dict]:
+        """
+        Sprawdza, czy dokument można pominąć przy wznowieniu partii
+
+        Args:
+            input_path: Ścieżka pliku wejściowego
+            input_hash: Skrót treści pliku (PageCache.file_hash), jeśli już policzony
+
+        Returns:
+            None - dokument trzeba przetworzyć; w przeciwnym razie wpis dokumentu
+            ukończonego (niezmieniony plik, istniejący HTML) lub nieudanego
+            po wyczerpaniu limitu prób
+        """
+        entry = self.entry(input_path)
+        if entry is None or entry['input_hash'] != (input_hash or PageCache.file_hash(input_path)):
+            return None
+        if entry['status'] == 'success' and entry['html_path'] and os.path.exists(entry['html_path']):
+            return entry
+        if entry['status'] != 'success' and entry['attempts'] >= self.max_attempts:
+            return entry
+        return None
+
+    def start(self, input_path: str, output_dir: str, input_hash: Optional[str] = None) -> None:
+        """
+        Odnotowuje rozpoczęcie próby przetworzenia dokumentu
+
+        Zmieniony plik zaczyna liczenie prób od nowa.
+
+        Args:
+            input_path: Ścieżka pliku wejściowego
+            output_dir: Katalog wyników dokumentu
+            input_hash: Skrót treści pliku (PageCache.file_hash), jeśli już policzony
+        """
+        input_hash = input_hash or PageCache.file_hash(input_path)
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO documents (input_path, input_hash, status, attempts, output_dir, html_path, '
+                'error, started_at, finished_at, duration_seconds, worker_pid) '
+                "VALUES (?, ?, 'running', 1, ?, NULL, NULL, ?, NULL, NULL, ?) "
+                'ON CONFLICT(input_path) DO UPDATE SET '
+                'attempts = CASE WHEN input_hash = excluded.input_hash THEN attempts + 1 ELSE 1 END, '
+                "input_hash = excluded.input_hash, status = 'running', output_dir = excluded.output_dir, "
+                'html_path = NULL, error = NULL, started_at = excluded.started_at, finished_at = NULL, '
+                'duration_seconds = NULL, worker_pid = excluded.worker_pid',
+                (os.path.abspath(input_path), input_hash, output_dir, time.time(), os.getpid())
+            )
+            self._db.commit()
+
+    def finish(self, input_path: str, result: Dict, duration_seconds: float) -> None:
+        """
+        Odnotowuje wynik próby przetworzenia dokumentu
+
+        Args:
+            input_path: Ścieżka pliku wejściowego
+            result: Wynik trybu wsadowego ({'status', 'html_path'} lub {'status', 'error'})
+            duration_seconds: Czas przetwarzania dokumentu
+        """
+        with self._lock:
+            self._db.execute(
+                'UPDATE documents SET status = ?, html_path = ?, error = ?, finished_at = ?, '
+                'duration_seconds = ? WHERE input_path = ?',
+                (result['status'], result.get('html_path'), result.get('error'), time.time(),
+                 duration_seconds, os.path.abspath(input_path))
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """Zamyka bazę"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Block Classifier Module
+Wstępna klasyfikacja zawartości bloków (pusty, grafika, tekst) przed OCR
+"""
+
+from typing import Dict, List
+import numpy as np
+import cv2
+
+
+BLOCK_CONTENT_TYPES = ('blank', 'graphic', 'text')
+
+
+class BlockContentClassifier:
+    """
+    Klasyfikator zawartości bloków na podstawie zbinaryzowanej strony
+
+    Spójne składowe strony wyznaczane są raz; składowe o wymiarach
+    i proporcjach znaku pisma liczone są jako glify. Blok z (prawie) zerową
+    ilością tuszu jest pusty, blok, w którym glify stanowią małą część
+    tuszu (linie, ramki, pieczątki, logotypy), jest grafiką - do OCR trafiają
+    tylko bloki tekstowe. Progi wymiarów podane są dla 300 DPI.
+    """
+
+    def __init__(self):
+        # Udział tuszu w powierzchni bloku, poniżej którego blok jest pusty
+        self.blank_ink_ratio = 0.002
+        # Wysokość glifu (px w 300 DPI) i maksymalny stosunek szerokości do wysokości
+        # (zlane litery słowa lub podkreślenie nadal są glifem, linia pozioma - nie)
+        self.min_glyph_height = 6
+        self.max_glyph_height = 120
+        self.max_glyph_aspect = 15.0
+        # Minimalny udział tuszu glifów w tuszu bloku tekstowego
+        self.min_glyph_ink_fraction = 0.4
+
+    def classify(self, binary: np.ndarray, positions: List[Dict], scale: float = 1.0) -> List[str]:
+        """
+        Klasyfikuje zawartość bloków strony
+
+        Args:
+            binary: Strona zbinaryzowana (tekst = 255, tło = 0), np. PageContext.binary
+            positions: Pozycje bloków (x, y, width, height) w pikselach strony
+            scale: Rozdzielczość strony względem 300 DPI
+
+        Returns:
+            Typ zawartości każdego bloku: 'blank', 'graphic' lub 'text'
+        """
+        if not positions:
+            return []
+        ink = (binary > 0).astype(np.uint8)
+        height, width = ink.shape
+        boxes = np.array([[p['x'], p['y'], p['x'] + p['width'], p['y'] + p['height']] for p in positions],
+                         dtype=np.int64)
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+        x1, y1, x2, y2 = boxes.T
+        areas = np.maximum((x2 - x1) * (y2 - y1), 1)
+
+        # Tusz w każdym bloku z obrazu całkowego - O(1) na blok
+        integral = cv2.integral(ink)
+        block_ink = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+
+        # Glify: składowe o wysokości i proporcjach znaku, przypisane do bloku środkiem
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        stats, centroids = stats[1:], centroids[1:]
+        comp_w = stats[:, cv2.CC_STAT_WIDTH]
+        comp_h = stats[:, cv2.CC_STAT_HEIGHT]
+        glyph = ((comp_h >= max(2, self.min_glyph_height * scale))
+                 & (comp_h <= self.max_glyph_height * scale)
+                 & (comp_w <= comp_h * self.max_glyph_aspect))
+        cx, cy = centroids[glyph, 0], centroids[glyph, 1]
+        glyph_area = stats[glyph, cv2.CC_STAT_AREA]
+        inside = ((cx[None, :] >= x1[:, None]) & (cx[None, :] < x2[:, None])
+                  & (cy[None, :] >= y1[:, None]) & (cy[None, :] < y2[:, None]))
+        glyph_ink = inside @ glyph_area
+
+        ink_ratio = block_ink / areas
+        glyph_fraction = glyph_ink / np.maximum(block_ink, 1)
+        types = np.where(ink_ratio < self.blank_ink_ratio, 'blank',
+                         np.where(glyph_fraction >= self.min_glyph_ink_fraction, 'text', 'graphic'))
+        return types.tolist()
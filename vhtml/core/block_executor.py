@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Block Executor Module
+Współbieżne rozpoznawanie bloków strony we wspólnej, ograniczonej puli wątków
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+
+class BlockOCRExecutor:
+    """
+    Ograniczona pula wątków wykonująca OCR bloków
+
+    Wywołania Tesseract (proces lub tesserocr) działają poza GIL, więc bloki
+    jednej strony mogą być rozpoznawane równolegle. Pula jest wspólna dla
+    wszystkich równolegle analizowanych stron - jej rozmiar ogranicza łączną
+    liczbę jednoczesnych wywołań OCR niezależnie od liczby stron w locie.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Inicjalizacja puli
+
+        Args:
+            max_workers: Maksymalna liczba jednoczesnych zadań OCR
+        """
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='block-ocr')
+
+    def run(self, tasks: Sequence[Callable[[], Any]]) -> List[Dict[str, Any]]:
+        """
+        Wykonuje zadania bloków i zwraca wyniki w kolejności zadań
+
+        Błąd jednego bloku nie przerywa pozostałych - jest zwracany w jego wyniku.
+
+        Args:
+            tasks: Bezargumentowe funkcje rozpoznające kolejne bloki (w kolejności czytania)
+
+        Returns:
+            Lista słowników {'result', 'error', 'duration_seconds'} w kolejności zadań
+        """
+        if len(tasks) == 1 or self.max_workers == 1:
+            return [self._timed(task) for task in tasks]
+        futures = [self._executor.submit(self._timed, task) for task in tasks]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _timed(task: Callable[[], Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result, error = task(), None
+        except Exception as e:
+            result, error = None, e
+        return {
+            'result': result,
+            'error': error,
+            'duration_seconds': time.perf_counter() - start
+        }
+
+    def shutdown(self) -> None:
+        """Zamyka pulę wątków"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'BlockOCRExecutor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+EasyOCR Reader Module
+Rejestr czytników EasyOCR współdzielonych w procesie i wsadowe rozpoznawanie bloków
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# Czytniki według zestawu języków - model ładowany raz na proces (worker)
+_readers: Dict[Tuple[Tuple[str, ...], bool], 'SharedReader'] = {}
+_registry_lock = threading.Lock()
+
+
+def easyocr_available() -> bool:
+    """Czy pakiet easyocr jest zainstalowany"""
+    try:
+        import easyocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SharedReader:
+    """
+    Czytnik EasyOCR współdzielony przez wszystkie instancje OCREngine w procesie
+
+    Wywołania są szeregowane - inferencja modelu sama wykorzystuje wszystkie
+    rdzenie, a równoległe wywołania tego samego modelu tylko by ze sobą
+    konkurowały.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._lock = threading.Lock()
+
+    def readtext(self, image: np.ndarray) -> List:
+        """
+        Rozpoznaje tekst jednego obrazu
+
+        Args:
+            image: Obraz (tablica numpy)
+
+        Returns:
+            Lista detekcji EasyOCR (ramka, tekst, pewność)
+        """
+        with self._lock:
+            return self.reader.readtext(image)
+
+    def readtext_batched(self, images: Sequence[np.ndarray], batch_size: int = 16) -> List[List]:
+        """
+        Rozpoznaje wiele wycinków wsadowo
+
+        EasyOCR wymaga obrazów o jednakowym rozmiarze, więc wycinki są
+        sortowane według rozmiaru, dzielone na wsady i dopełniane białym tłem
+        do największego wycinka wsadu (prawa i dolna krawędź - współrzędne
+        detekcji pozostają niezmienione).
+
+        Args:
+            images: Wycinki w skali szarości (tablice 2D uint8)
+            batch_size: Maksymalna liczba wycinków w jednym wywołaniu
+
+        Returns:
+            Listy detekcji EasyOCR w kolejności wycinków
+        """
+        results: List[List] = [[] for _ in images]
+        order = sorted((i for i, image in enumerate(images) if image.size),
+                       key=lambda i: (images[i].shape[0], images[i].shape[1]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            height = max(images[i].shape[0] for i in batch)
+            width = max(images[i].shape[1] for i in batch)
+            padded = []
+            for i in batch:
+                canvas = np.full((height, width), 255, dtype=np.uint8)
+                canvas[:images[i].shape[0], :images[i].shape[1]] = images[i]
+                padded.append(canvas)
+            with self._lock:
+                detections = self.reader.readtext_batched(padded, batch_size=len(padded))
+            for i, result in zip(batch, detections):
+                results[i] = result
+        return results
+
+
+def get_reader(languages: Sequence[str], gpu: bool = True) -> SharedReader:
+    """
+    Zwraca czytnik EasyOCR dla zestawu języków, tworząc go przy pierwszym użyciu
+
+    Args:
+        languages: Kody języków EasyOCR (np. ['en', 'pl', 'de'])
+        gpu: Czy używać GPU (EasyOCR przechodzi na CPU, jeśli GPU brak)
+
+    Returns:
+        Czytnik współdzielony w procesie
+    """
+    key = (tuple(sorted(languages)), gpu)
+    with _registry_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            import easyocr
+            reader = _readers[key] = SharedReader(easyocr.Reader(list(languages), gpu=gpu))
+        return reader
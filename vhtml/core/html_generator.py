@@ -55,13 +55,17 @@ class HTMLGenerator:
             'universal': self._get_universal_template()
         }
     
-    def generate_html(self, metadata: DocumentMetadata, images: List[Image.Image]) -> str:
+    def generate_html(self, metadata: DocumentMetadata, images: List[Image.Image],
+                      image_scale: float = 1.0) -> str:
         """
         Generuje HTML z metadanymi
         
         Args:
             metadata: Metadane dokumentu
-            images: Lista obrazów stron dokumentu
+            images: Lista obrazów stron dokumentu (dla bloków bez gotowej miniatury;
+                blok strony N wycinany jest z images[N - 1])
+            image_scale: Skala obrazów stron względem współrzędnych bloków
+                (np. strony renderowane w niższej rozdzielczości niż OCR)
             
         Returns:
             Wygenerowany kod HTML
@@ -78,13 +82,13 @@ class HTMLGenerator:
         }
         
         # Przygotuj dane bloków
-        for i, block in enumerate(metadata.blocks):
+        for block in metadata.blocks:
             block_data = asdict(block)
             
-            # Jeśli mamy obrazy, dodaj obrazy bloków
-            if images and i < len(images):
-                block_image = self._extract_block_image(images[0], block.position)
-                block_data['image_data'] = self._image_to_base64(block_image)
+            # Bloki bez gotowej miniatury wycinane są z obrazu własnej strony
+            page = getattr(block, 'page', 1)
+            if not block_data.get('image_data') and images and 0 < page <= len(images):
+                block_data['image_data'] = self.block_image_data(images[page - 1], block.position, image_scale)
             
             template_data['blocks'].append(block_data)
         
@@ -119,6 +123,21 @@ class HTMLGenerator:
         
         return html_path
     
+    def block_image_data(self, page_image: Image.Image, position: Dict, image_scale: float = 1.0) -> str:
+        """
+        Wycina miniaturę bloku ze strony i koduje ją do base64
+        
+        Args:
+            page_image: Obraz strony, na której leży blok
+            position: Pozycja bloku (x, y, width, height)
+            image_scale: Skala obrazu strony względem współrzędnych bloku
+            
+        Returns:
+            String base64 miniatury bloku
+        """
+        position = {key: int(value * image_scale) for key, value in position.items()}
+        return self._image_to_base64(self._extract_block_image(page_image, position))
+    
     def _extract_block_image(self, full_image: Image.Image, position: Dict) -> Image.Image:
         """
         Wycina obraz bloku z pełnego obrazu
@@ -13,13 +13,17 @@ import json
 import os
 import logging
 from dataclasses import dataclass, asdict, field
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 from langdetect import detect
 import re
 from jinja2 import Template
 import base64
 from io import BytesIO
 
+from vhtml.core.page_context import PageContext
+from vhtml.core.spatial_index import merge_boxes
+from vhtml.core.reading_order import reading_order
+
 # Configure logging
 logger = logging.getLogger('vhtml.layout_analyzer')
 
@@ -35,6 +39,7 @@ class Block:
     confidence: float
     formatting: Dict
     image_data: str = ""  # base64 encoded image
+    page: int = 1  # numer strony (od 1)
     
     def to_dict(self) -> Dict:
         """Konwertuje obiekt Block do słownika do serializacji JSON"""
@@ -46,7 +51,8 @@ class Block:
             'language': self.language,
             'confidence': self.confidence,
             'formatting': self.formatting,
-            'image_data': self.image_data if self.image_data else ""
+            'image_data': self.image_data if self.image_data else "",
+            'page': self.page
         }
 
 
@@ -61,12 +67,17 @@ class DocumentMetadata:
     pages: List[Dict] = None
     source_file: str = ""
     processing_time: float = 0.0
+    # Tabele: strona, pozycja i wiersze komórek (tekst, pewność, pozycja)
+    tables: List[Dict] = None
     
     def __post_init__(self):
         """Inicjalizacja pól po utworzeniu obiektu"""
         # Initialize blocks if not provided
         if self.blocks is None:
             self.blocks = []
+        
+        if self.tables is None:
+            self.tables = []
             
         # Initialize pages if not provided
         if self.pages is None:
@@ -95,7 +106,8 @@ class DocumentMetadata:
             'processing_time': self.processing_time,
             'pages': self.pages,
             'blocks': [block.to_dict() if hasattr(block, 'to_dict') else block 
-                      for block in self.blocks]
+                      for block in self.blocks],
+            'tables': self.tables
         }
 
 
@@ -143,6 +155,10 @@ class LayoutAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger('vhtml.layout_analyzer')
         self.min_contour_area = 1000
+        # Odstęp (px w 300 DPI), przy którym bloki uznawane są za przylegające i scalane
+        self.merge_gap = 2
+        # Rozdzielczość, dla której dobrano jądro morfologiczne i minimalny obszar bloku
+        self.reference_dpi = 300
         self.block_templates = {
             'invoice': self._get_invoice_template(),
             '6-column': self._get_6_column_template(),
@@ -151,27 +167,39 @@ class LayoutAnalyzer:
         self.logger.debug("Zainicjalizowano LayoutAnalyzer z szablonami: %s", 
                          list(self.block_templates.keys()))
 
-    def analyze_layout(self, image: Image.Image) -> Tuple[str, List[Dict]]:
-        """Analizuje układ dokumentu i zwraca typ oraz bloki"""
+    def analyze_layout(self, image: Union[Image.Image, PageContext],
+                       dpi: Optional[int] = None) -> Tuple[str, List[Dict]]:
+        """
+        Analizuje układ dokumentu i zwraca typ oraz bloki
+        
+        Przekazanie PageContext pozwala użyć obrazu odszumionego wcześniej
+        (np. przez PDFProcessor) zamiast odszumiać stronę ponownie. Podanie
+        rozdzielczości obrazu pozwala wykrywać bloki na stronie renderowanej
+        w niskiej rozdzielczości - pozycje bloków są wtedy w jej pikselach.
+        Bloki zwracane są w kolejności czytania (patrz order_blocks).
+        """
         self.logger.info("Rozpoczynanie analizy układu dokumentu")
         try:
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            self.logger.debug("Przekonwertowano obraz do formatu OpenCV")
+            if isinstance(image, PageContext):
+                context = image
+            else:
+                # Samodzielne wywołanie - domyślne parametry fastNlMeansDenoising
+                context = PageContext(image, denoise_params=(3, 7, 21))
 
             # Preprocessing
             self.logger.debug("Przetwarzanie wstępne obrazu")
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            denoised = cv2.fastNlMeansDenoising(gray)
+            denoised = context.denoised
             self.logger.debug("Zakończono przetwarzanie wstępne obrazu")
 
             # Wykrywanie bloków tekstu
             self.logger.debug("Wykrywanie bloków tekstu")
-            blocks = self._detect_text_blocks(denoised)
+            scale = (dpi or self.reference_dpi) / self.reference_dpi
+            blocks = self.order_blocks(self._detect_text_blocks(denoised, scale))
             self.logger.info(f"Wykryto {len(blocks)} bloków tekstu")
 
             # Klasyfikacja układu
             self.logger.debug("Klasyfikacja układu dokumentu")
-            layout_type = self._classify_layout(blocks, image.size)
+            layout_type = self._classify_layout(blocks, context.size)
             self.logger.info(f"Zidentyfikowano typ układu: {layout_type}")
 
             return layout_type, blocks
@@ -180,53 +208,57 @@ class LayoutAnalyzer:
             self.logger.error(f"Błąd podczas analizy układu dokumentu: {str(e)}", exc_info=True)
             raise
 
-    def _detect_text_blocks(self, gray_image) -> List[Dict]:
-        """Wykrywa bloki tekstu używając OpenCV"""
+    def _detect_text_blocks(self, gray_image, scale: float = 1.0) -> List[Dict]:
+        """Wykrywa bloki tekstu używając OpenCV (scale - rozdzielczość obrazu względem reference_dpi)
+
+        Bloki to spójne składowe obrazu po dylatacji o obszarze co najmniej
+        min_contour_area; nakładające się, zawarte i przylegające prostokąty
+        są scalane, więc żaden fragment strony nie jest rozpoznawany dwukrotnie.
+        """
         self.logger.debug("Rozpoczynanie wykrywania bloków tekstu")
         try:
             # Morfologia do łączenia bliskich elementów tekstu
             self.logger.debug("Stosowanie operacji morfologicznych do łączenia elementów tekstu")
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (50, 10))
+            kernel = cv2.getStructuringElement(
+                cv2.MORPH_RECT, (max(1, round(50 * scale)), max(1, round(10 * scale)))
+            )
+            min_area = self.min_contour_area * scale * scale
             dilated = cv2.dilate(gray_image, kernel, iterations=2)
 
             # Threshold i inwersja
             self.logger.debug("Binaryzacja obrazu")
             _, thresh = cv2.threshold(dilated, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
 
-            # Znajdź kontury
-            self.logger.debug("Wyszukiwanie konturów")
-            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            self.logger.debug(f"Znaleziono {len(contours)} konturów")
-
-            blocks = []
-            valid_contours = 0
-            self.logger.debug(f"Przetwarzanie konturów (min. obszar: {self.min_contour_area} pikseli)")
-            
-            for i, contour in enumerate(contours):
-                area = cv2.contourArea(contour)
-                # Filtruj małe kontury
-                if area < self.min_contour_area:
-                    self.logger.debug(f"Pominięto kontur {i}: zbyt mały obszar ({area:.0f} < {self.min_contour_area})")
-                    continue
-                    
-                # Pobierz współrzędne prostokąta
-                x, y, w, h = cv2.boundingRect(contour)
-                valid_contours += 1
-                
-                # Dodaj blok
-                blocks.append({
-                    'id': f'block_{i}',
-                    'position': {
-                        'x': x,
-                        'y': y,
-                        'width': w,
-                        'height': h
-                    },
-                    'area': area
-                })
-                self.logger.debug(f"Dodano blok {i}: x={x}, y={y}, w={w}, h={h}, area={area:.0f}")
-                
-            self.logger.info(f"Zidentyfikowano {valid_contours} poprawnych bloków tekstu")
+            # Spójne składowe ze statystykami - filtrowanie wektorowe zamiast pętli po konturach
+            self.logger.debug("Wyszukiwanie spójnych składowych")
+            _, _, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+            stats = stats[1:]
+            self.logger.debug(f"Znaleziono {len(stats)} składowych")
+            keep = stats[:, cv2.CC_STAT_AREA] >= min_area
+            self.logger.debug(f"Odrzucono {int((~keep).sum())} składowych "
+                              f"o obszarze < {min_area:.0f} pikseli")
+            stats = stats[keep]
+
+            # Scalenie prostokątów nakładających się, zawartych i przylegających
+            x, y = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+            boxes = np.stack([x, y, x + stats[:, cv2.CC_STAT_WIDTH], y + stats[:, cv2.CC_STAT_HEIGHT]], axis=1)
+            merged, groups = merge_boxes(boxes, gap=max(1, round(self.merge_gap * scale)))
+            areas = np.bincount(groups, weights=stats[:, cv2.CC_STAT_AREA], minlength=len(merged))
+            if len(merged) < len(boxes):
+                self.logger.debug(f"Scalono {len(boxes)} prostokątów w {len(merged)} bloków")
+
+            blocks = [{
+                'id': f'block_{i}',
+                'position': {
+                    'x': int(x1),
+                    'y': int(y1),
+                    'width': int(x2 - x1),
+                    'height': int(y2 - y1)
+                },
+                'area': float(area)
+            } for i, ((x1, y1, x2, y2), area) in enumerate(zip(merged, areas))]
+
+            self.logger.info(f"Zidentyfikowano {len(blocks)} poprawnych bloków tekstu")
             return blocks
             
         except Exception as e:
@@ -255,29 +287,18 @@ class LayoutAnalyzer:
         self.logger.debug("Wykorzystano domyślny układ 'universal'")
         return 'universal'
 
-    def _group_blocks_by_rows(self, blocks: List[Dict], image_height: int) -> List[List[Dict]]:
-        """Grupuje bloki w rzędy"""
-        rows = []
-        current_row = []
-        current_y = None
-        tolerance = image_height * 0.05  # 5% tolerancji
+    def order_blocks(self, blocks: List[Dict]) -> List[Dict]:
+        """
+        Porządkuje bloki w kolejności czytania (sekcje, kolumny, linie)
 
-        for block in blocks:
-            y = block['position']['y']
+        Args:
+            blocks: Bloki z pozycjami (x, y, width, height)
 
-            if current_y is None or abs(y - current_y) <= tolerance:
-                current_row.append(block)
-                current_y = y if current_y is None else current_y
-            else:
-                if current_row:
-                    rows.append(current_row)
-                current_row = [block]
-                current_y = y
-
-        if current_row:
-            rows.append(current_row)
-
-        return rows
+        Returns:
+            Bloki w kolejności czytania, z numerem linii ('line') i kolumny ('column')
+        """
+        order, lines, columns = reading_order([block['position'] for block in blocks])
+        return [{**blocks[i], 'line': lines[i], 'column': columns[i]} for i in order]
 
     def _get_invoice_template(self) -> Dict:
         return {
@@ -311,25 +332,30 @@ class OCREngine:
         self.logger.debug("Zainicjalizowano silnik OCR z obsługą języków: %s", 
                          list(self.languages.keys()))
 
-    def extract_text_from_block(self, image: Image.Image, block_position: Dict) -> Tuple[str, str, float]:
-        """Wyciąga tekst z bloku obrazu"""
+    def extract_text_from_block(self, image: Union[Image.Image, PageContext],
+                                block_position: Dict) -> Tuple[str, str, float]:
+        """
+        Wyciąga tekst z bloku obrazu
+        
+        Dla PageContext blok jest wycinany z odszumionej raz strony,
+        bez ponownego odszumiania każdego wycinka.
+        """
         self.logger.debug("Rozpoczynanie ekstrakcji tekstu z bloku")
         try:
             # Wyciągnij współrzędne bloku
             x, y, w, h = block_position['x'], block_position['y'], block_position['width'], block_position['height']
             self.logger.debug(f"Współrzędne bloku: x={x}, y={y}, width={w}, height={h}")
             
-            # Wytnij obszar bloku
-            block_img = image.crop((x, y, x + w, y + h))
-            
-            # Konwersja do OpenCV do dalszego przetwarzania
-            cv_img = cv2.cvtColor(np.array(block_img), cv2.COLOR_RGB2BGR)
-            self.logger.debug("Konwersja do formatu OpenCV zakończona")
-            
-            # Preprocessing obrazu
-            self.logger.debug("Przetwarzanie wstępne obrazu (konwersja do skali szarości i usuwanie szumów)")
-            gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-            denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+            if isinstance(image, PageContext):
+                denoised = image.crop(block_position)
+            else:
+                # Wytnij obszar bloku
+                block_img = image.crop((x, y, x + w, y + h))
+                
+                # Preprocessing obrazu
+                self.logger.debug("Przetwarzanie wstępne obrazu (konwersja do skali szarości i usuwanie szumów)")
+                gray = PageContext(block_img).gray
+                denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
             
             # OCR
             self.logger.debug("Wykonywanie OCR na bloku obrazu")
@@ -723,9 +749,11 @@ class DocumentAnalyzer:
                 return None
             self.logger.info(f"Pomyślnie przekonwertowano {len(images)} stron")
 
-            # Analizuj układ pierwszego obrazu
+            # Analizuj układ pierwszego obrazu - strona jest odszumiana raz
+            # i współdzielona przez analizę układu i OCR bloków
             self.logger.info("Analiza układu dokumentu...")
-            layout_type, blocks = self.layout_analyzer.analyze_layout(images[0])
+            page_context = PageContext(images[0])
+            layout_type, blocks = self.layout_analyzer.analyze_layout(page_context)
             self.logger.info(f"Zidentyfikowano układ: {layout_type} z {len(blocks)} blokami")
 
             # Przetwórz każdy blok przez OCR
@@ -735,7 +763,7 @@ class DocumentAnalyzer:
                 self.logger.debug(f"Przetwarzanie bloku {i+1}/{len(blocks)}")
                 
                 # Ekstrakcja tekstu
-                text, language, confidence = self.ocr_engine.extract_text_from_block(images[0], block['position'])
+                text, language, confidence = self.ocr_engine.extract_text_from_block(page_context, block['position'])
                 self.logger.debug(f"Blok {i}: rozpoznano {len(text)} znaków (pewność: {confidence:.1f}%)")
                 
                 # Określ typ bloku
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Layout Index Module
+Indeks szablonów układu stron (dostawców): odcisk strony, geometria bloków i stałe pola
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+import cv2
+
+
+class LayoutIndex:
+    """
+    Trwały indeks szablonów układu stron
+
+    Szablon to odcisk percepcyjny (dHash) strony w niskiej rozdzielczości,
+    jej rozmiar, bloki (pozycje, typy zawartości, tabele) oraz skróty pikseli
+    i wyniki OCR bloków tekstowych. Strona pasuje do szablonu, jeśli odcisk
+    różni się w niewielu bitach, a bloki szablonu obejmują prawie cały tusz
+    strony (sygnatura geometrii) - wtedy analiza układu jest pomijana, a bloki
+    o pikselach identycznych z szablonem (stałe pola dostawcy) nie trafiają
+    do OCR. Nowe układy dopisywane są do indeksu na bieżąco.
+    """
+
+    def __init__(self, index_dir: str, hash_size: int = 16, max_distance: float = 0.1,
+                 min_coverage: float = 0.98):
+        """
+        Inicjalizacja indeksu
+
+        Args:
+            index_dir: Katalog bazy SQLite indeksu
+            hash_size: Bok odcisku dHash (hash_size^2 bitów)
+            max_distance: Maksymalny udział różnych bitów odcisku dopasowanej strony
+            min_coverage: Minimalny udział tuszu strony leżącego w blokach szablonu
+        """
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.min_coverage = min_coverage
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+        self.db_path = os.path.join(index_dir, 'layout_index.sqlite')
+        self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS templates ('
+            'id INTEGER PRIMARY KEY, settings TEXT, width INTEGER, height INTEGER, '
+            'fingerprint BLOB, template TEXT, hits INTEGER DEFAULT 0, last_used REAL)'
+        )
+        self._db.commit()
+        # Odciski wszystkich szablonów w pamięci - porównanie jedną operacją na macierzy bitów
+        self._templates: List[Dict] = []
+        for template_id, settings, width, height, fingerprint, template in self._db.execute(
+                'SELECT id, settings, width, height, fingerprint, template FROM templates ORDER BY id'):
+            self._remember(template_id, settings, (width, height), fingerprint, json.loads(template))
+
+    @staticmethod
+    def fingerprint(gray: np.ndarray, hash_size: int = 16) -> np.ndarray:
+        """
+        Odcisk percepcyjny strony (dHash)
+
+        Args:
+            gray: Strona w skali szarości
+            hash_size: Bok odcisku
+
+        Returns:
+            Wektor hash_size^2 bitów (czy jasność rośnie w prawo)
+        """
+        small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).astype(np.int16)
+        return (small[:, 1:] > small[:, :-1]).ravel()
+
+    @staticmethod
+    def block_digest(binary_crop: np.ndarray) -> str:
+        """
+        Skrót pikseli zbinaryzowanego bloku (identyczny tylko dla identycznej treści)
+
+        Args:
+            binary_crop: Wycinek strony zbinaryzowanej
+
+        Returns:
+            Skrót szesnastkowy
+        """
+        digest = hashlib.sha256(np.asarray(binary_crop.shape, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(binary_crop).tobytes())
+        return digest.hexdigest()
+
+    def match(self, gray: np.ndarray, binary: np.ndarray, settings: Dict) -> Optional[Dict]:
+        """
+        Wyszukuje szablon pasujący do strony
+
+        Args:
+            gray: Strona w skali szarości (rozdzielczość analizy układu)
+            binary: Strona zbinaryzowana (tusz = 255)
+            settings: Ustawienia analizy, przy których szablon został zapisany
+
+        Returns:
+            Szablon ({'id', 'layout_type', 'blocks', 'tables'}) lub None
+        """
+        bits = self.fingerprint(gray, self.hash_size)
+        key = json.dumps(settings, sort_keys=True)
+        size = (binary.shape[1], binary.shape[0])
+        with self._lock:
+            candidates = [t for t in self._templates if t['settings'] == key and t['size'] == size]
+            if candidates:
+                distances = (np.stack([t['fingerprint'] for t in candidates]) != bits).mean(axis=1)
+                for index in np.argsort(distances, kind='stable'):
+                    if distances[index] > self.max_distance:
+                        break
+                    template = candidates[index]['template']
+                    if self._coverage(binary, template['blocks']) >= self.min_coverage:
+                        self._db.execute('UPDATE templates SET hits = hits + 1, last_used = ? WHERE id = ?',
+                                         (time.time(), template['id']))
+                        self._db.commit()
+                        self.hits += 1
+                        return template
+            self.misses += 1
+            return None
+
+    def add(self, gray: np.ndarray, settings: Dict, layout_type: str, blocks: List[Dict],
+            tables: List[Dict]) -> int:
+        """
+        Dopisuje szablon strony
+
+        Args:
+            gray: Strona w skali szarości (rozdzielczość analizy układu)
+            settings: Ustawienia analizy
+            layout_type: Typ układu strony
+            blocks: Bloki w kolejności czytania: 'position', 'content_type', opcjonalnie
+                'table' (indeks tabeli), 'digest' i 'result' (tekst, język, pewność)
+            tables: Tabele wykryte przez TableDetector
+
+        Returns:
+            Identyfikator szablonu
+        """
+        bits = self.fingerprint(gray, self.hash_size)
+        key = json.dumps(settings, sort_keys=True)
+        size = (gray.shape[1], gray.shape[0])
+        template = {'layout_type': layout_type, 'blocks': blocks, 'tables': tables}
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT INTO templates (settings, width, height, fingerprint, template, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, size[0], size[1], np.packbits(bits).tobytes(), json.dumps(template), time.time())
+            )
+            self._db.commit()
+            self._remember(cursor.lastrowid, key, size, np.packbits(bits).tobytes(), template)
+            return cursor.lastrowid
+
+    def stats(self) -> Dict:
+        """Zwraca liczbę szablonów oraz liczniki trafień i chybień"""
+        with self._lock:
+            return {'templates': len(self._templates), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """Zamyka bazę"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, template_id: int, settings: str, size, fingerprint: bytes, template: Dict) -> None:
+        template['id'] = template_id
+        bits = np.unpackbits(np.frombuffer(fingerprint, dtype=np.uint8))[:self.hash_size ** 2].astype(bool)
+        self._templates.append({'settings': settings, 'size': tuple(size), 'fingerprint': bits,
+                                'template': template})
+
+    @staticmethod
+    def _coverage(binary: np.ndarray, blocks: List[Dict]) -> float:
+        """Udział tuszu strony leżącego w blokach"""
+        ink = binary > 0
+        total = int(np.count_nonzero(ink))
+        if not total:
+            return 1.0
+        inside = np.zeros(ink.shape, dtype=bool)
+        for block in blocks:
+            p = block['position']
+            inside[p['y']:p['y'] + p['height'], p['x']:p['x'] + p['width']] = True
+        return np.count_nonzero(ink & inside) / total
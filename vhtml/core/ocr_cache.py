@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+OCR Cache Module
+Pamięć wyników OCR bloków adresowana skrótem pikseli, współdzielona między dokumentami
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+
+OCRResult = Tuple[str, str, float]
+
+
+class OCRCache:
+    """
+    Cache wyników OCR: LRU w pamięci przed trwałym magazynem SQLite
+
+    Klucz wyznacza skrót znormalizowanych pikseli bloku (skala szarości,
+    przycięcie do obszaru z treścią) oraz ustawienia silnika (silnik, języki,
+    PSM, zakres rozpoznawania), więc powtarzające się nagłówki, logotypy
+    i stopki tych samych dostawców są rozpoznawane tylko raz.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, memory_entries: int = 4096,
+                 max_entries: int = 100_000):
+        """
+        Inicjalizacja cache OCR
+
+        Args:
+            cache_dir: Katalog bazy SQLite (None - wyłącznie cache w pamięci)
+            memory_entries: Liczba wyników przechowywanych w pamięci
+            max_entries: Maksymalna liczba wyników w bazie (najdawniej używane są usuwane)
+        """
+        self.memory_entries = max(1, memory_entries)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._memory: 'OrderedDict[str, OCRResult]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.db_path = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.db_path = os.path.join(cache_dir, 'ocr_cache.sqlite')
+            self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_results ('
+                'key TEXT PRIMARY KEY, text TEXT, language TEXT, confidence REAL, last_used REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ocr_results_last_used ON ocr_results(last_used)')
+            self._db.commit()
+
+    @staticmethod
+    def make_key(image: Image.Image, settings: Dict) -> str:
+        """
+        Buduje klucz wyniku OCR z pikseli bloku i ustawień silnika
+
+        Args:
+            image: Obraz bloku
+            settings: Ustawienia wpływające na wynik (silnik, języki, PSM, zakres)
+
+        Returns:
+            Klucz wyniku
+        """
+        gray = np.asarray(image.convert('L') if image.mode != 'L' else image)
+        # Przycięcie do treści - ten sam nagłówek w nieco innej ramce daje ten sam klucz
+        ink = gray < 128
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size:
+            gray = gray[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        digest.update(np.asarray(gray.shape, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(gray).tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[OCRResult]:
+        """
+        Odczytuje wynik OCR
+
+        Args:
+            key: Klucz wyniku
+
+        Returns:
+            Krotka (tekst, język, pewność) lub None przy braku wpisu
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT text, language, confidence FROM ocr_results WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute('UPDATE ocr_results SET last_used = ? WHERE key = ?', (time.time(), key))
+                    self._db.commit()
+                    result = (row[0], row[1], row[2])
+                    self._remember(key, result)
+                    self.hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: OCRResult) -> None:
+        """
+        Zapisuje wynik OCR
+
+        Args:
+            key: Klucz wyniku
+            result: Krotka (tekst, język, pewność)
+        """
+        with self._lock:
+            self._remember(key, result)
+            if self._db is None:
+                return
+            self._db.execute(
+                'INSERT OR REPLACE INTO ocr_results (key, text, language, confidence, last_used) '
+                'VALUES (?, ?, ?, ?, ?)', (key, *result, time.time())
+            )
+            self._db.commit()
+            # Przycinanie bazy do limitu co 1000 zapisów
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune()
+
+    def stats(self) -> Dict:
+        """Zwraca liczniki trafień i chybień"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """Zamyka bazę"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, result: OCRResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self) -> None:
+        """Usuwa najdawniej używane wyniki ponad limit max_entries"""
+        count = self._db.execute('SELECT COUNT(*) FROM ocr_results').fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                'DELETE FROM ocr_results WHERE key IN '
+                '(SELECT key FROM ocr_results ORDER BY last_used LIMIT ?)', (count - self.max_entries,)
+            )
+            self._db.commit()
@@ -5,110 +5,528 @@ Moduł do rozpoznawania tekstu z obrazów z obsługą wielu języków
 """
 
 import os
+import time
+import logging
+import threading
 import numpy as np
 import pytesseract
 from PIL import Image
-import easyocr
 from langdetect import detect, LangDetectException
 from typing import Dict, Tuple, List, Optional, Union
 
+from vhtml.core.page_context import PageContext
+from vhtml.core.ocr_cache import OCRCache
+from vhtml.core.easyocr_reader import get_reader
+from vhtml.core.tesseract_pool import TesseractPool, tesserocr_available
+
+
+TESSERACT_BACKENDS = ('pytesseract', 'tesserocr')
+
+logger = logging.getLogger('vhtml.ocr_engine')
+
 
 class OCREngine:
     """Silnik OCR z rozpoznawaniem języka"""
 
-    def __init__(self, use_easyocr: bool = False):
+    def __init__(self, use_easyocr: bool = False, tesseract_backend: str = 'pytesseract',
+                 tesseract_pool_size: Optional[int] = None, cache: Optional[OCRCache] = None,
+                 cascade: bool = False):
         """
         Inicjalizacja silnika OCR
         
         Args:
             use_easyocr: Czy używać EasyOCR zamiast Tesseract
+            tesseract_backend: 'pytesseract' (proces tesseract na każde wywołanie) lub
+                'tesserocr' (pula uchwytów Tesseract API w procesie)
+            tesseract_pool_size: Liczba uchwytów w puli (domyślnie liczba rdzeni)
+            cache: Opcjonalny cache wyników OCR bloków (wspólny dla dokumentów)
+            cascade: Kaskada silników - każdy blok najpierw rozpoznaje Tesseract,
+                a bloki niepewne lub podejrzane (za mało znaków na powierzchnię)
+                ponownie EasyOCR; zachowywany jest lepszy wynik
         """
+        if tesseract_backend not in TESSERACT_BACKENDS:
+            raise ValueError(f"Nieznany backend Tesseract: {tesseract_backend}")
         self.use_easyocr = use_easyocr
         self.languages = {
             'pl': 'pol',
             'en': 'eng',
             'de': 'deu'
         }
+        self.multi_language = '+'.join(self.languages.values())
+        self.easyocr_languages = ['en', 'pl', 'de']
+        # Tryb segmentacji strony Tesseract (3 - automatyczny, domyślny)
+        self.psm = 3
+        self.cache = cache
+        # Bloki rozpoznane jednym językiem z pewnością poniżej progu są
+        # ponownie rozpoznawane wszystkimi językami
+        self.fallback_confidence = 0.6
+        self.fallbacks = 0
+        # Kaskada: eskalacja do EasyOCR poniżej progu pewności lub przy gęstości
+        # tekstu poniżej progu (znaki na 10 000 px² wycinka w 300 DPI)
+        self.cascade = cascade and not use_easyocr
+        self.cascade_confidence = 0.7
+        self.cascade_min_char_density = 1.0
+        self.escalations = 0
+        self.escalations_improved = 0
+        self.escalation_seconds = 0.0
+        self._lock = threading.Lock()
         
-        # Inicjalizacja EasyOCR jeśli wymagane
+        # Czytnik EasyOCR z rejestru procesu - model ładowany raz, przy pierwszej instancji
+        self.reader = None
         if self.use_easyocr:
             try:
-                self.reader = easyocr.Reader(['en', 'pl', 'de'])
+                self.reader = get_reader(self.easyocr_languages)
             except Exception as e:
                 print(f"Nie można zainicjalizować EasyOCR: {e}")
                 self.use_easyocr = False
+        
+        # Pula Tesseract API w procesie, jeśli wymagana i dostępna (osobna pula
+        # dla każdego zestawu języków, tworzona przy pierwszym użyciu)
+        self.tesseract_pool = None
+        self.tesseract_pool_size = tesseract_pool_size
+        self._language_pools: Dict[str, TesseractPool] = {}
+        if tesseract_backend == 'tesserocr':
+            if tesserocr_available():
+                self.tesseract_pool = self._pool(self.multi_language)
+            else:
+                print("Brak pakietu tesserocr - używam pytesseract")
+    
+    def warm_up(self) -> None:
+        """
+        Ładuje modele przed pierwszym dokumentem (np. w procesie roboczym trybu wsadowego)
+        
+        Kaskada ładuje model EasyOCR, a pula Tesseract API tworzy pierwszy
+        uchwyt - pierwszy dokument nie płaci za inicjalizację silnika.
+        """
+        if self.cascade:
+            try:
+                get_reader(self.easyocr_languages)
+            except Exception as e:
+                print(f"Nie można zainicjalizować EasyOCR - kaskada wyłączona: {e}")
+                self.cascade = False
+        if self.tesseract_pool is not None:
+            with self.tesseract_pool.acquire():
+                pass
+    
+    def _pool(self, lang: str) -> TesseractPool:
+        """Zwraca pulę uchwytów Tesseract API dla zestawu języków"""
+        with self._lock:
+            pool = self._language_pools.get(lang)
+            if pool is None:
+                pool = self._language_pools[lang] = TesseractPool(lang, self.tesseract_pool_size,
+                                                                  psm=self.psm)
+            return pool
+    
+    def _tesseract_lang(self, language: Optional[str]) -> str:
+        """Zestaw języków Tesseract dla kodu języka (None - wszystkie wspierane języki)"""
+        return self.languages.get(language, self.multi_language) if language else self.multi_language
+    
+    def _tesseract_to_string(self, image: Image.Image, lang: str) -> str:
+        """Rozpoznaje tekst przez pulę Tesseract API lub pytesseract"""
+        if self.tesseract_pool is not None:
+            return self._pool(lang).image_to_string(image)
+        return pytesseract.image_to_string(image, lang=lang, config=f'--psm {self.psm}')
     
-    def extract_text_from_block(self, image: Image.Image, block_position: Dict) -> Tuple[str, str, float]:
+    def _tesseract_to_data(self, image: Image.Image, lang: Optional[str] = None) -> Dict[str, List]:
+        """Rozpoznaje słowa z położeniem i pewnością przez pulę Tesseract API lub pytesseract"""
+        if self.tesseract_pool is not None:
+            return self._pool(lang or self.multi_language).image_to_data(image)
+        config = f'--psm {self.psm}'
+        if lang is None:
+            return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        return pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    
+    def _cache_key(self, image: Image.Image, lang: str, scope: str) -> Optional[str]:
+        """Klucz cache wyniku OCR (None, jeśli cache jest wyłączony)"""
+        if self.cache is None:
+            return None
+        settings = {
+            'engine': 'easyocr' if self.use_easyocr else 'cascade' if self.cascade else 'tesseract',
+            'lang': '+'.join(self.easyocr_languages) if self.use_easyocr else lang,
+            'psm': self.psm,
+            'scope': scope
+        }
+        return OCRCache.make_key(image, settings)
+    
+    def detect_document_language(self, sample: Union[Image.Image, str]) -> Optional[str]:
+        """
+        Wykrywa język dokumentu na podstawie taniej próbki
+        
+        Args:
+            sample: Tekst (np. z warstwy tekstowej PDF) lub obraz rozpoznawany
+                jednokrotnie wszystkimi językami (np. pierwsza strona w niskiej rozdzielczości)
+            
+        Returns:
+            Kod wspieranego języka (pl, en, de) lub None, jeśli nie udało się go ustalić
+        """
+        if isinstance(sample, Image.Image):
+            try:
+                sample = self._extract_with_tesseract(sample)
+            except Exception as e:
+                logger.error(f"Błąd Tesseract OCR: {e}")
+                return None
+        language = self._detect_language(sample)
+        return language if language in self.languages else None
+    
+    def extract_text_from_block(self, image: Union[Image.Image, PageContext],
+                                block_position: Dict, language: Optional[str] = None) -> Tuple[str, str, float]:
         """
         Wyciąga tekst z bloku obrazu
         
         Args:
-            image: Obraz źródłowy
+            image: Obraz źródłowy lub kontekst przetwarzania strony
             block_position: Pozycja bloku (x, y, width, height)
+            language: Język dokumentu (kod); None - wszystkie wspierane języki
             
         Returns:
             Tuple zawierający (tekst, język, pewność)
         """
+        if isinstance(image, PageContext):
+            image = image.image
+        
         # Wytnij blok z obrazu
         x, y, width, height = block_position['x'], block_position['y'], block_position['width'], block_position['height']
-        block_image = image.crop((x, y, x + width, y + height))
+        return self.extract_text_from_image(image.crop((x, y, x + width, y + height)), language)
+    
+    def extract_text_from_image(self, block_image: Image.Image,
+                                language: Optional[str] = None) -> Tuple[str, str, float]:
+        """
+        Wyciąga tekst z gotowego obrazu bloku (np. wyrenderowanego osobno fragmentu strony)
+        
+        Przy podanym języku dokumentu blok jest rozpoznawany jednym modelem;
+        dopiero przy pewności poniżej `fallback_confidence` - wszystkimi językami.
+        Błąd silnika daje pusty wynik, który nie trafia do cache.
+        
+        Args:
+            block_image: Obraz bloku
+            language: Język dokumentu (kod); None - wszystkie wspierane języki
+            
+        Returns:
+            Tuple zawierający (tekst, język, pewność)
+        """
+        lang = self._tesseract_lang(language)
+        cache_key = self._cache_key(block_image, lang, 'block')
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            result = self._escalate([block_image], [self._recognize_image(block_image, lang)])[0]
+        except Exception as e:
+            logger.error(f"Błąd OCR bloku: {e}")
+            return "", "unknown", 0.0
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+    
+    def extract_text_from_images(self, block_images: List[Image.Image],
+                                 language: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Wyciąga tekst z wielu obrazów bloków (np. wszystkich bloków strony)
         
+        Przy EasyOCR bloki nieobecne w cache rozpoznawane są wsadowo - jednym
+        wywołaniem modelu na wsad zamiast jednym na blok. Tesseract rozpoznaje
+        bloki kolejno. Błąd silnika daje puste wyniki, które nie trafiają do cache.
+        
+        Args:
+            block_images: Obrazy bloków
+            language: Język dokumentu (kod); None - wszystkie wspierane języki
+            
+        Returns:
+            Lista krotek (tekst, język, pewność) w kolejności bloków
+        """
+        if not self.use_easyocr:
+            return [self.extract_text_from_image(image, language) for image in block_images]
+        
+        lang = self._tesseract_lang(language)
+        results: List[Optional[Tuple[str, str, float]]] = [None] * len(block_images)
+        cache_keys = [self._cache_key(image, lang, 'block') for image in block_images]
+        for index, key in enumerate(cache_keys):
+            if key is not None:
+                results[index] = self.cache.get(key)
+        
+        missing = [index for index, result in enumerate(results) if result is None]
+        try:
+            detections = self.reader.readtext_batched(
+                [np.asarray(block_images[index].convert('L')) for index in missing]
+            )
+        except Exception as e:
+            logger.error(f"Błąd EasyOCR: {e}")
+            for index in missing:
+                results[index] = ("", "unknown", 0.0)
+            return results
+        for index, block_detections in zip(missing, detections):
+            text, confidence = self._join_easyocr(block_detections)
+            results[index] = (text, self._detect_language(text), confidence)
+            if cache_keys[index] is not None:
+                self.cache.put(cache_keys[index], results[index])
+        return results
+    
+    def _recognize_image(self, block_image: Image.Image, lang: str) -> Tuple[str, str, float]:
+        """
+        Rozpoznaje obraz bloku podanymi językami, z ponowieniem wszystkimi przy niskiej pewności
+        
+        Błąd silnika OCR jest zgłaszany - wynik z błędu nie może trafić do cache.
+        """
         # Rozpoznaj tekst
         if self.use_easyocr:
-            text = self._extract_with_easyocr(block_image)
-        else:
-            text = self._extract_with_tesseract(block_image)
+            text, confidence = self._extract_with_easyocr(block_image)
+            return text, self._detect_language(text), confidence
+        text = self._extract_with_tesseract(block_image, lang)
         
         # Wykryj język tekstu
-        language = self._detect_language(text)
+        detected_language = self._detect_language(text)
         
         # Oblicz pewność OCR
-        confidence = self._calculate_ocr_confidence(block_image, text)
+        confidence = self._calculate_ocr_confidence(block_image, text, lang)
+        
+        if lang != self.multi_language and text and confidence < self.fallback_confidence:
+            return self._fallback(block_image, (text, detected_language, confidence))
         
-        return text, language, confidence
+        return text, detected_language, confidence
     
-    def _extract_with_tesseract(self, image: Image.Image) -> str:
+    def _fallback(self, block_image: Image.Image, result: Tuple[str, str, float]) -> Tuple[str, str, float]:
+        """Rozpoznaje niepewny blok wszystkimi językami; zwraca lepszy wynik (przy błędzie - pierwotny)"""
+        with self._lock:
+            self.fallbacks += 1
+        try:
+            fallback = self._recognize_image(block_image, self.multi_language)
+        except Exception as e:
+            logger.warning(f"Błąd OCR wszystkimi językami: {e}")
+            return result
+        return fallback if fallback[2] > result[2] else result
+    
+    def extract_text_from_page(self, image: Union[Image.Image, PageContext],
+                               block_positions: List[Dict],
+                               language: Optional[str] = None) -> List[Tuple[str, str, float]]:
         """
-        Ekstrakcja tekstu z Tesseract
+        Wyciąga tekst wszystkich bloków strony jednym przebiegiem Tesseract
+        
+        Słowa rozpoznane na całej stronie są przypisywane do bloku, w którym
+        leży ich środek (przy blokach zagnieżdżonych - do najmniejszego).
+        Tekst i pewność każdego bloku wynikają z tego jednego przebiegu.
         
         Args:
-            image: Obraz do przetworzenia
+            image: Obraz strony lub kontekst przetwarzania strony
+            block_positions: Pozycje bloków (x, y, width, height)
+            language: Język dokumentu (kod); bloki o niskiej pewności są
+                ponownie rozpoznawane osobno wszystkimi językami
             
         Returns:
-            Rozpoznany tekst
+            Lista krotek (tekst, język, pewność) w kolejności bloków
         """
+        if isinstance(image, PageContext):
+            image = image.image
+        if not block_positions:
+            return []
+        
+        lang = self._tesseract_lang(language)
+        cache_keys = [None] * len(block_positions)
+        cached = [None] * len(block_positions)
+        if self.cache is not None:
+            for index, position in enumerate(block_positions):
+                cache_keys[index] = self._cache_key(self._crop(image, position), lang, 'page')
+                cached[index] = self.cache.get(cache_keys[index])
+            # Wszystkie bloki znane - przebieg Tesseract zbędny
+            if all(result is not None for result in cached):
+                return cached
+        
         try:
-            # Użyj wszystkich wspieranych języków
-            langs = '+'.join(self.languages.values())
-            text = pytesseract.image_to_string(image, lang=langs)
-            return text.strip()
+            data = self._tesseract_to_data(image, lang)
         except Exception as e:
-            print(f"Błąd Tesseract OCR: {e}")
-            return ""
+            logger.error(f"Błąd Tesseract OCR: {e}")
+            return [("", "unknown", 0.0) for _ in block_positions]
+        
+        words = [i for i, word in enumerate(data['text']) if str(word).strip()]
+        assignment = self._assign_words_to_blocks(
+            np.array([[data['left'][i], data['top'][i], data['width'][i], data['height'][i]]
+                      for i in words], dtype=np.float64).reshape(-1, 4),
+            block_positions
+        )
+        
+        block_words: List[List[int]] = [[] for _ in block_positions]
+        for word_index, block_index in zip(words, assignment):
+            if block_index >= 0:
+                block_words[block_index].append(word_index)
+        
+        results = []
+        for indices in block_words:
+            # Słowa w kolejności Tesseract; nowa linia przy zmianie (blok, akapit, linia)
+            lines = []
+            current_line = None
+            for i in indices:
+                line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                if line_key != current_line:
+                    lines.append([])
+                    current_line = line_key
+                lines[-1].append(str(data['text'][i]).strip())
+            text = '\n'.join(' '.join(line) for line in lines)
+            
+            confidences = [float(data['conf'][i]) for i in indices if float(data['conf'][i]) != -1]
+            confidence = sum(confidences) / len(confidences) / 100.0 if confidences else 0.0
+            results.append((text, self._detect_language(text), confidence))
+        
+        # Bloki niepewne przy jednym języku - ponownie, osobno, wszystkimi językami
+        if lang != self.multi_language:
+            for index, (position, result) in enumerate(zip(block_positions, results)):
+                if cached[index] is None and result[0] and result[2] < self.fallback_confidence:
+                    results[index] = self._fallback(self._crop(image, position), result)
+        
+        # Kaskada - niepewne bloki (poza wziętymi z cache) ponownie, cięższym silnikiem
+        if self.cascade:
+            pending = [index for index in range(len(results)) if cached[index] is None]
+            escalated = self._escalate([self._crop(image, block_positions[index]) for index in pending],
+                                       [results[index] for index in pending])
+            for index, result in zip(pending, escalated):
+                results[index] = result
+        
+        # Wyniki z cache zastępują ponowne rozpoznanie; nowe są zapisywane
+        for index, key in enumerate(cache_keys):
+            if key is None:
+                continue
+            if cached[index] is not None:
+                results[index] = cached[index]
+            else:
+                self.cache.put(key, results[index])
+        return results
+    
+    @staticmethod
+    def _crop(image: Image.Image, position: Dict) -> Image.Image:
+        return image.crop((position['x'], position['y'],
+                           position['x'] + position['width'], position['y'] + position['height']))
+    
+    def _needs_escalation(self, block_image: Image.Image, result: Tuple[str, str, float]) -> bool:
+        """Czy wynik szybkiego silnika jest niepewny lub podejrzany"""
+        text, _, confidence = result
+        if confidence < self.cascade_confidence:
+            return True
+        area = block_image.width * block_image.height
+        chars = len(''.join(text.split()))
+        return area > 0 and chars * 10_000 / area < self.cascade_min_char_density
     
-    def _extract_with_easyocr(self, image: Image.Image) -> str:
+    def _escalate(self, block_images: List[Image.Image],
+                  results: List[Tuple[str, str, float]]) -> List[Tuple[str, str, float]]:
         """
-        Ekstrakcja tekstu z EasyOCR
+        Rozpoznaje ponownie EasyOCR bloki, których wynik wymaga eskalacji
+        
+        Args:
+            block_images: Obrazy bloków
+            results: Wyniki szybkiego silnika (tekst, język, pewność)
+            
+        Returns:
+            Lepszy z wyników obu silników dla każdego bloku
+        """
+        if not self.cascade:
+            return results
+        pending = [index for index, (image, result) in enumerate(zip(block_images, results))
+                   if self._needs_escalation(image, result)]
+        if not pending:
+            return results
+        
+        start = time.perf_counter()
+        try:
+            reader = get_reader(self.easyocr_languages)
+        except Exception as e:
+            print(f"Nie można zainicjalizować EasyOCR - kaskada wyłączona: {e}")
+            self.cascade = False
+            return results
+        try:
+            detections = reader.readtext_batched(
+                [np.asarray(block_images[index].convert('L')) for index in pending]
+            )
+        except Exception as e:
+            logger.error(f"Błąd EasyOCR: {e}")
+            return results
+        
+        results = list(results)
+        improved = 0
+        for index, block_detections in zip(pending, detections):
+            text, confidence = self._join_easyocr(block_detections)
+            if confidence > results[index][2]:
+                results[index] = (text, self._detect_language(text), confidence)
+                improved += 1
+        with self._lock:
+            self.escalations += len(pending)
+            self.escalations_improved += improved
+            self.escalation_seconds += time.perf_counter() - start
+        return results
+    
+    def cascade_stats(self) -> Dict:
+        """Zwraca liczniki eskalacji kaskady"""
+        with self._lock:
+            return {
+                'escalated': self.escalations,
+                'improved': self.escalations_improved,
+                'escalation_seconds': self.escalation_seconds
+            }
+    
+    @staticmethod
+    def _assign_words_to_blocks(word_boxes: np.ndarray, block_positions: List[Dict]) -> np.ndarray:
+        """
+        Przypisuje słowa do bloków na podstawie położenia środka słowa
+        
+        Args:
+            word_boxes: Tablica Nx4 (left, top, width, height) słów
+            block_positions: Pozycje bloków (x, y, width, height)
+            
+        Returns:
+            Indeks bloku dla każdego słowa (-1 - słowo poza blokami)
+        """
+        blocks = np.array([[p['x'], p['y'], p['width'], p['height']] for p in block_positions],
+                          dtype=np.float64)
+        centers_x = word_boxes[:, 0:1] + word_boxes[:, 2:3] / 2.0
+        centers_y = word_boxes[:, 1:2] + word_boxes[:, 3:4] / 2.0
+        inside = ((centers_x >= blocks[:, 0]) & (centers_x < blocks[:, 0] + blocks[:, 2]) &
+                  (centers_y >= blocks[:, 1]) & (centers_y < blocks[:, 1] + blocks[:, 3]))
+        
+        # Przy blokach zagnieżdżonych wygrywa najmniejszy zawierający blok
+        areas = np.where(inside, blocks[:, 2] * blocks[:, 3], np.inf)
+        assignment = np.argmin(areas, axis=1) if len(blocks) else np.zeros(len(word_boxes), dtype=int)
+        return np.where(inside.any(axis=1), assignment, -1)
+    
+    def _extract_with_tesseract(self, image: Image.Image, lang: Optional[str] = None) -> str:
+        """
+        Ekstrakcja tekstu z Tesseract
         
         Args:
             image: Obraz do przetworzenia
+            lang: Języki Tesseract (domyślnie wszystkie wspierane języki)
             
         Returns:
             Rozpoznany tekst
+            
+        Raises:
+            Exception: Błąd Tesseract (np. brak programu tesseract)
         """
-        try:
-            # Konwersja do formatu numpy
-            img_array = np.array(image)
+        return self._tesseract_to_string(image, lang or self.multi_language).strip()
+    
+    def _extract_with_easyocr(self, image: Image.Image) -> Tuple[str, float]:
+        """
+        Ekstrakcja tekstu z EasyOCR
+        
+        Args:
+            image: Obraz do przetworzenia
             
-            # Rozpoznawanie tekstu
-            results = self.reader.readtext(img_array)
+        Returns:
+            Tuple zawierający (rozpoznany tekst, pewność)
             
-            # Połącz wyniki
-            text = ' '.join([result[1] for result in results])
-            return text.strip()
-        except Exception as e:
-            print(f"Błąd EasyOCR: {e}")
-            return ""
+        Raises:
+            Exception: Błąd EasyOCR
+        """
+        # Konwersja do formatu numpy
+        img_array = np.array(image)
+        
+        # Rozpoznawanie tekstu
+        return self._join_easyocr(self.reader.readtext(img_array))
+    
+    @staticmethod
+    def _join_easyocr(detections: List) -> Tuple[str, float]:
+        """Łączy detekcje EasyOCR w tekst bloku; pewność to średnia pewność detekcji"""
+        text = ' '.join(detection[1] for detection in detections).strip()
+        if not text:
+            return "", 0.0
+        return text, float(sum(detection[2] for detection in detections) / len(detections))
     
     def _detect_language(self, text: str) -> str:
         """
@@ -132,13 +550,14 @@ class OCREngine:
         except LangDetectException:
             return "unknown"
     
-    def _calculate_ocr_confidence(self, image: Image.Image, text: str) -> float:
+    def _calculate_ocr_confidence(self, image: Image.Image, text: str, lang: Optional[str] = None) -> float:
         """
         Oblicza pewność OCR
         
         Args:
             image: Obraz źródłowy
             text: Rozpoznany tekst
+            lang: Języki Tesseract użyte do rozpoznania
             
         Returns:
             Wartość pewności (0.0-1.0)
@@ -148,7 +567,7 @@ class OCREngine:
         
         try:
             # Użyj Tesseract do uzyskania danych o pewności
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+            data = self._tesseract_to_data(image, lang)
             
             # Oblicz średnią pewność
             if 'conf' in data and len(data['conf']) > 0:
@@ -162,7 +581,7 @@ class OCREngine:
             return min(len(text) / 100.0, 0.95)
         
         except Exception as e:
-            print(f"Błąd obliczania pewności: {e}")
+            logger.warning(f"Błąd obliczania pewności: {e}")
             # Fallback - szacowanie na podstawie długości tekstu
             return min(len(text) / 200.0, 0.8)
 
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Page Cache Module
+Dyskowy cache wyrenderowanych i przetworzonych stron PDF adresowany treścią
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+import cv2
+
+
+class PageCache:
+    """
+    Cache artefaktów stron z limitem rozmiaru i usuwaniem najdawniej używanych (LRU)
+
+    Klucz artefaktu wyznacza skrót treści pliku PDF, indeks strony, DPI,
+    etap przetwarzania i jego parametry, więc zmiana dowolnego z nich
+    unieważnia wpis. Strony zapisywane są jako bezstratne PNG, a czas
+    ostatniego użycia to czas modyfikacji pliku (odświeżany przy trafieniu).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Inicjalizacja cache stron
+
+        Args:
+            cache_dir: Katalog cache
+            max_bytes: Maksymalny łączny rozmiar plików cache w bajtach
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """
+        Oblicza skrót SHA-256 treści pliku
+
+        Args:
+            path: Ścieżka do pliku
+
+        Returns:
+            Skrót szesnastkowy
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(doc_hash: str, page_index: int, dpi: int, stage: str, params: Dict) -> str:
+        """
+        Buduje klucz artefaktu strony
+
+        Args:
+            doc_hash: Skrót treści pliku PDF
+            page_index: Indeks strony (od 0)
+            dpi: Rozdzielczość renderowania
+            stage: Etap przetwarzania ('render' lub 'preprocess')
+            params: Parametry etapu wpływające na wynik
+
+        Returns:
+            Klucz artefaktu
+        """
+        payload = json.dumps([doc_hash, page_index, dpi, stage, params], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Odczytuje artefakt z cache
+
+        Args:
+            key: Klucz artefaktu
+
+        Returns:
+            Tablica strony lub None przy braku wpisu
+        """
+        path = self._path(key)
+        array = cv2.imread(path, cv2.IMREAD_UNCHANGED) if os.path.exists(path) else None
+        if array is None:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """
+        Zapisuje artefakt w cache i w razie potrzeby usuwa najstarsze wpisy
+
+        Args:
+            key: Klucz artefaktu
+            array: Tablica strony (HxW lub HxWx3, uint8)
+        """
+        ok, encoded = cv2.imencode('.png', array, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not ok:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Nadpisywany wpis nie może być liczony do rozmiaru cache dwukrotnie
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        # Zapis atomowy - równoległe procesy nie zobaczą niepełnego pliku
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(encoded.tobytes())
+        os.replace(tmp_path, path)
+
+        self._size_bytes += len(encoded) - old_size
+        if self._size_bytes > self.max_bytes:
+            self._evict()
+
+    def stats(self) -> Dict:
+        """Zwraca liczniki trafień, chybień i usunięć oraz rozmiar cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size_bytes': self._size_bytes
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def _entries(self):
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path)
+                            if entry.is_file() and entry.name.endswith('.png'))
+
+    def _evict(self) -> None:
+        """Usuwa najdawniej używane wpisy, aż cache zajmie najwyżej 90% limitu"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if size <= target:
+                break
+            try:
+                entry_size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+        self._size_bytes = size
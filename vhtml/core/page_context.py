@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Page Context Module
+Współdzielone artefakty przetwarzania strony (skala szarości, odszumianie, binaryzacja)
+"""
+
+import time
+import threading
+from typing import Dict, Tuple
+import numpy as np
+import cv2
+from PIL import Image
+
+
+class PageContext:
+    """
+    Kontekst przetwarzania jednej strony dokumentu
+
+    Kolejne reprezentacje strony (skala szarości, obraz odszumiony,
+    obraz zbinaryzowany) są obliczane leniwie i najwyżej raz, a następnie
+    współdzielone przez analizę układu i OCR. Każde obliczenie lub ponowne
+    użycie jest odnotowywane w `steps`.
+    """
+
+    def __init__(self, image: Image.Image, page_number: int = 1, denoised: bool = False,
+                 denoise_params: Tuple[int, int, int] = (10, 7, 21)):
+        """
+        Inicjalizacja kontekstu strony
+
+        Args:
+            image: Obraz strony (RGB lub w skali szarości)
+            page_number: Numer strony (od 1)
+            denoised: Czy obraz został już odszumiony (np. przez PDFProcessor.preprocess_image)
+            denoise_params: Parametry fastNlMeansDenoising (h, templateWindowSize, searchWindowSize)
+        """
+        self.image = image
+        self.page_number = page_number
+        self.denoise_params = denoise_params
+        self.steps: Dict[str, Dict] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        self._denoised_input = denoised
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Rozmiar strony (szerokość, wysokość)"""
+        return self.image.size
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Strona w skali szarości"""
+        return self._get('gray', self._compute_gray)
+
+    @property
+    def denoised(self) -> np.ndarray:
+        """Strona w skali szarości po redukcji szumów"""
+        if self._denoised_input:
+            return self.gray
+        return self._get('denoise', self._compute_denoised)
+
+    @property
+    def binary(self) -> np.ndarray:
+        """Strona zbinaryzowana metodą Otsu (tekst = 255, tło = 0)"""
+        return self._get('binarize', self._compute_binary)
+
+    def crop(self, position: Dict[str, int], layer: str = 'denoised') -> np.ndarray:
+        """
+        Wycina blok z wybranej reprezentacji strony
+
+        Args:
+            position: Pozycja bloku (x, y, width, height)
+            layer: Reprezentacja strony ('gray', 'denoised' lub 'binary')
+
+        Returns:
+            Wycinek strony (widok na tablicę strony)
+        """
+        x, y, w, h = position['x'], position['y'], position['width'], position['height']
+        return getattr(self, layer)[y:y + h, x:x + w]
+
+    def record_step(self, name: str, duration_seconds: float, **details) -> None:
+        """
+        Odnotowuje przekształcenie wykonane poza kontekstem (np. w PDFProcessor)
+
+        Args:
+            name: Nazwa przekształcenia
+            duration_seconds: Czas wykonania
+            **details: Dodatkowe informacje o przekształceniu
+        """
+        with self._lock:
+            step = self.steps.setdefault(name, {'computed': 0, 'reused': 0, 'duration_seconds': 0.0})
+            step['computed'] += 1
+            step['duration_seconds'] += duration_seconds
+            step.update(details)
+
+    def _get(self, name: str, compute) -> np.ndarray:
+        with self._lock:
+            array = self._arrays.get(name)
+            step = self.steps.setdefault(name, {'computed': 0, 'reused': 0, 'duration_seconds': 0.0})
+            if array is not None:
+                step['reused'] += 1
+                return array
+
+            start = time.perf_counter()
+            array = compute()
+            step['computed'] += 1
+            step['duration_seconds'] += time.perf_counter() - start
+            self._arrays[name] = array
+            return array
+
+    def _compute_gray(self) -> np.ndarray:
+        array = np.asarray(self.image)
+        if array.ndim == 2:
+            return array
+        return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+    def _compute_denoised(self) -> np.ndarray:
+        h, template_window, search_window = self.denoise_params
+        return cv2.fastNlMeansDenoising(self.gray, None, h, template_window, search_window)
+
+    def _compute_binary(self) -> np.ndarray:
+        _, binary = cv2.threshold(self.denoised, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return binary
@@ -5,25 +5,61 @@ Moduł do konwersji dokumentów PDF do obrazów i wstępnego przetwarzania
 """
 
 import os
-from typing import List, Optional, Tuple
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 import numpy as np
 import cv2
-from pdf2image import convert_from_path
 from PIL import Image
 import fitz  # PyMuPDF
 
+from vhtml.core.page_cache import PageCache
+from vhtml.core.rasterizer import FITZ_LOCK, get_rasterizer
+
+
+DENOISE_MODES = ('adaptive', 'nlmeans', 'none')
+
 
 class PDFProcessor:
     """Procesor PDF do konwersji na obrazy i wstępnego przetwarzania"""
 
-    def __init__(self, dpi: int = 300):
+    def __init__(self, dpi: int = 300, backend: str = 'pymupdf', colorspace: str = 'rgb',
+                 workers: int = 1, pages_per_shard: int = 4, cache: Optional[PageCache] = None,
+                 denoise: str = 'adaptive', deskew: bool = True):
         """
         Inicjalizacja procesora PDF
         
         Args:
             dpi: Rozdzielczość konwersji PDF do obrazu
+            backend: Backend renderowania stron ('pymupdf' lub 'poppler')
+            colorspace: Przestrzeń barw renderowanych stron ('rgb' lub 'gray')
+            workers: Liczba procesów renderujących i przetwarzających strony równolegle
+            pages_per_shard: Maksymalna liczba kolejnych stron zlecanych jednemu procesowi
+            cache: Opcjonalny cache wyrenderowanych i przetworzonych stron
+            denoise: Strategia redukcji szumów: 'adaptive' (wybór według oszacowanego
+                poziomu szumu), 'nlmeans' (zawsze pełne NL-means) lub 'none'
+            deskew: Czy korygować przekrzywienie stron
         """
+        if denoise not in DENOISE_MODES:
+            raise ValueError(f"Nieznana strategia redukcji szumów: {denoise}")
         self.dpi = dpi
+        self.colorspace = colorspace
+        self.rasterizer = get_rasterizer(backend)
+        self.workers = max(1, workers)
+        self.pages_per_shard = max(1, pages_per_shard)
+        self.cache = cache
+        # Parametry przetwarzania wstępnego (wchodzą do klucza cache)
+        self.denoise = denoise
+        self.denoise_params = (10, 7, 21)
+        # Progi oszacowanego odchylenia szumu: poniżej pierwszego strona nie jest
+        # odszumiana, poniżej drugiego wystarcza filtr medianowy, powyżej - NL-means
+        self.noise_thresholds = (1.0, 4.0)
+        self.deskew = deskew
+        self.deskew_min_angle = 0.5
+        # Kąt przekrzywienia szacowany jest na kopii o dłuższym boku najwyżej tylu pikseli
+        self.deskew_max_side = 1000
+        self.deskew_max_angle = 10
     
     def pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
         """
@@ -36,83 +72,509 @@ class PDFProcessor:
             Lista obrazów stron PDF
         """
         try:
-            images = convert_from_path(pdf_path, dpi=self.dpi)
-            return images
+            return list(self.iter_pages(pdf_path))
         except Exception as e:
             print(f"Błąd konwersji PDF: {e}")
             return []
+
+    def page_count(self, pdf_path: str) -> int:
+        """
+        Zwraca liczbę stron dokumentu PDF
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            
+        Returns:
+            Liczba stron
+        """
+        return self.rasterizer.page_count(pdf_path)
+
+    def iter_page_arrays(self, pdf_path: str) -> Iterator[np.ndarray]:
+        """
+        Renderuje strony PDF pojedynczo jako tablice numpy
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            
+        Yields:
+            Tablice kolejnych stron w przestrzeni barw procesora
+        """
+        return self._iter_rendered(pdf_path, 0, self.page_count(pdf_path))
+
+    def _iter_rendered(self, pdf_path: str, first_page: int, last_page: int,
+                       doc_hash: Optional[str] = None) -> Iterator[np.ndarray]:
+        """
+        Renderuje zakres stron [first_page, last_page), korzystając z cache jeśli jest dostępny
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            first_page: Indeks pierwszej strony
+            last_page: Indeks strony za ostatnią
+            doc_hash: Skrót treści PDF (obliczany, jeśli nie podano)
+            
+        Yields:
+            Tablice kolejnych stron
+        """
+        if self.cache is None:
+            yield from self.rasterizer.iter_pages(pdf_path, self.dpi, self.colorspace,
+                                                  first_page, last_page)
+            return
+        
+        doc_hash = doc_hash or PageCache.file_hash(pdf_path)
+        for page_index in range(first_page, last_page):
+            cache_key = self._cache_key((doc_hash, page_index), 'render')
+            array = self.cache.get(cache_key)
+            if array is None:
+                array = self.rasterizer.render_page(pdf_path, page_index, self.dpi, self.colorspace)
+                self.cache.put(cache_key, array)
+            yield array
+
+    def load_page(self, pdf_path: str, page_index: int, doc_hash: Optional[str] = None,
+                  preprocessed: bool = True) -> Tuple[np.ndarray, bool, Dict]:
+        """
+        Wczytuje stronę: przetworzoną wcześniej z cache albo wyrenderowaną
+        
+        Pierwszy etap potoku stron - przetwarzanie wstępne (finish_page)
+        może działać w innym wątku niż renderowanie.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_index: Indeks strony (od 0)
+            doc_hash: Skrót treści PDF (wymagany przy włączonym cache)
+            preprocessed: Czy szukać w cache strony już przetworzonej
+            
+        Returns:
+            Krotka (tablica strony, czy strona jest już przetworzona, czasy etapów
+            i liczniki cache)
+        """
+        timings = {'render_seconds': 0.0, 'preprocess_seconds': 0.0}
+        page_key = (doc_hash, page_index) if doc_hash else None
+        if self.cache is not None:
+            timings.update(cache_hits=0, cache_misses=0)
+        
+        cache_key = self._cache_key(page_key, 'preprocess') if preprocessed else None
+        if cache_key is not None:
+            processed = self.cache.get(cache_key)
+            timings['cache_hits' if processed is not None else 'cache_misses'] += 1
+            if processed is not None:
+                return processed, True, timings
+        
+        start = time.perf_counter()
+        cache_key = self._cache_key(page_key, 'render')
+        array = self.cache.get(cache_key) if cache_key is not None else None
+        if cache_key is not None:
+            timings['cache_hits' if array is not None else 'cache_misses'] += 1
+        if array is None:
+            array = self.rasterizer.render_page(pdf_path, page_index, self.dpi, self.colorspace)
+            if cache_key is not None:
+                self.cache.put(cache_key, array)
+        timings['render_seconds'] = time.perf_counter() - start
+        return array, False, timings
     
-    def preprocess_image(self, image: Image.Image) -> Image.Image:
+    def finish_page(self, array: np.ndarray, page_index: int, timings: Dict,
+                    doc_hash: Optional[str] = None) -> Tuple[np.ndarray, Dict]:
+        """
+        Przetwarza wstępnie wyrenderowaną stronę i zapisuje wynik w cache
+        
+        Args:
+            array: Strona wyrenderowana przez load_page
+            page_index: Indeks strony (od 0)
+            timings: Czasy i liczniki zwrócone przez load_page
+            doc_hash: Skrót treści PDF (wymagany przy włączonym cache)
+            
+        Returns:
+            Krotka (przetworzona strona w skali szarości, uzupełnione czasy etapów)
+        """
+        start = time.perf_counter()
+        processed, denoise_info = self._preprocess_gray(self._to_gray(array))
+        cache_key = self._cache_key((doc_hash, page_index) if doc_hash else None, 'preprocess')
+        if cache_key is not None:
+            self.cache.put(cache_key, processed)
+        return processed, {**timings, 'preprocess_seconds': time.perf_counter() - start, **denoise_info}
+    
+    def _cache_key(self, page_key: Optional[Tuple[str, int]], stage: str) -> Optional[str]:
+        """
+        Buduje klucz cache dla strony i etapu przetwarzania
+        
+        Args:
+            page_key: Para (skrót treści PDF, indeks strony) lub None
+            stage: Etap ('render' lub 'preprocess')
+            
+        Returns:
+            Klucz cache lub None, gdy cache jest wyłączony
+        """
+        if self.cache is None or page_key is None:
+            return None
+        params = {'backend': self.rasterizer.name, 'colorspace': self.colorspace}
+        if stage == 'preprocess':
+            params.update(self._preprocess_config())
+        doc_hash, page_index = page_key
+        return PageCache.make_key(doc_hash, page_index, self.dpi, stage, params)
+
+    def iter_pages(self, pdf_path: str) -> Iterator[Image.Image]:
+        """
+        Renderuje strony PDF pojedynczo i zwraca je jako generator.
+        
+        Każda strona jest konwertowana dopiero wtedy, gdy konsument o nią
+        poprosi. Generator nie trzyma referencji do stron już oddanych,
+        więc jeśli konsument ich nie zachowuje, w pamięci są najwyżej dwie
+        strony naraz, niezależnie od długości dokumentu.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            
+        Yields:
+            Obrazy kolejnych stron PDF
+        """
+        for array in self.iter_page_arrays(pdf_path):
+            yield Image.fromarray(array)
+    
+    def iter_preprocessed_pages(self, pdf_path: str, page_indices: Optional[Sequence[int]] = None
+                                ) -> Iterator[Tuple[int, Image.Image, Dict[str, float]]]:
+        """
+        Renderuje i przetwarza wstępnie wybrane strony, zwracając je w kolejności
+        
+        Przy workers > 1 kolejne zakresy stron są rozdzielane między procesy,
+        z których każdy sam otwiera plik PDF. W locie jest najwyżej
+        2 * workers zakresów, więc pamięć nie rośnie z długością dokumentu.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_indices: Indeksy stron (od 0); domyślnie wszystkie strony
+            
+        Yields:
+            Krotki (indeks strony, przetworzony obraz, czasy etapów w sekundach)
+        """
+        if page_indices is None:
+            page_indices = range(self.page_count(pdf_path))
+        shards = self._page_shards(sorted(page_indices), self.pages_per_shard)
+        doc_hash = PageCache.file_hash(pdf_path) if self.cache is not None else None
+        
+        if self.workers == 1 or len(shards) == 1:
+            for first_page, last_page in shards:
+                for page_index, array, timings in _iter_preprocessed_range(
+                        self, pdf_path, first_page, last_page, doc_hash):
+                    yield page_index, Image.fromarray(array), timings
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_page_worker) as executor:
+            pending = deque()
+            shards_left = deque(shards)
+            while shards_left or pending:
+                while shards_left and len(pending) < 2 * self.workers:
+                    first_page, last_page = shards_left.popleft()
+                    pending.append(executor.submit(
+                        _preprocess_page_range, pdf_path, first_page, last_page,
+                        self._worker_config(), doc_hash
+                    ))
+                for page_index, array, timings in pending.popleft().result():
+                    yield page_index, Image.fromarray(array), timings
+    
+    def _preprocess_config(self) -> Dict:
+        """Parametry przetwarzania wstępnego - wspólne dla klucza cache i procesów roboczych"""
+        return {
+            'denoise': self.denoise,
+            'denoise_params': list(self.denoise_params),
+            'noise_thresholds': list(self.noise_thresholds),
+            'deskew': self.deskew,
+            'deskew_min_angle': self.deskew_min_angle,
+            'deskew_max_side': self.deskew_max_side,
+            'deskew_max_angle': self.deskew_max_angle
+        }
+    
+    def _worker_config(self) -> Dict:
+        """Parametry potrzebne do odtworzenia procesora w procesie roboczym"""
+        return {
+            'dpi': self.dpi,
+            'backend': self.rasterizer.name,
+            'colorspace': self.colorspace,
+            'cache': self.cache,
+            'preprocess': self._preprocess_config()
+        }
+    
+    @classmethod
+    def _from_worker_config(cls, config: Dict) -> 'PDFProcessor':
+        """Odtwarza procesor z _worker_config - z pełną konfiguracją przetwarzania wstępnego"""
+        config = dict(config)
+        preprocess = config.pop('preprocess')
+        processor = cls(denoise=preprocess['denoise'], deskew=preprocess['deskew'], **config)
+        processor.denoise_params = tuple(preprocess['denoise_params'])
+        processor.noise_thresholds = tuple(preprocess['noise_thresholds'])
+        processor.deskew_min_angle = preprocess['deskew_min_angle']
+        processor.deskew_max_side = preprocess['deskew_max_side']
+        processor.deskew_max_angle = preprocess['deskew_max_angle']
+        return processor
+    
+    @staticmethod
+    def _page_shards(page_indices: Sequence[int], max_pages: int) -> List[Tuple[int, int]]:
+        """
+        Dzieli indeksy stron na ciągłe zakresy [first, last) o ograniczonej długości
+        
+        Args:
+            page_indices: Posortowane indeksy stron
+            max_pages: Maksymalna długość zakresu
+            
+        Returns:
+            Lista zakresów stron
+        """
+        shards = []
+        for page_index in page_indices:
+            if shards and shards[-1][1] == page_index and shards[-1][1] - shards[-1][0] < max_pages:
+                shards[-1][1] += 1
+            else:
+                shards.append([page_index, page_index + 1])
+        return [(first_page, last_page) for first_page, last_page in shards]
+    
+    def preprocess_image(self, image: Image.Image,
+                         page_key: Optional[Tuple[str, int]] = None) -> Image.Image:
         """
         Wstępne przetwarzanie obrazu (denoise, deskew)
         
         Args:
             image: Obraz do przetworzenia
+            page_key: Para (skrót treści PDF, indeks strony) - jeśli podana
+                i cache jest włączony, wynik jest odczytywany z cache lub tam zapisywany
             
         Returns:
             Przetworzony obraz
         """
-        # Konwersja do OpenCV
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # Konwersja do skali szarości
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        cache_key = self._cache_key(page_key, 'preprocess')
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return Image.fromarray(cached)
         
-        # Redukcja szumów
-        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+        # Konwersja do skali szarości (strony mogą być renderowane w RGB lub od razu w szarości)
+        corrected, _ = self._preprocess_gray(self._to_gray(image))
         
-        # Korekcja przekrzywienia (deskew)
-        corrected = self._deskew(denoised)
+        if cache_key is not None:
+            self.cache.put(cache_key, corrected)
         
         # Konwersja z powrotem do PIL Image
         pil_image = Image.fromarray(corrected)
         return pil_image
     
-    def _deskew(self, image: np.ndarray) -> np.ndarray:
+    def _preprocess_gray(self, gray: np.ndarray) -> Tuple[np.ndarray, Dict]:
         """
-        Korekcja przekrzywienia dokumentu
+        Redukcja szumów i korekcja przekrzywienia obrazu w skali szarości
         
         Args:
-            image: Obraz w formacie numpy array
+            gray: Obraz w skali szarości
             
         Returns:
-            Skorygowany obraz
+            Krotka (przetworzony obraz, informacje o redukcji szumów i korekcji przekrzywienia)
         """
-        # Wykrywanie krawędzi
-        edges = cv2.Canny(image, 50, 150, apertureSize=3)
+        # Redukcja szumów
+        denoised, info = self._denoise(gray)
         
-        # Wykrywanie linii
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, 100, minLineLength=100, maxLineGap=10)
+        if not self.deskew:
+            return denoised, info
         
-        # Jeśli nie wykryto linii, zwróć oryginalny obraz
-        if lines is None:
-            return image
+        # Korekcja przekrzywienia (deskew)
+        start = time.perf_counter()
+        angle = self._estimate_skew_angle(denoised)
+        corrected = self._deskew(denoised, angle)
+        info['skew_angle'] = round(angle, 3) if angle is not None else None
+        info['deskew_applied'] = corrected is not denoised
+        info['deskew_seconds'] = time.perf_counter() - start
+        return corrected, info
+    
+    def _denoise(self, gray: np.ndarray) -> Tuple[np.ndarray, Dict]:
+        """
+        Redukcja szumów według wybranej strategii
         
-        # Obliczanie kąta przekrzywienia
-        angles = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            if x2 - x1 != 0:  # Unikanie dzielenia przez zero
-                angle = np.arctan((y2 - y1) / (x2 - x1)) * 180 / np.pi
-                angles.append(angle)
+        W trybie adaptacyjnym poziom szumu jest szacowany tanio, a kosztowne
+        NL-means uruchamiane jest tylko dla stron, które tego wymagają.
         
-        if not angles:
-            return image
+        Args:
+            gray: Obraz w skali szarości
+            
+        Returns:
+            Krotka (odszumiony obraz, informacje o decyzji i czasie)
+        """
+        start = time.perf_counter()
+        info = {}
+        if self.denoise == 'adaptive':
+            info['noise_sigma'] = round(self.estimate_noise(gray), 3)
+            skip_below, median_below = self.noise_thresholds
+            if info['noise_sigma'] < skip_below:
+                method = 'none'
+            elif info['noise_sigma'] < median_below:
+                method = 'median'
+            else:
+                method = 'nlmeans'
+        else:
+            method = self.denoise
+        
+        if method == 'nlmeans':
+            h, template_window, search_window = self.denoise_params
+            denoised = cv2.fastNlMeansDenoising(gray, None, h, template_window, search_window)
+        elif method == 'median':
+            denoised = cv2.medianBlur(gray, 3)
+        else:
+            denoised = gray
+        
+        info['denoise_method'] = method
+        info['denoise_seconds'] = time.perf_counter() - start
+        return denoised, info
+    
+    @staticmethod
+    def estimate_noise(gray: np.ndarray, max_side: int = 1024) -> float:
+        """
+        Szacuje odchylenie standardowe szumu strony
         
-        # Mediana kątów jako najlepsze przybliżenie
-        median_angle = np.median(angles)
+        Obraz jest próbkowany co n-ty piksel (bez uśredniania, które
+        wygładziłoby szum), a następnie filtrowany jądrem Immerkæra, które
+        zeruje się na płaskich i liniowych fragmentach obrazu. Mediana
+        modułu odpowiedzi jest odporna na krawędzie tekstu, bo na stronie
+        dokumentu stanowią one mniejszość pikseli.
+        
+        Args:
+            gray: Obraz w skali szarości
+            max_side: Maksymalny dłuższy bok próbkowanej kopii
+            
+        Returns:
+            Oszacowane odchylenie standardowe szumu (w poziomach jasności)
+        """
+        step = max(1, int(np.ceil(max(gray.shape[:2]) / max_side)))
+        sample = gray[::step, ::step].astype(np.float32)
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = cv2.filter2D(sample, -1, kernel)[1:-1, 1:-1]
+        # Dla szumu gaussowskiego odpowiedź ma odchylenie 6 * sigma, a mediana |N(0, s)| = 0.6745 * s
+        return float(np.median(np.abs(response)) / (0.6745 * 6.0))
+    
+    @staticmethod
+    def _to_gray(image: Image.Image) -> np.ndarray:
+        """
+        Konwertuje obraz PIL do tablicy w skali szarości
+        
+        Args:
+            image: Obraz RGB lub w skali szarości
+            
+        Returns:
+            Tablica uint8 HxW
+        """
+        array = np.asarray(image)
+        if array.ndim == 2:
+            return array
+        return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    
+    def _estimate_skew_angle(self, image: np.ndarray) -> Optional[float]:
+        """
+        Szacuje kąt przekrzywienia dokumentu na pomniejszonej kopii strony
+        
+        Kąt wyznaczany jest metodą profilu projekcji: piksele tekstu są rzutowane
+        na oś pionową obróconą o kolejne kąty kandydujące, a wybierany jest kąt,
+        dla którego profil jest najostrzejszy (wiersze tekstu nie nachodzą na siebie).
+        Przeszukiwanie jest dwuetapowe - zgrubne co 1° i dokładne co 0.1°.
+        
+        Args:
+            image: Obraz w skali szarości
+            
+        Returns:
+            Kąt przekrzywienia w stopniach lub None, jeśli strona nie zawiera treści
+        """
+        # Pomniejszenie - kąt nie zależy od skali, a liczba pikseli maleje kwadratowo
+        if self.deskew_max_side and max(image.shape[:2]) > self.deskew_max_side:
+            scale = self.deskew_max_side / max(image.shape[:2])
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        ys, xs = np.nonzero(binary)
+        # Pusta strona lub strona bez wyraźnego tła
+        if ys.size < 100 or ys.size > binary.size // 2:
+            return None
+        
+        ys = ys.astype(np.float32) - image.shape[0] / 2.0
+        xs = xs.astype(np.float32) - image.shape[1] / 2.0
+        
+        def sharpness(angle: float) -> float:
+            theta = np.radians(angle)
+            projection = ys * np.cos(theta) - xs * np.sin(theta)
+            profile = np.bincount((projection - projection.min()).astype(np.int32))
+            return float(np.dot(profile, profile.astype(np.float64)))
+        
+        limit = self.deskew_max_angle
+        coarse = max(np.arange(-limit, limit + 1.0, 1.0), key=sharpness)
+        fine = max(np.arange(coarse - 1.0, coarse + 1.05, 0.1), key=sharpness)
+        return round(float(fine), 2) + 0.0  # bez -0.0
+    
+    def _deskew(self, image: np.ndarray, angle: Optional[float] = None) -> np.ndarray:
+        """
+        Korekcja przekrzywienia dokumentu
+        
+        Args:
+            image: Obraz w formacie numpy array
+            angle: Kąt przekrzywienia (szacowany, jeśli nie podano)
+            
+        Returns:
+            Skorygowany obraz (ten sam obiekt, jeśli korekcja nie była potrzebna)
+        """
+        if angle is None:
+            angle = self._estimate_skew_angle(image)
         
         # Korekcja tylko jeśli kąt jest znaczący
-        if abs(median_angle) < 0.5:
+        if angle is None or abs(angle) < self.deskew_min_angle:
             return image
         
-        # Rotacja obrazu
         (h, w) = image.shape[:2]
-        center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, median_angle, 1.0)
-        rotated = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+        rotation = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+        return self._warp(image, [rotation])
+    
+    @staticmethod
+    def _warp(image: np.ndarray, matrices: List[np.ndarray]) -> np.ndarray:
+        """
+        Wykonuje złożenie przekształceń afinicznych jednym przepróbkowaniem obrazu
+        
+        Args:
+            image: Obraz w formacie numpy array
+            matrices: Macierze 2x3 w kolejności stosowania
+            
+        Returns:
+            Przekształcony obraz o tym samym rozmiarze
+        """
+        combined = np.eye(3)
+        for matrix in matrices:
+            combined = np.vstack([matrix, [0.0, 0.0, 1.0]]) @ combined
+        
+        (h, w) = image.shape[:2]
+        return cv2.warpAffine(image, combined[:2], (w, h), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+    
+    def render_regions(self, pdf_path: str, page_index: int, positions: List[Dict[str, int]],
+                       source_dpi: int) -> List[Tuple[Dict[str, int], np.ndarray]]:
+        """
+        Renderuje w rozdzielczości procesora tylko wskazane fragmenty strony
+        
+        Pozwala wykryć bloki na stronie wyrenderowanej w niskiej rozdzielczości,
+        a do OCR zrasteryzować w pełnej rozdzielczości wyłącznie ich obszary.
         
-        return rotated
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_index: Indeks strony (od 0)
+            positions: Pozycje bloków (x, y, width, height) w pikselach przy source_dpi
+            source_dpi: Rozdzielczość, w której wyznaczono pozycje
+            
+        Returns:
+            Lista krotek (pozycja przy self.dpi, fragment w skali szarości po redukcji szumów)
+        """
+        scale = self.dpi / source_dpi
+        points = 72.0 / source_dpi
+        clips = [(p['x'] * points, p['y'] * points,
+                  (p['x'] + p['width']) * points, (p['y'] + p['height']) * points)
+                 for p in positions]
+        arrays = self.rasterizer.render_clips(pdf_path, page_index, self.dpi, clips, 'gray')
+        
+        regions = []
+        for position, array in zip(positions, arrays):
+            denoised, _ = self._denoise(array)
+            regions.append(({
+                'x': int(position['x'] * scale),
+                'y': int(position['y'] * scale),
+                'width': denoised.shape[1],
+                'height': denoised.shape[0]
+            }, denoised))
+        return regions
     
     def extract_text_with_pymupdf(self, pdf_path: str) -> List[str]:
         """
@@ -125,18 +587,135 @@ class PDFProcessor:
             Lista tekstów ze stron PDF
         """
         try:
-            doc = fitz.open(pdf_path)
-            texts = []
-            
-            for page in doc:
-                text = page.get_text()
-                texts.append(text)
-            
-            return texts
+            with FITZ_LOCK, fitz.open(pdf_path) as doc:
+                return [page.get_text() for page in doc]
         except Exception as e:
             print(f"Błąd ekstrakcji tekstu PyMuPDF: {e}")
             return []
 
+    def extract_text_blocks(self, pdf_path: str, page_index: int = 0,
+                            min_words: int = 5, min_region_area: int = 1000) -> Optional[List[Dict]]:
+        """
+        Buduje bloki strony bezpośrednio z warstwy tekstowej PDF (bez OCR)
+        
+        Pozycje bloków są przeliczane na piksele przy rozdzielczości procesora,
+        więc odpowiadają współrzędnym na wyrenderowanej stronie. Obrazy osadzone
+        na stronie zwracane są jako regiony ze źródłem 'ocr' do rozpoznania
+        tradycyjną ścieżką.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_index: Indeks strony (od 0)
+            min_words: Minimalna liczba słów, aby uznać warstwę tekstową za użyteczną
+            min_region_area: Minimalny obszar (w pikselach) obrazu kierowanego do OCR
+            
+        Returns:
+            Lista bloków lub None, jeśli strona nie ma użytecznej warstwy tekstowej
+        """
+        with FITZ_LOCK, fitz.open(pdf_path) as doc:
+            page = doc.load_page(page_index)
+            if not self._has_usable_text_layer(page.get_text("words"), min_words):
+                return None
+            
+            scale = self.dpi / 72.0
+            blocks = []
+            for block in page.get_text("dict")["blocks"]:
+                rect = fitz.Rect(block['bbox']) * page.rotation_matrix
+                position = {
+                    'x': int(rect.x0 * scale),
+                    'y': int(rect.y0 * scale),
+                    'width': int(round(rect.width * scale)),
+                    'height': int(round(rect.height * scale))
+                }
+                
+                # Blok graficzny - tekst (jeśli jest) można odczytać tylko przez OCR
+                if block['type'] == 1:
+                    if position['width'] * position['height'] >= min_region_area:
+                        blocks.append({'position': position, 'source': 'ocr'})
+                    continue
+                
+                spans = [span for line in block['lines'] for span in line['spans'] if span['text'].strip()]
+                if not spans:
+                    continue
+                
+                lines = [''.join(span['text'] for span in line['spans']).strip() for line in block['lines']]
+                # Formatowanie bloku według spanu z największą ilością tekstu
+                # (flagi spanu: bit 1 - kursywa, bit 4 - pogrubienie)
+                dominant = max(spans, key=lambda span: len(span['text']))
+                blocks.append({
+                    'position': position,
+                    'source': 'text_layer',
+                    'text': '\n'.join(line for line in lines if line),
+                    'font': dominant['font'],
+                    'font_size': round(dominant['size'], 1),
+                    'bold': bool(dominant['flags'] & 16),
+                    'italic': bool(dominant['flags'] & 2)
+                })
+            
+            return blocks
+    
+    @staticmethod
+    def _has_usable_text_layer(words: List[Tuple], min_words: int) -> bool:
+        """
+        Sprawdza, czy warstwa tekstowa strony nadaje się do użycia zamiast OCR
+        
+        Args:
+            words: Słowa strony w formacie page.get_text("words")
+            min_words: Minimalna liczba słów
+            
+        Returns:
+            True, jeśli warstwa tekstowa jest użyteczna
+        """
+        if len(words) < min_words:
+            return False
+        
+        # Fonty bez mapowania ToUnicode dają znaki zastępcze zamiast tekstu
+        garbled = sum(1 for word in words if '\ufffd' in word[4] or not word[4].isprintable())
+        return garbled / len(words) < 0.1
+
+
+def _iter_preprocessed_range(processor: PDFProcessor, pdf_path: str, first_page: int,
+                             last_page: int, doc_hash: Optional[str] = None
+                             ) -> Iterator[Tuple[int, np.ndarray, Dict[str, float]]]:
+    """
+    Renderuje i przetwarza wstępnie kolejne strony zakresu [first_page, last_page)
+    
+    Przy włączonym cache strona przetworzona wcześniej z tymi samymi
+    parametrami jest odczytywana z dysku bez renderowania.
+    
+    Args:
+        processor: Procesor PDF
+        pdf_path: Ścieżka do pliku PDF
+        first_page: Indeks pierwszej strony
+        last_page: Indeks strony za ostatnią
+        doc_hash: Skrót treści PDF (wymagany przy włączonym cache)
+        
+    Yields:
+        Krotki (indeks strony, przetworzona strona, czasy etapów i liczniki cache)
+    """
+    for page_index in range(first_page, last_page):
+        page, preprocessed, timings = processor.load_page(pdf_path, page_index, doc_hash)
+        if not preprocessed:
+            page, timings = processor.finish_page(page, page_index, timings, doc_hash)
+        yield page_index, page, timings
+
+
+def _init_page_worker() -> None:
+    """Ogranicza wątki OpenCV w procesie roboczym - równoległość zapewniają procesy"""
+    cv2.setNumThreads(1)
+
+
+def _preprocess_page_range(pdf_path: str, first_page: int, last_page: int, config: Dict,
+                           doc_hash: Optional[str] = None) -> List[Tuple[int, np.ndarray, Dict[str, float]]]:
+    """
+    Zadanie procesu roboczego: przetwarza cały zakres stron
+    
+    Funkcja jest na poziomie modułu, aby dało się ją przekazać do procesu
+    roboczego - każdy z nich otwiera dokument PDF samodzielnie.
+    """
+    return list(_iter_preprocessed_range(PDFProcessor._from_worker_config(config), pdf_path,
+                                         first_page, last_page, doc_hash))
+
 
 if __name__ == "__main__":
     # Przykład użycia
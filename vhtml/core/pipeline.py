@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pipeline Module
+Potok etapów przetwarzania stron połączonych ograniczonymi kolejkami
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Znacznik końca strumienia w kolejkach potoku
+_DONE = object()
+
+
+class _Failure:
+    """Błąd elementu - przekazywany dalej bez wywoływania kolejnych etapów"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StagePipeline:
+    """
+    Potok etapów (np. renderowanie -> przetwarzanie wstępne -> analiza)
+
+    Każdy etap ma własne wątki i ograniczoną kolejkę wejściową, więc strona
+    N+1 jest renderowana, gdy strona N jest odszumiana, a strona N-1
+    rozpoznawana. Pełna kolejka wstrzymuje etap poprzedzający - w locie jest
+    najwyżej (workers + queue_size) elementów na etap, niezależnie od długości
+    dokumentu. Wyniki zwracane są w kolejności wejścia. Dla każdego etapu
+    mierzony jest czas pracy, oczekiwania na wejście (etap niedożywiony)
+    i oczekiwania na miejsce w kolejce następnego etapu (etap blokowany).
+    """
+
+    def __init__(self, stages: Sequence[Tuple[str, Callable[[Any], Any], int]], queue_size: int = 2):
+        """
+        Inicjalizacja potoku
+
+        Args:
+            stages: Etapy (nazwa, funkcja elementu, liczba wątków) w kolejności
+            queue_size: Pojemność kolejki przed każdym etapem
+        """
+        self.stages = [(name, fn, max(1, workers)) for name, fn, workers in stages]
+        self.queue_size = max(1, queue_size)
+        self._lock = threading.Lock()
+        self._metrics = {name: {'workers': workers, 'items': 0, 'busy_seconds': 0.0,
+                                'input_wait_seconds': 0.0, 'output_wait_seconds': 0.0}
+                         for name, _, workers in self.stages}
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Przepuszcza elementy przez wszystkie etapy
+
+        Błąd etapu jest zgłaszany przy odbiorze elementu, którego dotyczy;
+        przerwanie odbioru zatrzymuje wszystkie wątki potoku.
+
+        Args:
+            items: Elementy wejściowe (czytane w osobnym wątku)
+
+        Yields:
+            Wyniki ostatniego etapu w kolejności elementów wejściowych
+        """
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], stop),
+                                    name='pipeline-source', daemon=True)]
+        for index, (name, fn, workers) in enumerate(self.stages):
+            remaining = [workers]
+            for worker in range(workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(name, fn, queues[index], queues[index + 1], remaining, stop),
+                    name=f'pipeline-{name}-{worker}', daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        try:
+            ready: Dict[int, Any] = {}
+            expected = 0
+            while True:
+                entry = self._get(queues[-1], stop)
+                if entry is _DONE:
+                    break
+                ready[entry[0]] = entry[1]
+                while expected in ready:
+                    result = ready.pop(expected)
+                    expected += 1
+                    if isinstance(result, _Failure):
+                        raise result.error
+                    yield result
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Zwraca liczniki i czasy każdego etapu"""
+        with self._lock:
+            return {name: dict(values) for name, values in self._metrics.items()}
+
+    def _feed(self, items: Iterable[Any], output: queue.Queue, stop: threading.Event) -> None:
+        sequence = 0
+        try:
+            for item in items:
+                if not self._put(output, (sequence, item), stop):
+                    return
+                sequence += 1
+        except Exception as e:
+            # Błąd źródła (np. renderowania w procesach) - kończy strumień
+            self._put(output, (sequence, _Failure(e)), stop)
+        self._put(output, _DONE, stop)
+
+    def _work(self, name: str, fn: Callable[[Any], Any], source: queue.Queue, output: queue.Queue,
+              remaining: List[int], stop: threading.Event) -> None:
+        metrics = self._metrics[name]
+        while True:
+            start = time.perf_counter()
+            entry = self._get(source, stop)
+            waited = time.perf_counter() - start
+            if entry is None:
+                return
+            if entry is _DONE:
+                # Znacznik wraca do kolejki dla pozostałych wątków etapu; ostatni przekazuje go dalej
+                self._put(source, _DONE, stop)
+                with self._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    self._put(output, _DONE, stop)
+                return
+
+            sequence, item = entry
+            start = time.perf_counter()
+            if not isinstance(item, _Failure):
+                try:
+                    item = fn(item)
+                except Exception as e:
+                    item = _Failure(e)
+            busy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            delivered = self._put(output, (sequence, item), stop)
+            with self._lock:
+                metrics['items'] += 1
+                metrics['busy_seconds'] += busy
+                metrics['input_wait_seconds'] += waited
+                metrics['output_wait_seconds'] += time.perf_counter() - start
+            if not delivered:
+                return
+
+    @staticmethod
+    def _get(source: queue.Queue, stop: threading.Event) -> Any:
+        """Pobiera element, przerywając oczekiwanie po zatrzymaniu potoku (None)"""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    @staticmethod
+    def _put(output: queue.Queue, entry: Any, stop: threading.Event) -> bool:
+        """Wstawia element, przerywając oczekiwanie po zatrzymaniu potoku"""
+        while not stop.is_set():
+            try:
+                output.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
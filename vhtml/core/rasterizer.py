@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Rasterizer Module
+Wymienne backendy renderowania stron PDF do tablic numpy
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type
+import numpy as np
+import fitz  # PyMuPDF
+
+
+COLORSPACES = ('rgb', 'gray')
+
+# PyMuPDF nie jest bezpieczny wątkowo (i renderuje, trzymając GIL) - każde
+# wywołanie fitz w procesie wykonywane jest pod tą blokadą
+FITZ_LOCK = threading.RLock()
+
+
+class Rasterizer(ABC):
+    """Bazowy backend renderujący strony PDF do tablic numpy"""
+
+    name = 'base'
+
+    def page_count(self, pdf_path: str) -> int:
+        """
+        Zwraca liczbę stron dokumentu PDF
+
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+
+        Returns:
+            Liczba stron
+        """
+        with FITZ_LOCK, fitz.open(pdf_path) as doc:
+            return doc.page_count
+
+    @abstractmethod
+    def iter_pages(self, pdf_path: str, dpi: int, colorspace: str = 'rgb',
+                   first_page: int = 0, last_page: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Renderuje kolejne strony PDF
+
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            dpi: Rozdzielczość renderowania
+            colorspace: Przestrzeń barw wyniku ('rgb' lub 'gray')
+            first_page: Indeks pierwszej strony (od 0)
+            last_page: Indeks strony za ostatnią renderowaną (domyślnie koniec dokumentu)
+
+        Yields:
+            Tablice HxWx3 (rgb) lub HxW (gray) typu uint8
+        """
+        raise NotImplementedError
+
+    def render_page(self, pdf_path: str, page_index: int, dpi: int,
+                    colorspace: str = 'rgb') -> np.ndarray:
+        """
+        Renderuje pojedynczą stronę PDF
+
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_index: Indeks strony (od 0)
+            dpi: Rozdzielczość renderowania
+            colorspace: Przestrzeń barw wyniku ('rgb' lub 'gray')
+
+        Returns:
+            Wyrenderowana strona
+        """
+        return next(self.iter_pages(pdf_path, dpi, colorspace, page_index, page_index + 1))
+
+    def render_clips(self, pdf_path: str, page_index: int, dpi: int,
+                     clips: Sequence[Tuple[float, float, float, float]],
+                     colorspace: str = 'rgb') -> List[np.ndarray]:
+        """
+        Renderuje wybrane prostokąty strony PDF
+        
+        Domyślnie renderowana jest cała strona, z której wycinane są prostokąty.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_index: Indeks strony (od 0)
+            dpi: Rozdzielczość renderowania
+            clips: Prostokąty (x0, y0, x1, y1) w punktach PDF (1/72 cala) strony wyświetlanej
+            colorspace: Przestrzeń barw wyniku ('rgb' lub 'gray')
+            
+        Returns:
+            Wyrenderowane fragmenty w kolejności prostokątów
+        """
+        page = self.render_page(pdf_path, page_index, dpi, colorspace)
+        zoom = dpi / 72.0
+        return [page[int(y0 * zoom):int(round(y1 * zoom)), int(x0 * zoom):int(round(x1 * zoom))].copy()
+                for x0, y0, x1, y1 in clips]
+
+    @staticmethod
+    def _check_colorspace(colorspace: str) -> None:
+        if colorspace not in COLORSPACES:
+            raise ValueError(f"Nieobsługiwana przestrzeń barw: {colorspace}")
+
+
+class PopplerRasterizer(Rasterizer):
+    """Backend oparty o pdf2image, uruchamiający pdftoppm jako podproces"""
+
+    name = 'poppler'
+
+    def iter_pages(self, pdf_path: str, dpi: int, colorspace: str = 'rgb',
+                   first_page: int = 0, last_page: Optional[int] = None) -> Iterator[np.ndarray]:
+        from pdf2image import convert_from_path
+
+        self._check_colorspace(colorspace)
+        if last_page is None:
+            last_page = self.page_count(pdf_path)
+
+        for page_index in range(first_page, last_page):
+            pages = convert_from_path(
+                pdf_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1,
+                grayscale=colorspace == 'gray'
+            )
+            if pages:
+                image = pages.pop()
+                yield np.asarray(image.convert('L' if colorspace == 'gray' else 'RGB'))
+
+
+class PyMuPDFRasterizer(Rasterizer):
+    """Backend renderujący strony w procesie przez PyMuPDF, bez plików tymczasowych"""
+
+    name = 'pymupdf'
+
+    def iter_pages(self, pdf_path: str, dpi: int, colorspace: str = 'rgb',
+                   first_page: int = 0, last_page: Optional[int] = None) -> Iterator[np.ndarray]:
+        self._check_colorspace(colorspace)
+        fitz_colorspace = fitz.csGRAY if colorspace == 'gray' else fitz.csRGB
+        zoom = dpi / 72.0
+        matrix = fitz.Matrix(zoom, zoom)
+
+        # Blokada zwalniana między stronami - nie jest trzymana podczas yield
+        with FITZ_LOCK:
+            doc = fitz.open(pdf_path)
+        try:
+            if last_page is None:
+                last_page = doc.page_count
+            for page_index in range(first_page, last_page):
+                with FITZ_LOCK:
+                    pix = doc.load_page(page_index).get_pixmap(
+                        matrix=matrix, colorspace=fitz_colorspace, alpha=False
+                    )
+                    array = self._pixmap_to_array(pix)
+                    del pix
+                yield array
+        finally:
+            with FITZ_LOCK:
+                doc.close()
+
+    def render_clips(self, pdf_path: str, page_index: int, dpi: int,
+                     clips: Sequence[Tuple[float, float, float, float]],
+                     colorspace: str = 'rgb') -> List[np.ndarray]:
+        # Rasteryzowane są tylko piksele wewnątrz prostokątów
+        self._check_colorspace(colorspace)
+        fitz_colorspace = fitz.csGRAY if colorspace == 'gray' else fitz.csRGB
+        zoom = dpi / 72.0
+        matrix = fitz.Matrix(zoom, zoom)
+        
+        with FITZ_LOCK, fitz.open(pdf_path) as doc:
+            page = doc.load_page(page_index)
+            arrays = []
+            for clip in clips:
+                # clip jest wyrażony w układzie strony wyświetlanej (po uwzględnieniu /Rotate)
+                pix = page.get_pixmap(matrix=matrix, colorspace=fitz_colorspace, alpha=False,
+                                      clip=fitz.Rect(clip))
+                arrays.append(self._pixmap_to_array(pix))
+                del pix
+            return arrays
+
+    @staticmethod
+    def _pixmap_to_array(pix: 'fitz.Pixmap') -> np.ndarray:
+        """Kopiuje bufor pixmapy do tablicy numpy (stride może zawierać wypełnienie)"""
+        buffer = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        array = buffer.reshape(pix.height, pix.stride)[:, :pix.width * pix.n]
+        if pix.n == 1:
+            return array.copy()
+        return array.reshape(pix.height, pix.width, pix.n).copy()
+
+
+RASTERIZERS: Dict[str, Type[Rasterizer]] = {
+    PopplerRasterizer.name: PopplerRasterizer,
+    PyMuPDFRasterizer.name: PyMuPDFRasterizer,
+}
+
+
+def get_rasterizer(name: str) -> Rasterizer:
+    """
+    Zwraca instancję backendu renderowania o podanej nazwie
+
+    Args:
+        name: Nazwa backendu ('pymupdf' lub 'poppler')
+
+    Returns:
+        Instancja backendu
+    """
+    try:
+        return RASTERIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Nieznany backend renderowania: {name} "
+                         f"(dostępne: {', '.join(RASTERIZERS)})") from None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Reading Order Module
+Kolejność czytania bloków strony: linie, kolumny i układ wielokolumnowy
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+def _boxes(positions: List[Dict]) -> np.ndarray:
+    return np.array([[p['x'], p['y'], p['x'] + p['width'], p['y'] + p['height']] for p in positions],
+                    dtype=np.int64).reshape(-1, 4)
+
+
+def _split(boxes: np.ndarray, indices: np.ndarray, axis: int,
+           cut_ratio: float = 0.5) -> Tuple[List[np.ndarray], int]:
+    """
+    Dzieli bloki pasami wolnej przestrzeni wzdłuż osi (0 - pionowe cięcia, 1 - poziome)
+
+    Sortowanie według początku przedziału i przemiatanie z maksimum
+    skumulowanym końca: przerwa występuje tam, gdzie początek bloku leży za
+    końcem wszystkich wcześniejszych. Cięcie następuje tylko w przerwach
+    co najmniej cut_ratio największej - węższe (np. między akapitami
+    wewnątrz kolumn) dzielone są na kolejnych poziomach rekurencji.
+
+    Returns:
+        Krotka (grupy indeksów wzdłuż osi, szerokość największej przerwy)
+    """
+    order = indices[np.argsort(boxes[indices, axis], kind='stable')]
+    starts = boxes[order, axis]
+    reach = np.maximum.accumulate(boxes[order, axis + 2])
+    gaps = starts[1:] - reach[:-1]
+    widest = int(gaps.max(initial=-1))
+    breaks = np.flatnonzero(gaps >= max(0, cut_ratio * widest)) + 1
+    return np.split(order, breaks), widest
+
+
+def group_lines(positions: List[Dict], min_overlap: float = 0.5) -> List[List[int]]:
+    """
+    Grupuje bloki w linie tekstu
+
+    Bloki przemiatane są od góry; blok dołącza do aktywnej linii, z którą
+    pokrywa się w pionie co najmniej w min_overlap wysokości niższego z nich.
+    Linie, których dolna krawędź leży nad bieżącym blokiem, opuszczają zbiór
+    aktywnych (kopiec według dolnej krawędzi), więc porównań jest tyle, ile
+    linii nakłada się na dany wiersz strony.
+
+    Args:
+        positions: Pozycje bloków (x, y, width, height)
+        min_overlap: Minimalne pokrycie w pionie (ułamek wysokości niższego bloku)
+
+    Returns:
+        Linie od góry strony; w każdej indeksy bloków od lewej
+    """
+    boxes = _boxes(positions)
+    lines: List[List[int]] = []
+    extents: List[List[int]] = []  # [góra, dół] każdej linii
+    active: List[Tuple[int, int]] = []  # kopiec (dół linii, numer linii)
+
+    for i in np.lexsort((boxes[:, 0], boxes[:, 1])):
+        top, bottom = boxes[i, 1], boxes[i, 3]
+        while active and active[0][0] <= top:
+            line_bottom, line = heapq.heappop(active)
+            if extents[line][1] > line_bottom:  # linia urosła - wpis nieaktualny
+                heapq.heappush(active, (extents[line][1], line))
+
+        best, best_overlap = None, min_overlap
+        for _, line in active:
+            line_top, line_bottom = extents[line]
+            overlap = min(bottom, line_bottom) - max(top, line_top)
+            ratio = overlap / max(1, min(bottom - top, line_bottom - line_top))
+            if ratio >= best_overlap:
+                best, best_overlap = line, ratio
+        if best is None:
+            best = len(lines)
+            lines.append([])
+            extents.append([top, bottom])
+            heapq.heappush(active, (bottom, best))
+        elif bottom > extents[best][1]:
+            extents[best][1] = bottom
+            heapq.heappush(active, (bottom, best))
+        lines[best].append(int(i))
+
+    return [sorted(line, key=lambda i: (boxes[i, 0], boxes[i, 1])) for line in lines]
+
+
+def reading_order(positions: List[Dict], min_grid_lines: int = 3) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Wyznacza kolejność czytania bloków strony
+
+    Strona dzielona jest rekurencyjnie (XY-cut) pasami wolnej przestrzeni -
+    w każdym kroku wzdłuż szerszej przerwy: poziomo (sekcje od góry) lub
+    pionowo (kolumny od lewej). Podział pionowy, w poprzek którego biegnie
+    większość linii (co najmniej min_grid_lines), jest siatką - wiersze tabel
+    i wyciągów czytane są wierszami. Obszar będący jedną linią nie jest
+    dzielony. Wewnątrz sekcji bloki czytane są liniami, od lewej do prawej.
+
+    Args:
+        positions: Pozycje bloków (x, y, width, height)
+        min_grid_lines: Minimalna liczba linii w poprzek podziału pionowego,
+            przy której obszar traktowany jest jako siatka (tabela), a nie kolumny
+
+    Returns:
+        Krotka (indeksy bloków w kolejności czytania, numer linii każdego
+        bloku, numer kolumny każdego bloku) - numery według kolejności czytania
+    """
+    order: List[int] = []
+    line_of = [0] * len(positions)
+    column_of = [0] * len(positions)
+    if not positions:
+        return order, line_of, column_of
+    boxes = _boxes(positions)
+    line_count = 0
+    column_count = 0
+
+    def visit(indices: np.ndarray, column: int) -> None:
+        nonlocal line_count, column_count
+        if len(indices) > 1:
+            sections, section_gap = _split(boxes, indices, 1)
+            columns, column_gap = _split(boxes, indices, 0)
+            if len(columns) > 1:
+                lines = group_lines([positions[i] for i in indices])
+                column_ids = np.empty(len(boxes), dtype=np.int64)
+                for number, members in enumerate(columns):
+                    column_ids[members] = number
+                crossing = sum(1 for line in lines if len(set(column_ids[indices[line]])) > 1)
+                # Jedna linia lub siatka - bez podziału na kolumny
+                if len(lines) == 1 or (crossing >= min_grid_lines and crossing * 2 >= len(lines)):
+                    columns = []
+            if len(columns) > 1 and (len(sections) == 1 or column_gap > section_gap):
+                # Pierwsza kolumna kontynuuje kolumnę obszaru, kolejne dostają nowe
+                # numery z licznika - także w podziałach zagnieżdżonych numery są unikalne
+                for number, members in enumerate(columns):
+                    if number:
+                        column_count += 1
+                    visit(members, column_count if number else column)
+                return
+            if len(sections) > 1:
+                for section in sections:
+                    visit(section, column)
+                return
+        for line in group_lines([positions[i] for i in indices]):
+            for i in indices[line]:
+                order.append(int(i))
+                line_of[i] = line_count
+                column_of[i] = column
+            line_count += 1
+
+    visit(np.arange(len(positions)), 0)
+    return order, line_of, column_of
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Spatial Index Module
+Indeks przestrzenny prostokątów (siatka) i scalanie nakładających się bloków
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class GridIndex:
+    """
+    Indeks prostokątów na regularnej siatce
+
+    Każdy prostokąt jest zapisywany w komórkach, które pokrywa; kandydatami
+    do przecięcia są prostokąty z tych samych komórek. Przy komórce rzędu
+    typowego rozmiaru prostokąta zapytanie dotyczy stałej liczby komórek.
+    """
+
+    def __init__(self, cell_size: int):
+        """
+        Inicjalizacja indeksu
+
+        Args:
+            cell_size: Bok komórki siatki w pikselach
+        """
+        self.cell_size = max(1, int(cell_size))
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def _cells_of(self, box) -> List[Tuple[int, int]]:
+        x1, y1, x2, y2 = (int(v) // self.cell_size for v in box)
+        return [(cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1)]
+
+    def insert(self, item: int, box) -> None:
+        """
+        Dodaje prostokąt (x1, y1, x2, y2) o identyfikatorze item
+        """
+        for cell in self._cells_of(box):
+            self._cells[cell].append(item)
+
+    def candidates(self, box) -> set:
+        """
+        Zwraca identyfikatory prostokątów z komórek pokrywanych przez box
+        """
+        found = set()
+        for cell in self._cells_of(box):
+            found.update(self._cells.get(cell, ()))
+        return found
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def merge_boxes(boxes: np.ndarray, gap: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scala prostokąty nakładające się, zawarte w sobie lub odległe o najwyżej gap pikseli
+
+    Pary kandydatów pochodzą z indeksu siatkowego, a grupy łączy struktura
+    union-find. Prostokąt otaczający scaloną grupę może nachodzić na kolejne
+    prostokąty, więc scalanie jest powtarzane do ustalenia się wyniku.
+
+    Args:
+        boxes: Tablica Nx4 prostokątów (x1, y1, x2, y2), krawędź prawa i dolna wyłączna
+        gap: Maksymalny odstęp prostokątów uznawanych za przylegające
+
+    Returns:
+        Krotka (scalone prostokąty Mx4, indeks grupy każdego prostokąta wejściowego)
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    groups = np.arange(len(boxes))
+    while len(boxes) > 1:
+        sizes = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+        index = GridIndex(np.median(sizes) + gap)
+        expanded = boxes + np.array([-gap, -gap, gap, gap])
+        parent = list(range(len(boxes)))
+        for i, box in enumerate(expanded):
+            for j in index.candidates(box):
+                a, b = expanded[i], boxes[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    root_i, root_j = _find(parent, i), _find(parent, j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+            index.insert(i, boxes[i])
+
+        roots = np.array([_find(parent, i) for i in range(len(boxes))])
+        if len(np.unique(roots)) == len(boxes):
+            break
+        # Numeracja grup w kolejności pierwszego prostokątu grupy
+        _, first, labels = np.unique(roots, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        labels = np.argsort(order)[labels]
+        merged = np.empty((len(order), 4), dtype=np.int64)
+        merged[:, :2] = np.iinfo(np.int64).max
+        merged[:, 2:] = np.iinfo(np.int64).min
+        np.minimum.at(merged[:, 0], labels, boxes[:, 0])
+        np.minimum.at(merged[:, 1], labels, boxes[:, 1])
+        np.maximum.at(merged[:, 2], labels, boxes[:, 2])
+        np.maximum.at(merged[:, 3], labels, boxes[:, 3])
+        boxes, groups = merged, labels[groups]
+    return boxes, groups
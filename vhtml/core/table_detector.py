@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Table Detector Module
+Wykrywanie tabel z linii poziomych i pionowych oraz siatki komórek (wiersze x kolumny)
+"""
+
+from typing import Dict, List
+import numpy as np
+import cv2
+
+
+class TableDetector:
+    """
+    Detektor tabel oparty na morfologicznym wyodrębnianiu linii
+
+    Otwarcie morfologiczne długim poziomym i pionowym elementem strukturalnym
+    zostawia na zbinaryzowanej stronie tylko linie tabel. Obszar linii
+    z co najmniej dwoma wierszami komórek (lub jednym wierszem w pełnej
+    siatce linii poziomych i pionowych) jest tabelą; granice wierszy to
+    linie poziome, granice kolumn - linie pionowe, a przy ich braku (tabele
+    pozycji faktur rysowane tylko liniami poziomymi) pionowe pasy bez tekstu.
+    Wymiary podane są dla 300 DPI.
+    """
+
+    def __init__(self):
+        # Minimalna długość linii tabeli (px w 300 DPI)
+        self.min_line_length = 120
+        # Minimalny rozmiar tabeli (px w 300 DPI)
+        self.min_table_width = 300
+        self.min_table_height = 60
+        # Maksymalny odstęp linii poziomych jednej tabeli (wysokość wiersza, px w 300 DPI)
+        self.max_row_gap = 100
+        # Minimalna szerokość pustego pasa rozdzielającego kolumny bez linii (px w 300 DPI)
+        self.min_gutter = 25
+
+    def line_mask(self, binary: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """
+        Wyodrębnia linie poziome i pionowe
+
+        Args:
+            binary: Obraz zbinaryzowany (tusz = 255, tło = 0)
+            scale: Rozdzielczość obrazu względem 300 DPI
+
+        Returns:
+            Maska linii (linia = 255)
+        """
+        return cv2.bitwise_or(*self._lines(binary, scale))
+
+    def _lines(self, binary: np.ndarray, scale: float):
+        length = max(3, round(self.min_line_length * scale))
+        horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                      cv2.getStructuringElement(cv2.MORPH_RECT, (length, 1)))
+        vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                    cv2.getStructuringElement(cv2.MORPH_RECT, (1, length)))
+        return horizontal, vertical
+
+    def erase_lines(self, gray: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """
+        Usuwa linie tabeli z obrazu w skali szarości (przed OCR komórek)
+
+        Args:
+            gray: Obraz w skali szarości (tekst ciemny na jasnym tle)
+            scale: Rozdzielczość obrazu względem 300 DPI
+
+        Returns:
+            Kopia obrazu z liniami zamienionymi na tło
+        """
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        mask = cv2.dilate(self.line_mask(binary, scale), np.ones((3, 3), np.uint8))
+        cleaned = gray.copy()
+        cleaned[mask > 0] = 255
+        return cleaned
+
+    def detect(self, binary: np.ndarray, scale: float = 1.0) -> List[Dict]:
+        """
+        Wykrywa tabele i ich siatkę komórek
+
+        Args:
+            binary: Strona zbinaryzowana (tusz = 255, tło = 0), np. PageContext.binary
+            scale: Rozdzielczość strony względem 300 DPI
+
+        Returns:
+            Lista tabel: {'position', 'row_bounds', 'column_bounds', 'cells'},
+            gdzie cells to wiersze list pozycji komórek (piksele strony)
+        """
+        horizontal, vertical = self._lines(binary, scale)
+        lines = cv2.bitwise_or(horizontal, vertical)
+        # Linie jednej tabeli łączone w obszar - także linie poziome odległe o wysokość wiersza
+        close = max(3, round(10 * scale))
+        row_gap = max(close, round(self.max_row_gap * scale))
+        grid = cv2.dilate(lines, cv2.getStructuringElement(cv2.MORPH_RECT, (close, row_gap)))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(grid, connectivity=8)
+
+        tables = []
+        for gx, gy, gw, gh, _ in stats[1:]:
+            # Obszar zawężony do samych linii (bez marginesu dylatacji)
+            line_rows = np.flatnonzero(lines[gy:gy + gh, gx:gx + gw].any(axis=1))
+            line_cols = np.flatnonzero(lines[gy:gy + gh, gx:gx + gw].any(axis=0))
+            if not line_rows.size:
+                continue
+            x, y = gx + int(line_cols[0]), gy + int(line_rows[0])
+            w, h = int(line_cols[-1] - line_cols[0]) + 1, int(line_rows[-1] - line_rows[0]) + 1
+            if w < self.min_table_width * scale or h < self.min_table_height * scale:
+                continue
+            region = (slice(y, y + h), slice(x, x + w))
+            rows = self._line_positions(horizontal[region], axis=1, min_fill=0.5)
+            columns = self._line_positions(vertical[region], axis=0, min_fill=0.5)
+            # Co najmniej dwa wiersze komórek albo pełna siatka z liniami pionowymi
+            if len(rows) < 2 or (len(rows) < 3 and len(columns) < 3):
+                continue
+            if len(columns) < 3:
+                # Brak linii pionowych - kolumny rozdzielone pustymi pasami tekstu
+                near_lines = cv2.dilate(lines[region], np.ones((3, 3), np.uint8))
+                ink = cv2.bitwise_and(binary[region], cv2.bitwise_not(near_lines))
+                columns = self._gutters(ink, max(1, round(self.min_gutter * scale)))
+            row_bounds = [int(y + r) for r in rows]
+            column_bounds = [int(x + c) for c in columns]
+            tables.append({
+                'position': {'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)},
+                'row_bounds': row_bounds,
+                'column_bounds': column_bounds,
+                'cells': [[{
+                    'x': left, 'y': top, 'width': right - left, 'height': bottom - top
+                } for left, right in zip(column_bounds[:-1], column_bounds[1:])]
+                    for top, bottom in zip(row_bounds[:-1], row_bounds[1:])]
+            })
+        return tables
+
+    @staticmethod
+    def _line_positions(mask: np.ndarray, axis: int, min_fill: float) -> List[int]:
+        """Środki linii: ciągi wierszy (axis=1) lub kolumn (axis=0) maski wypełnione w min_fill"""
+        profile = (mask > 0).mean(axis=axis)
+        filled = np.flatnonzero(profile >= min_fill * profile.max()) if profile.max() > 0 else np.array([], int)
+        if not filled.size:
+            return []
+        runs = np.split(filled, np.flatnonzero(np.diff(filled) > 1) + 1)
+        return [int(run.mean()) for run in runs]
+
+    @staticmethod
+    def _gutters(ink: np.ndarray, min_gutter: int) -> List[int]:
+        """Granice kolumn: krawędzie obszaru i środki pustych pasów o szerokości >= min_gutter"""
+        width = ink.shape[1]
+        empty = np.flatnonzero(~(ink > 0).any(axis=0))
+        bounds = [0]
+        if empty.size:
+            for run in np.split(empty, np.flatnonzero(np.diff(empty) > 1) + 1):
+                if len(run) >= min_gutter and run[0] > 0 and run[-1] < width - 1:
+                    bounds.append(int(run.mean()))
+        bounds.append(width)
+        return bounds
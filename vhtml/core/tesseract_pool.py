@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tesseract Pool Module
+Pula zainicjalizowanych uchwytów Tesseract API (tesserocr) współdzielona między wątkami
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # opcjonalna zależność - bez niej OCREngine używa pytesseract
+    tesserocr = None
+
+
+def tesserocr_available() -> bool:
+    """Czy biblioteka tesserocr (wiązanie libtesseract) jest dostępna"""
+    return tesserocr is not None
+
+
+class TesseractPool:
+    """
+    Pula uchwytów PyTessBaseAPI działających w procesie
+
+    Każdy uchwyt ładuje modele językowe raz, przy utworzeniu, a obrazy
+    przekazywane są z pamięci - bez uruchamiania procesu tesseract i bez
+    plików tymczasowych. Uchwyt nie jest bezpieczny wątkowo, więc w danej
+    chwili używa go jeden wątek; uchwyty tworzone są leniwie, najwyżej
+    `size` sztuk, a przy ich braku wątek czeka na zwolnienie.
+    """
+
+    def __init__(self, lang: str = 'pol+eng+deu', size: Optional[int] = None,
+                 tessdata_path: Optional[str] = None, psm: int = 3):
+        """
+        Inicjalizacja puli
+
+        Args:
+            lang: Języki Tesseract (np. 'pol+eng+deu')
+            size: Maksymalna liczba uchwytów (domyślnie liczba rdzeni)
+            tessdata_path: Katalog tessdata (domyślnie ścieżka wkompilowana w libtesseract)
+            psm: Tryb segmentacji strony Tesseract (3 - automatyczny)
+        """
+        if tesserocr is None:
+            raise ImportError("Pula Tesseract wymaga pakietu tesserocr (pip install tesserocr)")
+        self.lang = lang
+        self.size = max(1, size or os.cpu_count() or 1)
+        self.tessdata_path = tessdata_path
+        self.psm = psm
+        self._idle: queue.Queue = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_handle(self) -> 'tesserocr.PyTessBaseAPI':
+        kwargs = {'lang': self.lang, 'psm': self.psm}
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def acquire(self) -> Iterator['tesserocr.PyTessBaseAPI']:
+        """
+        Wypożycza uchwyt Tesseract API na czas bloku `with`
+
+        Yields:
+            Uchwyt PyTessBaseAPI używany wyłącznie przez bieżący wątek
+        """
+        if self._closed:
+            raise RuntimeError("Pula Tesseract została zamknięta")
+        try:
+            handle = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    handle = self._create_handle()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                handle = self._idle.get()
+        try:
+            yield handle
+        finally:
+            handle.Clear()
+            self._idle.put(handle)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        """
+        Rozpoznaje tekst obrazu
+
+        Args:
+            image: Obraz do przetworzenia
+
+        Returns:
+            Rozpoznany tekst
+        """
+        with self.acquire() as api:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+
+    def image_to_data(self, image: Image.Image) -> Dict[str, List]:
+        """
+        Rozpoznaje słowa obrazu wraz z położeniem i pewnością
+
+        Args:
+            image: Obraz do przetworzenia
+
+        Returns:
+            Słownik list w układzie pytesseract.Output.DICT (text, left, top,
+            width, height, conf, block_num, par_num, line_num)
+        """
+        data = {key: [] for key in ('text', 'left', 'top', 'width', 'height', 'conf',
+                                    'block_num', 'par_num', 'line_num')}
+        word_level = tesserocr.RIL.WORD
+        block_num = par_num = line_num = 0
+
+        with self.acquire() as api:
+            api.SetImage(image)
+            api.Recognize()
+            iterator = api.GetIterator()
+            if iterator is None:
+                return data
+            for word in tesserocr.iterate_level(iterator, word_level):
+                # Numeracja bloków, akapitów i linii jak w wyjściu TSV Tesseract
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block_num, par_num, line_num = block_num + 1, 0, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par_num, line_num = par_num + 1, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line_num += 1
+
+                box = word.BoundingBox(word_level)
+                if box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                data['text'].append(word.GetUTF8Text(word_level) or '')
+                data['left'].append(x1)
+                data['top'].append(y1)
+                data['width'].append(x2 - x1)
+                data['height'].append(y2 - y1)
+                data['conf'].append(word.Confidence(word_level))
+                data['block_num'].append(block_num)
+                data['par_num'].append(par_num)
+                data['line_num'].append(line_num)
+        return data
+
+    def close(self) -> None:
+        """Zwalnia wszystkie bezczynne uchwyty"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().End()
+            except queue.Empty:
+                break
@@ -6,30 +6,161 @@ Główny moduł systemu do konwersji dokumentów do HTML z wykorzystaniem OCR
 
 import os
 import sys
+import inspect
 import argparse
 import json
-from typing import List, Dict, Optional, Tuple, Any
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Any
 import webbrowser
 from pathlib import Path
 from datetime import datetime
+import numpy as np
+from PIL import Image
 
 from vhtml.core.pdf_processor import PDFProcessor
+from vhtml.core.page_cache import PageCache
+from vhtml.core.page_context import PageContext
 from vhtml.core.layout_analyzer import LayoutAnalyzer, Block, DocumentMetadata
 from vhtml.core.ocr_engine import OCREngine
+from vhtml.core.ocr_cache import OCRCache
+from vhtml.core.block_executor import BlockOCRExecutor
+from vhtml.core.batch_journal import BatchJournal
+from vhtml.core.pipeline import StagePipeline
+from vhtml.core.block_classifier import BlockContentClassifier
+from vhtml.core.table_detector import TableDetector
+from vhtml.core.layout_index import LayoutIndex
 from vhtml.core.html_generator import HTMLGenerator
 from vhtml.utils.logging_utils import logger as vhtml_logger
 
 
+OCR_MODES = ('page', 'block')
+# 'auto' - wykrycie języka dokumentu z próbki, 'multi' - zawsze wszystkie języki
+OCR_LANGUAGES = ('auto', 'multi', 'pl', 'en', 'de')
+# 'cascade' - Tesseract dla wszystkich bloków, EasyOCR tylko dla niepewnych
+OCR_ENGINES = ('tesseract', 'easyocr', 'cascade')
+
+
 class DocumentAnalyzer:
     """Główna klasa systemu analizy dokumentów"""
 
-    def __init__(self):
-        """Inicjalizacja komponentów systemu"""
-        self.pdf_processor = PDFProcessor()
+    def __init__(self, use_text_layer: bool = False, workers: int = 1,
+                 cache_dir: Optional[str] = None, cache_size_mb: int = 2048,
+                 denoise: str = 'adaptive', page_threads: int = 2,
+                 layout_dpi: Optional[int] = None, ocr_mode: str = 'page',
+                 tesseract_backend: str = 'pytesseract', max_threads: Optional[int] = None,
+                 ocr_language: str = 'auto', ocr_cache_dir: Optional[str] = None,
+                 ocr_cache_memory: int = 4096, ocr_engine_name: str = 'tesseract',
+                 cascade_confidence: Optional[float] = None, block_filter: bool = True,
+                 detect_tables: bool = True, layout_index_dir: Optional[str] = None,
+                 render_workers: int = 1, preprocess_workers: int = 1, pipeline_queue_size: int = 2):
+        """
+        Inicjalizacja komponentów systemu
+        
+        Args:
+            use_text_layer: Czy budować bloki z warstwy tekstowej PDF zamiast OCR,
+                jeśli strona ją posiada (dokumenty generowane cyfrowo)
+            workers: Liczba procesów renderujących i przetwarzających strony równolegle
+            cache_dir: Katalog cache wyrenderowanych i przetworzonych stron (None - bez cache)
+            cache_size_mb: Limit rozmiaru cache stron w MB
+            denoise: Strategia redukcji szumów stron ('adaptive', 'nlmeans' lub 'none')
+            page_threads: Liczba wątków analizujących strony (układ i OCR) równolegle
+            layout_dpi: Rozdzielczość stron do wykrywania bloków (np. 96); do OCR
+                renderowane są wtedy tylko obszary bloków w pełnej rozdzielczości.
+                None - wykrywanie i OCR na tej samej stronie w pełnej rozdzielczości
+            ocr_mode: 'page' - jeden przebieg Tesseract na stronę, słowa przypisywane
+                do bloków; 'block' - osobne wywołanie OCR dla każdego bloku
+            tesseract_backend: 'pytesseract' (proces na każde wywołanie) lub 'tesserocr'
+                (pula zainicjalizowanych uchwytów Tesseract API w procesie)
+            max_threads: Łączny limit wątków analizy (strony + OCR bloków); domyślnie
+                liczba rdzeni. Pula OCR bloków dostaje wątki pozostałe po wątkach stron
+            ocr_language: Język OCR: 'auto' (wykryty raz dla dokumentu z taniej próbki,
+                bloki o niskiej pewności rozpoznawane ponownie wszystkimi językami),
+                'multi' (zawsze pol+eng+deu) lub kod języka ('pl', 'en', 'de')
+            ocr_cache_dir: Katalog trwałego cache wyników OCR bloków, współdzielonego
+                między dokumentami i uruchomieniami (None - tylko cache w pamięci)
+            ocr_cache_memory: Liczba wyników OCR bloków w pamięci (0 i brak
+                ocr_cache_dir - cache wyłączony)
+            ocr_engine_name: Silnik OCR: 'tesseract', 'easyocr' lub 'cascade' (Tesseract,
+                a bloki o niskiej pewności lub podejrzanie małej liczbie znaków - EasyOCR)
+            cascade_confidence: Próg pewności eskalacji w trybie 'cascade'
+                (None - domyślny próg silnika)
+            block_filter: Czy pomijać OCR bloków pustych i graficznych (linie, ramki,
+                pieczątki, logotypy) rozpoznanych po gęstości tuszu i spójnych składowych
+            detect_tables: Czy wykrywać tabele (linie) i rozpoznawać je komórkami -
+                jednym przebiegiem OCR na tabelę, z wierszami w metadanych dokumentu
+            layout_index_dir: Katalog indeksu szablonów układu (dostawców). Strona pasująca
+                do szablonu pomija analizę układu, a do OCR trafiają tylko bloki różniące
+                się od szablonu (None - bez indeksu)
+            render_workers: Liczba wątków etapu renderowania stron w potoku. Przyspiesza
+                tylko backend poppler (podprocesy pdftoppm) - wywołania PyMuPDF są
+                szeregowane wspólną blokadą (FITZ_LOCK) i trzymają GIL
+            preprocess_workers: Liczba wątków etapu przetwarzania wstępnego w potoku
+                (przy workers > 1 oba etapy wykonują procesy robocze)
+            pipeline_queue_size: Pojemność kolejki przed każdym etapem potoku stron
+        """
+        self._check_options(ocr_mode, ocr_language, ocr_engine_name)
+        self.use_text_layer = use_text_layer
+        self.page_threads = max(1, page_threads)
+        self.render_workers = max(1, render_workers)
+        self.preprocess_workers = max(1, preprocess_workers)
+        self.pipeline_queue_size = max(1, pipeline_queue_size)
+        # Wątki stron i OCR bloków razem nie przekraczają limitu (brak nadsubskrypcji rdzeni)
+        max_threads = max_threads or os.cpu_count() or 1
+        self.ocr_threads = max(1, max_threads - self.page_threads)
+        self.ocr_mode = ocr_mode
+        self.ocr_language = ocr_language
+        # Rozdzielczość pierwszej strony rozpoznawanej w celu wykrycia języka
+        self.language_sample_dpi = 150
+        page_cache = PageCache(cache_dir, cache_size_mb * 1024 ** 2) if cache_dir else None
+        self.pdf_processor = PDFProcessor(workers=workers, cache=page_cache, denoise=denoise)
+        # Strona w niskiej rozdzielczości nie jest prostowana - pozycje bloków muszą
+        # odpowiadać współrzędnym PDF, z których renderowane są fragmenty do OCR
+        self.layout_processor = self.pdf_processor
+        if layout_dpi:
+            self.layout_processor = PDFProcessor(dpi=layout_dpi, workers=workers, cache=page_cache,
+                                                 denoise=denoise, deskew=False)
         self.layout_analyzer = LayoutAnalyzer()
-        self.ocr_engine = OCREngine()
+        self.block_classifier = BlockContentClassifier() if block_filter else None
+        self.table_detector = TableDetector() if detect_tables else None
+        self.layout_index = LayoutIndex(layout_index_dir) if layout_index_dir else None
+        ocr_cache = None
+        if ocr_cache_dir or ocr_cache_memory > 0:
+            ocr_cache = OCRCache(ocr_cache_dir, memory_entries=ocr_cache_memory)
+        self.ocr_engine = OCREngine(use_easyocr=ocr_engine_name == 'easyocr',
+                                    tesseract_backend=tesseract_backend, cache=ocr_cache,
+                                    cascade=ocr_engine_name == 'cascade')
+        if cascade_confidence is not None:
+            self.ocr_engine.cascade_confidence = cascade_confidence
+        # Szablon układu przechowuje wyniki OCR stałych pól - jest ważny tylko przy
+        # tych samych ustawieniach analizy i wszystkich ustawieniach wpływających na tekst
+        self.layout_settings = {
+            'layout_dpi': self.layout_processor.dpi,
+            'denoise': denoise,
+            'block_filter': block_filter,
+            'detect_tables': detect_tables,
+            'ocr_engine': ocr_engine_name,
+            'ocr_language': ocr_language,
+            'ocr_mode': ocr_mode,
+            'tesseract_backend': tesseract_backend,
+            'cascade_confidence': self.ocr_engine.cascade_confidence if self.ocr_engine.cascade else None,
+            'psm': self.ocr_engine.psm
+        }
         self.html_generator = HTMLGenerator()
     
+    @staticmethod
+    def _check_options(ocr_mode: str = 'page', ocr_language: str = 'auto',
+                       ocr_engine_name: str = 'tesseract') -> None:
+        """Sprawdza wartości opcji wyboru (ValueError przy nieznanej wartości)"""
+        if ocr_mode not in OCR_MODES:
+            raise ValueError(f"Nieznany tryb OCR: {ocr_mode}")
+        if ocr_language not in OCR_LANGUAGES:
+            raise ValueError(f"Nieznany język OCR: {ocr_language}")
+        if ocr_engine_name not in OCR_ENGINES:
+            raise ValueError(f"Nieznany silnik OCR: {ocr_engine_name}")
+    
     def analyze_document(self, pdf_path: str, output_dir: str = "output") -> str:
         """
         Analizuje dokument PDF i generuje HTML
@@ -50,101 +181,238 @@ class DocumentAnalyzer:
         processing_steps = {}
         
         try:
-            # Krok 1: Konwersja PDF do obrazów
-            doc_logger.info("1. Converting PDF to images...")
-            step_start = datetime.now()
-            images = self.pdf_processor.pdf_to_images(pdf_path)
-            if not images:
+            page_count = self.pdf_processor.page_count(pdf_path)
+            if not page_count:
                 raise ValueError("Failed to convert PDF to images")
             
-            processing_steps['pdf_conversion'] = {
-                'status': 'success',
-                'pages': len(images),
-                'duration_seconds': (datetime.now() - step_start).total_seconds()
-            }
-            doc_logger.info(f"Converted {len(images)} pages")
+            # Dokumenty generowane cyfrowo mają warstwę tekstową - wtedy bloki
+            # budujemy bezpośrednio z PDF, a OCR dotyczy tylko osadzonych obrazów
+            text_layers = {}
+            if self.use_text_layer:
+                for page_index in range(page_count):
+                    text_blocks = self.pdf_processor.extract_text_blocks(pdf_path, page_index)
+                    if text_blocks is not None:
+                        text_layers[page_index] = text_blocks
+                doc_logger.info(f"Text layer usable on {len(text_layers)}/{page_count} pages")
             
-            # Krok 2: Przetwarzanie wstępne obrazów
-            doc_logger.info("2. Preprocessing images...")
+            # Język dokumentu wykrywany raz - dalszy OCR używa jednego modelu
             step_start = datetime.now()
-            processed_images = [self.pdf_processor.preprocess_image(img) for img in images]
-            processing_steps['image_preprocessing'] = {
+            document_language, language_source = self._detect_document_language(pdf_path, text_layers)
+            fallbacks_before = self.ocr_engine.fallbacks
+            ocr_cache_before = self.ocr_engine.cache.stats() if self.ocr_engine.cache else None
+            cascade_before = self.ocr_engine.cascade_stats()
+            doc_logger.info(f"Document language: {document_language or 'multi'} ({language_source})")
+            language_seconds = (datetime.now() - step_start).total_seconds()
+            
+            # Krok 1 i 2: Konwersja PDF i przetwarzanie wstępne stron.
+            # Strony są renderowane i przetwarzane strumieniowo (opcjonalnie
+            # w wielu procesach), więc zużycie pamięci nie rośnie z liczbą stron.
+            doc_logger.info("1. Converting PDF to images...")
+            doc_logger.info("2. Preprocessing images...")
+            # Krok 3 i 4: Analiza układu i OCR - każda strona osobno, wiele stron naraz
+            doc_logger.info("3. Analyzing document layout...")
+            doc_logger.info("4. Performing OCR and text analysis...")
+            conversion_seconds = 0.0
+            preprocessing_seconds = 0.0
+            page_preprocessing = []
+            cache_stats = {'hits': 0, 'misses': 0}
+            # Miniatury bloków wycinane są podczas analizy strony - obrazy stron
+            # są zwalniane zaraz po niej
+            page_results = []
+            analysis_start = datetime.now()
+            
+            # Strony przechodzą przez potok etapów - strona N+1 jest renderowana,
+            # gdy strona N jest odszumiana, a strona N-1 analizowana
+            with BlockOCRExecutor(self.ocr_threads) as block_executor:
+                pipeline, page_items = self._page_pipeline(
+                    pdf_path, page_count, text_layers, document_language, block_executor, doc_logger
+                )
+                for page_index, timings, page_result in pipeline.run(page_items):
+                    conversion_seconds += timings['render_seconds']
+                    preprocessing_seconds += timings['preprocess_seconds']
+                    cache_stats['hits'] += timings.get('cache_hits', 0)
+                    cache_stats['misses'] += timings.get('cache_misses', 0)
+                    if page_index not in text_layers:
+                        page_preprocessing.append({
+                            'page': page_index + 1,
+                            'denoise_method': timings.get('denoise_method', 'cached'),
+                            'noise_sigma': timings.get('noise_sigma'),
+                            'denoise_seconds': timings.get('denoise_seconds', 0.0),
+                            'duration_seconds': timings['preprocess_seconds']
+                        })
+                    page_results.append(page_result)
+            
+            pipeline_stages = pipeline.metrics()
+            processing_steps['pipeline'] = {
                 'status': 'success',
-                'duration_seconds': (datetime.now() - step_start).total_seconds()
+                'mode': 'processes' if self.layout_processor.workers > 1 else 'threads',
+                'queue_size': self.pipeline_queue_size,
+                'stages': pipeline_stages,
+                'duration_seconds': (datetime.now() - analysis_start).total_seconds()
             }
+            for name, stage in pipeline_stages.items():
+                doc_logger.info(f"Pipeline stage {name}: {stage['items']} pages, {stage['workers']} workers, "
+                                f"busy {stage['busy_seconds']:.2f}s, waiting for input "
+                                f"{stage['input_wait_seconds']:.2f}s, blocked {stage['output_wait_seconds']:.2f}s")
             
-            # Krok 3: Analiza układu i segmentacja bloków
-            doc_logger.info("3. Analyzing document layout...")
-            step_start = datetime.now()
-            layout_type, blocks = self.layout_analyzer.analyze_layout(processed_images[0])
-            processing_steps['layout_analysis'] = {
+            processing_steps['pdf_conversion'] = {
                 'status': 'success',
-                'layout_type': layout_type,
-                'blocks_found': len(blocks),
-                'duration_seconds': (datetime.now() - step_start).total_seconds()
+                'pages': page_count,
+                'duration_seconds': conversion_seconds
             }
-            doc_logger.info(f"Detected layout: {layout_type} with {len(blocks)} blocks")
-        
-            # Krok 4: OCR i analiza tekstu
-            doc_logger.info("4. Performing OCR and text analysis...")
-            step_start = datetime.now()
+            processing_steps['image_preprocessing'] = {
+                'status': 'success',
+                'workers': self.pdf_processor.workers,
+                'denoise': self.pdf_processor.denoise,
+                'pages': page_preprocessing,
+                'duration_seconds': preprocessing_seconds
+            }
+            if self.pdf_processor.cache is not None:
+                processing_steps['page_cache'] = {
+                    'status': 'success',
+                    'cache_dir': self.pdf_processor.cache.cache_dir,
+                    **cache_stats
+                }
+                doc_logger.info(f"Page cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            doc_logger.info(f"Converted {page_count} pages")
+            
+            # Zebranie wyników stron w kolejności - identyfikatory i typy bloków
+            # nadawane są według indeksu bloku w całym dokumencie
             document_blocks = []
+            document_tables = []
+            pages = []
             ocr_stats = {
-                'total_blocks': len(blocks),
+                'text_layer_blocks': 0,
                 'languages': {},
                 'confidence_scores': []
             }
-            
-            for i, block in enumerate(blocks):
-                block_start = datetime.now()
-                block_log = f"Processing block {i+1}/{len(blocks)}"
-                doc_logger.info(f"{block_log}...")
-                
-                try:
-                    # Extract text from block using OCR
-                    text, language, confidence = self.ocr_engine.extract_text_from_block(
-                        processed_images[0], block['position']
-                    )
-                    
-                    # Update OCR statistics
-                    ocr_stats['confidence_scores'].append(confidence)
-                    if language in ocr_stats['languages']:
-                        ocr_stats['languages'][language] += 1
-                    else:
-                        ocr_stats['languages'][language] = 1
-                    
-                    # Klasyfikacja typu bloku
-                    block_type = self._classify_block_type(text, i, layout_type)
-                    
-                    # Analiza formatowania
-                    formatting = self._analyze_formatting(text)
-                    
-                    # Tworzenie obiektu bloku
-                    document_blocks.append(Block(
-                        id=f"block_{i+1}",
-                        type=block_type,
+            for page in page_results:
+                page_blocks = []
+                for block in page['blocks']:
+                    block_index = len(document_blocks)
+                    document_block = Block(
+                        id=f"block_{block_index + 1}",
+                        type=block.get('content_type') or self._classify_block_type(
+                            block['text'], block_index, page['layout_type']),
                         position=block['position'],
-                        content=text,
-                        language=language,
-                        confidence=confidence,
-                        formatting=formatting
-                    ))
-                    
-                    block_time = (datetime.now() - block_start).total_seconds()
-                    doc_logger.debug(f"{block_log} completed in {block_time:.2f}s (confidence: {confidence:.2f})")
-                    
-                except Exception as e:
-                    doc_logger.error(f"Error processing block {i+1}: {str(e)}", exc_info=True)
-                    raise
+                        content=block['text'],
+                        language=block['language'],
+                        confidence=block['confidence'],
+                        formatting=block['formatting'],
+                        image_data=block.get('image_data', ""),
+                        page=page['number']
+                    )
+                    document_blocks.append(document_block)
+                    page_blocks.append(document_block)
+                    if block.get('content_type') in ('blank', 'graphic'):
+                        continue
+                    ocr_stats['confidence_scores'].append(block['confidence'])
+                    ocr_stats['languages'][block['language']] = ocr_stats['languages'].get(block['language'], 0) + 1
+                ocr_stats['text_layer_blocks'] += page['text_layer_blocks']
+                for table in page['tables']:
+                    document_tables.append({'id': f"table_{len(document_tables) + 1}", 'page': page['number'], **table})
+                pages.append({
+                    'number': page['number'],
+                    'layout': page['layout_type'],
+                    'blocks': [block.to_dict() for block in page_blocks]
+                })
+            
+            layout_type = page_results[0]['layout_type']
+            processing_steps['layout_analysis'] = {
+                'status': 'success',
+                'layout_type': layout_type,
+                'layout_dpi': self.layout_processor.dpi,
+                'blocks_found': len(document_blocks),
+                'pages': [{
+                    'page': page['number'],
+                    'source': page['source'],
+                    'layout_type': page['layout_type'],
+                    'blocks_found': len(page['blocks']),
+                    'skipped_blocks': page['skipped_blocks'],
+                    'template_id': page['template_id'],
+                    'template_matched': page['template_matched'],
+                    'rasterized_pixels': page['rasterized_pixels'],
+                    'duration_seconds': page['layout_seconds']
+                } for page in page_results],
+                'duration_seconds': sum(page['layout_seconds'] for page in page_results)
+            }
+            doc_logger.info(f"Detected layout: {layout_type} with {len(document_blocks)} blocks "
+                            f"on {len(page_results)} pages")
             
+            skipped_blocks = sum(sum(page['skipped_blocks'].values()) for page in page_results)
+            reused_blocks = sum(page['reused_blocks'] for page in page_results)
             processing_steps['ocr_processing'] = {
                 'status': 'success',
                 'blocks_processed': len(document_blocks),
+                'text_layer_blocks': ocr_stats['text_layer_blocks'],
+                'skipped_blocks': skipped_blocks,
+                'template_blocks': reused_blocks,
+                'ocr_blocks': len(document_blocks) - ocr_stats['text_layer_blocks'] - skipped_blocks - reused_blocks,
+                'failed_blocks': sum(page['failed_blocks'] for page in page_results),
+                'ocr_threads': self.ocr_threads,
+                'page_ocr_pages': sum(1 for page in page_results if page['ocr_mode'] == 'page'),
+                'batch_ocr_pages': sum(1 for page in page_results if page['ocr_mode'] == 'batch'),
+                'tables': len(document_tables),
+                'table_cells': sum(len(row) for table in document_tables for row in table['rows']),
                 'languages_detected': ocr_stats['languages'],
                 'avg_confidence': sum(ocr_stats['confidence_scores']) / len(ocr_stats['confidence_scores']) if ocr_stats['confidence_scores'] else 0,
-                'duration_seconds': (datetime.now() - step_start).total_seconds()
+                'block_seconds': sum(page['block_seconds'] for page in page_results),
+                'duration_seconds': sum(page['ocr_seconds'] for page in page_results)
+            }
+            processing_steps['language_detection'] = {
+                'status': 'success',
+                'language': document_language or 'multi',
+                'source': language_source,
+                'multilanguage_fallbacks': self.ocr_engine.fallbacks - fallbacks_before,
+                'duration_seconds': language_seconds
+            }
+            if ocr_cache_before is not None:
+                ocr_cache_stats = self.ocr_engine.cache.stats()
+                hits = ocr_cache_stats['hits'] - ocr_cache_before['hits']
+                misses = ocr_cache_stats['misses'] - ocr_cache_before['misses']
+                processing_steps['ocr_cache'] = {
+                    'status': 'success',
+                    'db_path': self.ocr_engine.cache.db_path,
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+                }
+                doc_logger.info(f"OCR cache: {hits} hits, {misses} misses")
+            if self.layout_index is not None:
+                matched_pages = sum(1 for page in page_results if page['template_matched'])
+                processing_steps['layout_index'] = {
+                    'status': 'success',
+                    'db_path': self.layout_index.db_path,
+                    'templates': self.layout_index.stats()['templates'],
+                    'matched_pages': matched_pages,
+                    'new_templates': sum(1 for page in page_results
+                                         if page['template_id'] is not None and not page['template_matched']),
+                    'template_blocks': reused_blocks
+                }
+                doc_logger.info(f"Layout index: {matched_pages}/{len(page_results)} pages matched a template, "
+                                f"{reused_blocks} blocks reused without OCR")
+            if self.ocr_engine.cascade or cascade_before['escalated']:
+                cascade_stats = self.ocr_engine.cascade_stats()
+                processing_steps['ocr_cascade'] = {
+                    'status': 'success',
+                    'confidence_threshold': self.ocr_engine.cascade_confidence,
+                    'min_char_density': self.ocr_engine.cascade_min_char_density,
+                    **{key: value - cascade_before[key] for key, value in cascade_stats.items()}
+                }
+                doc_logger.info(f"OCR cascade: {processing_steps['ocr_cascade']['escalated']} blocks escalated "
+                                f"in {processing_steps['ocr_cascade']['escalation_seconds']:.2f}s")
+            processing_steps['page_analysis'] = {
+                'status': 'success',
+                'threads': self.page_threads,
+                'pages': len(page_results),
+                'duration_seconds': (datetime.now() - analysis_start).total_seconds()
             }
             
+            # Przekształcenia stron (każde wykonywane najwyżej raz na stronę)
+            processing_steps['page_transforms'] = [
+                {'page': page['number'], 'steps': page['steps']} for page in page_results
+            ]
+            
             # Krok 5: Określenie metadanych dokumentu
             doc_logger.info("5. Generating document metadata...")
             step_start = datetime.now()
@@ -152,14 +420,9 @@ class DocumentAnalyzer:
             doc_language = self._determine_document_language(document_blocks)
             doc_type = self._classify_document_type(layout_type, document_blocks)
             
-            # Calculate average confidence
-            avg_confidence = sum(block.confidence for block in document_blocks) / len(document_blocks) if document_blocks else 0
-            
-            # Create pages structure
-            pages = [{
-                'number': i+1,
-                'blocks': [block.to_dict() for block in document_blocks]
-            } for i in range(len(images))]
+            # Calculate average confidence (without skipped blank and graphic blocks)
+            confidence_scores = ocr_stats['confidence_scores']
+            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
             
             metadata = DocumentMetadata(
                 doc_type=doc_type,
@@ -169,7 +432,8 @@ class DocumentAnalyzer:
                 pages=pages,
                 source_file=os.path.basename(pdf_path),
                 processing_time=0,  # Will be updated after processing
-                blocks=document_blocks  # Pass the blocks directly
+                blocks=document_blocks,  # Pass the blocks directly
+                tables=document_tables
             )
             
             processing_steps['metadata_generation'] = {
@@ -183,7 +447,7 @@ class DocumentAnalyzer:
             doc_logger.info("6. Generating HTML output...")
             step_start = datetime.now()
             
-            html_content = self.html_generator.generate_html(metadata, processed_images)
+            html_content = self.html_generator.generate_html(metadata, [])
             
             processing_steps['html_generation'] = {
                 'status': 'success',
@@ -249,6 +513,475 @@ class DocumentAnalyzer:
             doc_logger.error(f"Error processing document: {str(e)}", exc_info=True)
             raise
     
+    def _page_pipeline(self, pdf_path: str, page_count: int, text_layers: Dict[int, List[Dict]],
+                       document_language: Optional[str], block_executor: BlockOCRExecutor,
+                       doc_logger) -> Tuple[StagePipeline, Iterable]:
+        """
+        Buduje potok stron: renderowanie -> przetwarzanie wstępne -> analiza (układ i OCR)
+        
+        Przy workers > 1 renderowanie i przetwarzanie wstępne wykonują procesy
+        robocze (_iter_page_contexts) - źródłem potoku są wtedy gotowe konteksty
+        stron, a potok ma tylko etap analizy.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_count: Liczba stron dokumentu
+            text_layers: Bloki warstwy tekstowej według indeksu strony
+            document_language: Język OCR dokumentu (None - wszystkie języki)
+            block_executor: Wspólna pula wątków OCR bloków
+            doc_logger: Logger dokumentu
+            
+        Returns:
+            Krotka (potok, elementy wejściowe potoku); wynikiem potoku dla strony jest
+            krotka (indeks strony, czasy etapów, wynik analizy)
+        """
+        processor = self.layout_processor
+        
+        def analyze(item: Tuple[int, PageContext, Dict]) -> Tuple[int, Dict, Dict]:
+            page_index, page_context, timings = item
+            result = self._analyze_page(pdf_path, page_context, text_layers.get(page_index),
+                                        document_language, block_executor, doc_logger)
+            return page_index, timings, result
+        
+        analyze_stage = ('analyze', analyze, self.page_threads)
+        if processor.workers > 1:
+            return (StagePipeline([analyze_stage], self.pipeline_queue_size),
+                    self._iter_page_contexts(pdf_path, page_count, text_layers))
+        
+        doc_hash = PageCache.file_hash(pdf_path) if processor.cache is not None else None
+        
+        def render(page_index: int) -> Tuple[int, np.ndarray, bool, Dict]:
+            return (page_index, *processor.load_page(pdf_path, page_index, doc_hash,
+                                                     preprocessed=page_index not in text_layers))
+        
+        def preprocess(item: Tuple[int, np.ndarray, bool, Dict]) -> Tuple[int, PageContext, Dict]:
+            page_index, array, preprocessed, timings = item
+            if page_index in text_layers:
+                # Strona z warstwą tekstową nie wymaga odszumiania ani korekcji
+                return page_index, PageContext(Image.fromarray(array), page_number=page_index + 1), timings
+            if not preprocessed:
+                array, timings = processor.finish_page(array, page_index, timings, doc_hash)
+            page_context = PageContext(Image.fromarray(array), page_number=page_index + 1, denoised=True)
+            page_context.record_step('preprocess', timings['preprocess_seconds'],
+                                     cached=preprocessed, denoise_method=timings.get('denoise_method', 'cached'))
+            return page_index, page_context, timings
+        
+        pipeline = StagePipeline([
+            ('render', render, self.render_workers),
+            ('preprocess', preprocess, self.preprocess_workers),
+            analyze_stage
+        ], self.pipeline_queue_size)
+        return pipeline, range(page_count)
+    
+    def _iter_page_contexts(self, pdf_path: str, page_count: int,
+                            text_layers: Dict[int, List[Dict]]) -> Iterator[Tuple[int, PageContext, Dict]]:
+        """
+        Renderuje strony dokumentu i buduje dla nich konteksty przetwarzania
+        
+        Strony z użyteczną warstwą tekstową są tylko renderowane (na potrzeby
+        wycinków bloków), pozostałe przechodzą pełne przetwarzanie wstępne.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_count: Liczba stron dokumentu
+            text_layers: Bloki warstwy tekstowej według indeksu strony
+            
+        Yields:
+            Krotki (indeks strony, kontekst strony, czasy etapów w sekundach)
+        """
+        ocr_pages = [page_index for page_index in range(page_count) if page_index not in text_layers]
+        processor = self.layout_processor
+        preprocessed = processor.iter_preprocessed_pages(pdf_path, ocr_pages) if ocr_pages else iter(())
+        page_cache = processor.cache
+        doc_hash = PageCache.file_hash(pdf_path) if page_cache is not None and text_layers else None
+        
+        for page_index in range(page_count):
+            if page_index in text_layers:
+                # Strona z warstwą tekstową nie wymaga odszumiania ani korekcji
+                step_start = datetime.now()
+                stats_before = page_cache.stats() if page_cache else None
+                array = next(processor._iter_rendered(pdf_path, page_index, page_index + 1, doc_hash))
+                timings = {
+                    'render_seconds': (datetime.now() - step_start).total_seconds(),
+                    'preprocess_seconds': 0.0
+                }
+                if page_cache:
+                    stats_after = page_cache.stats()
+                    timings['cache_hits'] = stats_after['hits'] - stats_before['hits']
+                    timings['cache_misses'] = stats_after['misses'] - stats_before['misses']
+                yield page_index, PageContext(Image.fromarray(array), page_number=page_index + 1), timings
+            else:
+                page_index, processed, timings = next(preprocessed)
+                # Strona jest już odszumiona - analiza układu i OCR użyją jej bez ponownego odszumiania
+                page_context = PageContext(processed, page_number=page_index + 1, denoised=True)
+                page_context.record_step('preprocess', timings['preprocess_seconds'],
+                                         cached=timings.get('cache_hits', 0) > 0,
+                                         denoise_method=timings.get('denoise_method', 'cached'))
+                yield page_index, page_context, timings
+    
+    def _detect_document_language(self, pdf_path: str,
+                                  text_layers: Dict[int, List[Dict]]) -> Tuple[Optional[str], str]:
+        """
+        Ustala język OCR dokumentu na podstawie taniej próbki
+        
+        Próbką jest tekst warstwy tekstowej (bez OCR), a w jej braku pierwsza
+        strona wyrenderowana w niskiej rozdzielczości i rozpoznana raz
+        wszystkimi językami.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            text_layers: Bloki warstwy tekstowej według indeksu strony
+            
+        Returns:
+            Krotka (kod języka lub None - wszystkie języki, źródło decyzji)
+        """
+        if self.ocr_language == 'multi':
+            return None, 'configured'
+        if self.ocr_language != 'auto':
+            return self.ocr_language, 'configured'
+        
+        if text_layers:
+            first_page = text_layers[min(text_layers)]
+            sample = ' '.join(block['text'] for block in first_page if block.get('source') == 'text_layer')
+            language = self.ocr_engine.detect_document_language(sample)
+            if language:
+                return language, 'text_layer'
+        
+        if self.ocr_engine.use_easyocr:
+            return None, 'easyocr'
+        
+        sample = self.pdf_processor.rasterizer.render_page(pdf_path, 0, self.language_sample_dpi, 'gray')
+        language = self.ocr_engine.detect_document_language(Image.fromarray(sample))
+        return language, 'ocr_sample' if language else 'undetected'
+    
+    def _analyze_page(self, pdf_path: str, page_context: PageContext,
+                      text_blocks: Optional[List[Dict]], document_language: Optional[str],
+                      block_executor: BlockOCRExecutor, doc_logger) -> Dict:
+        """
+        Analiza układu i OCR jednej strony (wywoływana równolegle dla wielu stron)
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_context: Kontekst przetwarzania strony
+            text_blocks: Bloki warstwy tekstowej strony lub None (analiza obrazu)
+            document_language: Język OCR dokumentu (None - wszystkie języki)
+            block_executor: Wspólna pula wątków OCR bloków
+            doc_logger: Logger dokumentu
+            
+        Returns:
+            Wynik strony: układ, bloki (tekst, język, pewność, formatowanie) i czasy
+        """
+        page_number = page_context.page_number
+        layout_dpi = self.layout_processor.dpi
+        scale = self.pdf_processor.dpi / layout_dpi
+        step_start = datetime.now()
+        template = None
+        if text_blocks is None and self.layout_index is not None:
+            template = self.layout_index.match(page_context.gray, page_context.binary, self.layout_settings)
+        tables = []
+        if text_blocks is not None:
+            blocks = self.layout_analyzer.order_blocks(text_blocks)
+            width, height = page_context.size
+            layout_type = self.layout_analyzer._classify_layout(blocks, (round(width * scale), round(height * scale)))
+        elif template is not None:
+            # Znany układ - geometria, typy bloków i tabele z szablonu
+            layout_type, blocks, tables = template['layout_type'], template['blocks'], template['tables']
+            doc_logger.info(f"Page {page_number} matches layout template {template['id']}")
+        else:
+            layout_type, blocks = self.layout_analyzer.analyze_layout(page_context, layout_dpi)
+        
+        # Tabele - bloki leżące w tabeli zastępuje jeden blok tabeli rozpoznawany komórkami
+        if text_blocks is None and template is None and self.table_detector is not None:
+            tables = self.table_detector.detect(page_context.binary, layout_dpi / self.layout_analyzer.reference_dpi)
+            if tables:
+                blocks = self.layout_analyzer.order_blocks(
+                    [block for block in blocks if not self._inside_table(block['position'], tables)]
+                    + [{'position': table['position'], 'type': 'table', 'table': index}
+                       for index, table in enumerate(tables)]
+                )
+                layout_type = self.layout_analyzer._classify_layout(blocks, page_context.size)
+        
+        # Bloki puste i graficzne nie trafiają do OCR - pozostają w wyniku ze swoim typem
+        content_types = ['text'] * len(blocks)
+        if template is not None:
+            content_types = [block['content_type'] for block in blocks]
+        elif text_blocks is None and self.block_classifier is not None and blocks:
+            content_types = self.block_classifier.classify(
+                page_context.binary, [block['position'] for block in blocks],
+                layout_dpi / self.layout_analyzer.reference_dpi
+            )
+        content_types = ['table' if block.get('table') is not None else content_type
+                         for block, content_type in zip(blocks, content_types)]
+        skipped = {i: content_type for i, content_type in enumerate(content_types) if content_type != 'text'}
+        
+        # Bloki szablonu o pikselach identycznych z zapisanymi (stałe pola) - wynik z szablonu
+        digests = [None] * len(blocks)
+        if self.layout_index is not None and text_blocks is None:
+            digests = [LayoutIndex.block_digest(page_context.crop(block['position'], 'binary'))
+                       if content_type == 'text' else None
+                       for block, content_type in zip(blocks, content_types)]
+        reused = {}
+        if template is not None:
+            reused = {i: block['result'] for i, block in enumerate(blocks)
+                      if block['result'] is not None and digests[i] == block['digest']}
+        all_blocks, blocks = blocks, [block for i, block in enumerate(blocks) if i not in skipped and i not in reused]
+        layout_seconds = (datetime.now() - step_start).total_seconds()
+        
+        step_start = datetime.now()
+        # Bloki wykryte w niskiej rozdzielczości - do OCR rasteryzowane są tylko ich obszary
+        regions = None
+        if text_blocks is None and self.layout_processor is not self.pdf_processor and blocks:
+            regions = self.pdf_processor.render_regions(
+                pdf_path, page_number - 1, [block['position'] for block in blocks], layout_dpi
+            )
+        rasterized_pixels = page_context.size[0] * page_context.size[1]
+        rasterized_pixels += sum(crop.size for _, crop in regions or [])
+        
+        # Strona analizowana z obrazu - jeden przebieg OCR dla wszystkich bloków
+        page_ocr = None
+        page_ocr_mode = 'block'
+        if (self.ocr_mode == 'page' and text_blocks is None and regions is None
+                and not self.ocr_engine.use_easyocr):
+            page_ocr = self.ocr_engine.extract_text_from_page(
+                page_context, [block['position'] for block in blocks], document_language
+            )
+            page_ocr_mode = 'page'
+        elif self.ocr_engine.use_easyocr and text_blocks is None and blocks:
+            # EasyOCR - wycinki wszystkich bloków strony rozpoznawane wsadowo
+            if regions is not None:
+                crops = [Image.fromarray(crop) for _, crop in regions]
+            else:
+                crops = [page_context.image.crop((block['position']['x'], block['position']['y'],
+                                                  block['position']['x'] + block['position']['width'],
+                                                  block['position']['y'] + block['position']['height']))
+                         for block in blocks]
+            page_ocr = self.ocr_engine.extract_text_from_images(crops, document_language)
+            page_ocr_mode = 'batch'
+        
+        def recognize(i: int, block: Dict) -> Tuple[Dict, str, str, float]:
+            """Rozpoznaje jeden blok - zwraca (pozycja, tekst, język, pewność)"""
+            if block.get('source') == 'text_layer':
+                # Tekst pochodzi bezpośrednio z PDF - nie ma niepewności OCR
+                text = block['text']
+                return block['position'], text, self.ocr_engine._detect_language(text), 1.0
+            if page_ocr is not None:
+                position = regions[i][0] if regions is not None else block['position']
+                return (position, *page_ocr[i])
+            if regions is not None:
+                position, crop = regions[i]
+                return (position, *self.ocr_engine.extract_text_from_image(Image.fromarray(crop), document_language))
+            # Extract text from block using OCR
+            return (block['position'], *self.ocr_engine.extract_text_from_block(
+                page_context, block['position'], document_language
+            ))
+        
+        # Bloki strony rozpoznawane są równolegle we wspólnej puli; wyniki
+        # wracają w kolejności bloków, a błąd bloku nie przerywa strony
+        doc_logger.info(f"Processing {len(blocks)} blocks on page {page_number}...")
+        outcomes = block_executor.run([partial(recognize, i, block) for i, block in enumerate(blocks)])
+        
+        page_blocks = []
+        text_layer_blocks = 0
+        failed_blocks = 0
+        for i, (block, outcome) in enumerate(zip(blocks, outcomes)):
+            block_log = f"Block {i+1}/{len(blocks)} on page {page_number}"
+            if outcome['error'] is not None:
+                error = outcome['error']
+                doc_logger.error(f"Error processing block {i+1} on page {page_number}: {str(error)}",
+                                 exc_info=(type(error), error, error.__traceback__))
+                failed_blocks += 1
+                position = regions[i][0] if regions is not None else block['position']
+                text, language, confidence = "", "unknown", 0.0
+            else:
+                position, text, language, confidence = outcome['result']
+                if block.get('source') == 'text_layer':
+                    text_layer_blocks += 1
+            
+            # Analiza formatowania
+            formatting = self._analyze_formatting(text)
+            if block.get('source') == 'text_layer':
+                formatting.update(
+                    bold=block['bold'],
+                    italic=block['italic'],
+                    font_size=block['font_size'],
+                    font=block['font']
+                )
+            
+            page_blocks.append({
+                'position': position,
+                'text': text,
+                'language': language,
+                'confidence': confidence,
+                'formatting': formatting
+            })
+            doc_logger.debug(f"{block_log} completed in {outcome['duration_seconds']:.2f}s "
+                             f"(confidence: {confidence:.2f})")
+        
+        # Tabele - każda jednym przebiegiem OCR wszystkich komórek
+        table_outcomes = block_executor.run([
+            partial(self._recognize_table, pdf_path, page_context, table, document_language) for table in tables
+        ])
+        # Skala pikseli strony układu do pikseli OCR (tryb dwóch rozdzielczości)
+        region_scale = scale if self.layout_processor is not self.pdf_processor else 1.0
+        page_tables = []
+        for table, outcome in zip(tables, table_outcomes):
+            if outcome['error'] is not None:
+                error = outcome['error']
+                doc_logger.error(f"Error processing table on page {page_number}: {str(error)}",
+                                 exc_info=(type(error), error, error.__traceback__))
+                failed_blocks += 1
+                outcome['result'] = self._table_result(table, region_scale)
+            page_tables.append(outcome['result'])
+        
+        # Wstawienie tabel, pominiętych bloków i stałych pól szablonu na ich miejsca
+        # (pozycje w pikselach OCR)
+        if skipped or reused:
+            recognized = iter(page_blocks)
+            page_blocks = []
+            for i, block in enumerate(all_blocks):
+                if i in reused:
+                    text, language, confidence = reused[i]
+                    page_blocks.append({
+                        'position': {key: int(value * region_scale) for key, value in block['position'].items()},
+                        'text': text,
+                        'language': language,
+                        'confidence': confidence,
+                        'formatting': self._analyze_formatting(text)
+                    })
+                elif i not in skipped:
+                    page_blocks.append(next(recognized))
+                elif skipped[i] == 'table':
+                    table = page_tables[block['table']]
+                    text = '\n'.join('\t'.join(cell['text'] for cell in row) for row in table['rows'])
+                    cells = [cell for row in table['rows'] for cell in row if cell['text']]
+                    page_blocks.append({
+                        'position': table['position'],
+                        'text': text,
+                        'language': self.ocr_engine._detect_language(text),
+                        'confidence': sum(cell['confidence'] for cell in cells) / len(cells) if cells else 0.0,
+                        'formatting': self._analyze_formatting(text),
+                        'content_type': 'table'
+                    })
+                else:
+                    page_blocks.append({
+                        'position': {key: int(value * region_scale) for key, value in block['position'].items()},
+                        'text': "",
+                        'language': "unknown",
+                        'confidence': 0.0,
+                        'formatting': self._analyze_formatting(""),
+                        'content_type': skipped[i]
+                    })
+            skipped_count = sum(1 for content_type in skipped.values() if content_type != 'table')
+            if skipped_count:
+                doc_logger.info(f"Skipped OCR of {skipped_count} blank/graphic blocks on page {page_number}")
+        
+        # Miniatury bloków z obrazu tej strony (w rozdzielczości analizy układu)
+        for block in page_blocks:
+            block['image_data'] = self.html_generator.block_image_data(
+                page_context.image, block['position'], layout_dpi / self.pdf_processor.dpi
+            )
+        
+        # Nowy układ - zapis szablonu (bez wyników bloków, których OCR się nie powiódł)
+        template_id = template['id'] if template is not None else None
+        if self.layout_index is not None and text_blocks is None and template is None and all_blocks:
+            template_id = self.layout_index.add(page_context.gray, self.layout_settings, layout_type, [{
+                'position': block['position'],
+                'content_type': content_type,
+                'table': block.get('table'),
+                'digest': digest,
+                'result': (result['text'], result['language'], result['confidence'])
+                if content_type == 'text' and not failed_blocks else None
+            } for block, content_type, digest, result in zip(all_blocks, content_types, digests, page_blocks)], tables)
+        
+        return {
+            'number': page_number,
+            'source': 'text_layer' if text_blocks is not None else 'image',
+            'layout_type': layout_type,
+            'blocks': page_blocks,
+            'text_layer_blocks': text_layer_blocks,
+            'failed_blocks': failed_blocks,
+            'skipped_blocks': {content_type: sum(1 for value in skipped.values() if value == content_type)
+                               for content_type in ('blank', 'graphic')},
+            'block_seconds': sum(outcome['duration_seconds'] for outcome in outcomes + table_outcomes),
+            'tables': page_tables,
+            'template_id': template_id,
+            'template_matched': template is not None,
+            'reused_blocks': len(reused),
+            'layout_seconds': layout_seconds,
+            'rasterized_pixels': rasterized_pixels,
+            'ocr_seconds': (datetime.now() - step_start).total_seconds(),
+            'ocr_mode': page_ocr_mode,
+            'steps': page_context.steps
+        }
+    
+    @staticmethod
+    def _inside_table(position: Dict, tables: List[Dict]) -> bool:
+        """Czy środek bloku leży w obszarze którejś z tabel"""
+        cx = position['x'] + position['width'] / 2
+        cy = position['y'] + position['height'] / 2
+        return any(t['position']['x'] <= cx < t['position']['x'] + t['position']['width']
+                   and t['position']['y'] <= cy < t['position']['y'] + t['position']['height']
+                   for t in tables)
+    
+    def _recognize_table(self, pdf_path: str, page_context: PageContext, table: Dict,
+                         language: Optional[str]) -> Dict:
+        """
+        Rozpoznaje komórki tabeli jednym przebiegiem OCR
+        
+        Z wycinka tabeli usuwane są linie, a komórki (pozycje względem
+        wycinka) rozpoznawane są razem - jednym przebiegiem Tesseracta albo
+        jednym wsadem EasyOCR.
+        
+        Args:
+            pdf_path: Ścieżka do pliku PDF
+            page_context: Kontekst przetwarzania strony
+            table: Tabela wykryta przez TableDetector (piksele strony układu)
+            language: Język OCR dokumentu (None - wszystkie języki)
+            
+        Returns:
+            Tabela: pozycja i wiersze komórek (tekst, pewność, pozycja) w pikselach OCR
+        """
+        if self.layout_processor is not self.pdf_processor:
+            (_, crop), = self.pdf_processor.render_regions(
+                pdf_path, page_context.page_number - 1, [table['position']], self.layout_processor.dpi
+            )
+            scale = self.pdf_processor.dpi / self.layout_processor.dpi
+        else:
+            crop, scale = page_context.crop(table['position']), 1.0
+        image = Image.fromarray(self.table_detector.erase_lines(
+            crop, self.pdf_processor.dpi / self.layout_analyzer.reference_dpi
+        ))
+        origin = table['position']
+        cells = [{
+            'x': int((cell['x'] - origin['x']) * scale),
+            'y': int((cell['y'] - origin['y']) * scale),
+            'width': int(cell['width'] * scale),
+            'height': int(cell['height'] * scale)
+        } for row in table['cells'] for cell in row]
+        if self.ocr_engine.use_easyocr:
+            results = self.ocr_engine.extract_text_from_images(
+                [image.crop((c['x'], c['y'], c['x'] + c['width'], c['y'] + c['height'])) for c in cells], language
+            )
+        else:
+            results = self.ocr_engine.extract_text_from_page(image, cells, language)
+        return self._table_result(table, scale, results)
+    
+    @staticmethod
+    def _table_result(table: Dict, scale: float, results: Optional[List[Tuple]] = None) -> Dict:
+        """Składa wynik tabeli z wyników OCR komórek (None - komórki puste)"""
+        def scaled(position: Dict) -> Dict:
+            return {key: int(value * scale) for key, value in position.items()}
+        
+        recognized = iter(results or [])
+        rows = []
+        for row in table['cells']:
+            cells = []
+            for cell in row:
+                text, _, confidence = next(recognized, ("", "unknown", 0.0))
+                cells.append({'text': text.strip(), 'confidence': confidence, 'position': scaled(cell)})
+            rows.append(cells)
+        return {'position': scaled(table['position']), 'rows': rows}
+    
     def _classify_block_type(self, text: str, block_index: int, layout_type: str) -> str:
         """
         Klasyfikuje typ bloku na podstawie zawartości i kontekstu
@@ -393,38 +1126,239 @@ class DocumentAnalyzer:
             return "universal"
 
 
+# Analizator i dziennik procesu roboczego trybu wsadowego - tworzone raz na proces
+_batch_analyzer: Optional[DocumentAnalyzer] = None
+_batch_journal: Optional[BatchJournal] = None
+
+
+def _init_batch_worker(config: Dict, journal_path: str) -> None:
+    """Tworzy analizator procesu roboczego i ładuje modele przed pierwszym dokumentem"""
+    global _batch_analyzer, _batch_journal
+    _batch_analyzer = DocumentAnalyzer(**config)
+    _batch_analyzer.ocr_engine.warm_up()
+    _batch_journal = BatchJournal(journal_path)
+
+
+def _analyze_batch_file(pdf_path: str, output_dir: str, input_hash: Optional[str] = None) -> Dict:
+    """Zadanie procesu roboczego: analiza jednego dokumentu analizatorem procesu"""
+    return _analyze_file(_batch_analyzer, pdf_path, output_dir, _batch_journal, input_hash)
+
+
+def _analyze_file(analyzer: DocumentAnalyzer, pdf_path: str, output_dir: str,
+                  journal: Optional[BatchJournal] = None, input_hash: Optional[str] = None) -> Dict:
+    """Analizuje dokument i zwraca wynik w postaci wpisu wyników trybu wsadowego"""
+    start = datetime.now()
+    try:
+        if journal is not None:
+            journal.start(pdf_path, output_dir, input_hash)
+        # Log dokumentu zapisywany jest w katalogu wyjściowym - musi istnieć przed analizą
+        os.makedirs(output_dir, exist_ok=True)
+        result = {
+            'status': 'success',
+            'html_path': analyzer.analyze_document(pdf_path, output_dir)
+        }
+    except Exception as e:
+        result = {
+            'status': 'error',
+            'error': str(e)
+        }
+    if journal is not None:
+        journal.finish(pdf_path, result, (datetime.now() - start).total_seconds())
+    return result
+
+
 class AdvancedAnalyzer(DocumentAnalyzer):
     """Rozszerzona wersja analizatora z dodatkowymi funkcjami"""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, batch_workers: int = 1, max_attempts: int = 3, **kwargs):
+        """
+        Inicjalizacja analizatora
+        
+        Args:
+            batch_workers: Liczba procesów roboczych trybu wsadowego (1 - dokumenty
+                analizowane kolejno w bieżącym procesie)
+            max_attempts: Limit prób przetworzenia dokumentu w kolejnych
+                uruchomieniach partii (według dziennika partii)
+            **kwargs: Parametry DocumentAnalyzer (także analizatorów procesów roboczych)
+        """
         self.statistics = {}
+        self.batch_workers = max(1, batch_workers)
+        self.max_attempts = max(1, max_attempts)
+        # Procesy robocze dzielą rdzenie - domyślny limit wątków analizy jest dzielony między nie
+        self.worker_config = dict(kwargs)
+        if not self.worker_config.get('max_threads'):
+            self.worker_config['max_threads'] = max(1, (os.cpu_count() or 1) // self.batch_workers)
+        # Przy batch_workers > 1 dokumenty analizują procesy robocze - analizator
+        # (silnik OCR, modele) procesu głównego tworzony jest dopiero przy pierwszym użyciu
+        self._analyzer_config = kwargs
+        self._analyzer_ready = False
+        if self.batch_workers == 1:
+            self._ensure_analyzer()
+        else:
+            inspect.signature(DocumentAnalyzer.__init__).bind(self, **kwargs)
+            self._check_options(**{key: kwargs[key] for key in ('ocr_mode', 'ocr_language', 'ocr_engine_name')
+                                   if key in kwargs})
+    
+    def __getattr__(self, name: str) -> Any:
+        # Atrybut analizatora dokumentów przed jego utworzeniem - tworzenie przy pierwszym użyciu
+        if name.startswith('__') or self.__dict__.get('_analyzer_ready', True):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._ensure_analyzer()
+        return getattr(self, name)
+    
+    def _ensure_analyzer(self) -> None:
+        """Tworzy analizator dokumentów procesu głównego (tylko raz)"""
+        if self._analyzer_ready:
+            return
+        self._analyzer_ready = True
+        try:
+            DocumentAnalyzer.__init__(self, **self._analyzer_config)
+        except Exception:
+            self._analyzer_ready = False
+            raise
+    
+    def _run_batch_pool(self, jobs: deque, journal_path: str, journal: BatchJournal, report) -> None:
+        """
+        Analizuje dokumenty z kolejki w puli procesów roboczych
+        
+        Awaria procesu roboczego psuje pulę: dokumenty zlecone tej puli są
+        zapisywane jako błędy, a niezlecone pozostają w kolejce (dla kolejnej puli).
+        
+        Args:
+            jobs: Kolejka zadań (plik, ścieżka, katalog wyników, skrót treści)
+            journal_path: Ścieżka dziennika partii (procesy robocze otwierają go same)
+            journal: Dziennik partii procesu głównego
+            report: Funkcja zapisu wyniku dokumentu (plik, wynik)
+        """
+        with ProcessPoolExecutor(max_workers=self.batch_workers, initializer=_init_batch_worker,
+                                 initargs=(self.worker_config, journal_path)) as executor:
+            # W kolejce procesów jest najwyżej 2 * batch_workers dokumentów
+            pending = {}
+            broken = False
+            while (jobs and not broken) or pending:
+                while jobs and not broken and len(pending) < 2 * self.batch_workers:
+                    pdf_file, pdf_path, output_dir, input_hash = jobs[0]
+                    try:
+                        future = executor.submit(_analyze_batch_file, pdf_path, output_dir, input_hash)
+                    except BrokenProcessPool:
+                        broken = True
+                        break
+                    jobs.popleft()
+                    pending[future] = (pdf_file, pdf_path, datetime.now())
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_file, pdf_path, submitted = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Awaria procesu roboczego - dokument nie zapisał swojego wyniku
+                        broken = broken or isinstance(e, BrokenProcessPool)
+                        result = {'status': 'error', 'error': str(e) or type(e).__name__}
+                        journal.finish(pdf_path, result, (datetime.now() - submitted).total_seconds())
+                    report(pdf_file, result)
     
     def batch_analyze(self, pdf_directory: str, output_directory: str = "batch_output") -> Dict:
-        """Analizuje wiele plików PDF w folderze"""
-        results = {}
+        """
+        Analizuje wiele plików PDF w folderze
+        
+        Przy batch_workers > 1 dokumenty rozdzielane są między procesy robocze,
+        z których każdy raz, przy starcie, tworzy analizator i ładuje modele.
+        Największe pliki trafiają do analizy jako pierwsze, więc partia nie
+        kończy się oczekiwaniem na jeden duży dokument. Po każdym dokumencie
+        wypisywana jest bieżąca przepustowość.
+        
+        Stan dokumentów zapisywany jest w dzienniku batch_journal.sqlite
+        w katalogu wyjściowym. Ponowne uruchomienie pomija dokumenty ukończone
+        (niezmieniona treść pliku) i ponawia nieudane do limitu max_attempts.
+        
+        Args:
+            pdf_directory: Katalog z plikami PDF
+            output_directory: Katalog wyjściowy (podkatalog na każdy dokument)
+            
+        Returns:
+            Wyniki według nazwy pliku: {'status': 'success', 'html_path': ...}
+            lub {'status': 'error', 'error': ...}
+        """
         pdf_files = [f for f in os.listdir(pdf_directory) if f.endswith('.pdf')]
         
         print(f"Znaleziono {len(pdf_files)} plików PDF do analizy")
         
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(pdf_directory, pdf_file)
-            try:
-                print(f"\nAnalizuję: {pdf_file}")
-                html_path = self.analyze_document(pdf_path, 
-                    os.path.join(output_directory, pdf_file.replace('.pdf', '')))
-                results[pdf_file] = {
-                    'status': 'success',
-                    'html_path': html_path
-                }
-            except Exception as e:
-                results[pdf_file] = {
-                    'status': 'error',
-                    'error': str(e)
-                }
-                print(f"Błąd w {pdf_file}: {e}")
+        # Wznowienie partii - dokumenty ukończone i wyczerpane według dziennika
+        journal_path = os.path.join(output_directory, 'batch_journal.sqlite')
+        journal = BatchJournal(journal_path, self.max_attempts)
+        try:
+            results = {}
+            # Skrót treści liczony raz na dokument - dla sprawdzenia dziennika i zapisu próby
+            hashes = {pdf_file: PageCache.file_hash(os.path.join(pdf_directory, pdf_file))
+                      for pdf_file in pdf_files}
+            for pdf_file in pdf_files:
+                entry = journal.skip_entry(os.path.join(pdf_directory, pdf_file), hashes[pdf_file])
+                if entry is None:
+                    continue
+                if entry['status'] == 'success':
+                    results[pdf_file] = {'status': 'success', 'html_path': entry['html_path']}
+                else:
+                    results[pdf_file] = {
+                        'status': 'error',
+                        'error': entry['error'] or "Przetwarzanie przerwane (wyczerpany limit prób)"
+                    }
+            if results:
+                completed = sum(1 for result in results.values() if result['status'] == 'success')
+                print(f"Pominięto {len(results)} plików z dziennika partii: {completed} ukończonych, "
+                      f"{len(results) - completed} po wyczerpaniu limitu prób")
+            
+            sizes = {pdf_file: os.path.getsize(os.path.join(pdf_directory, pdf_file))
+                     for pdf_file in pdf_files if pdf_file not in results}
+            jobs = deque(
+                (pdf_file, os.path.join(pdf_directory, pdf_file),
+                 os.path.join(output_directory, pdf_file.replace('.pdf', '')), hashes[pdf_file])
+                for pdf_file in sorted(sizes, key=lambda pdf_file: sizes[pdf_file], reverse=True)
+            )
+            job_count = len(jobs)
+            processed = 0
+            start = datetime.now()
+            processed_bytes = 0
+            
+            def report(pdf_file: str, result: Dict) -> None:
+                nonlocal processed, processed_bytes
+                results[pdf_file] = result
+                processed += 1
+                processed_bytes += sizes[pdf_file]
+                if result['status'] == 'error':
+                    print(f"Błąd w {pdf_file}: {result['error']}")
+                elapsed = max((datetime.now() - start).total_seconds(), 1e-9)
+                rate = processed / elapsed
+                print(f"[{processed}/{job_count}] {pdf_file}: {result['status']} - "
+                      f"{rate:.2f} dok./s, {processed_bytes / elapsed / 1024 ** 2:.2f} MB/s, "
+                      f"pozostało ~{(job_count - processed) / rate:.0f} s")
+            
+            if self.batch_workers > 1 and len(jobs) > 1:
+                # Awaria procesu roboczego psuje pulę - pozostałe dokumenty trafiają do nowej
+                while jobs:
+                    self._run_batch_pool(jobs, journal_path, journal, report)
+            else:
+                self._ensure_analyzer()
+                for pdf_file, pdf_path, output_dir, input_hash in jobs:
+                    print(f"\nAnalizuję: {pdf_file}")
+                    report(pdf_file, _analyze_file(self, pdf_path, output_dir, journal, input_hash))
+        finally:
+            journal.close()
         
-        return results
+        elapsed = (datetime.now() - start).total_seconds()
+        self.statistics['batch'] = {
+            'documents': len(pdf_files),
+            'processed': processed,
+            'skipped': len(pdf_files) - processed,
+            'journal_path': journal_path,
+            'succeeded': sum(1 for result in results.values() if result['status'] == 'success'),
+            'failed': sum(1 for result in results.values() if result['status'] == 'error'),
+            'workers': self.batch_workers,
+            'duration_seconds': elapsed,
+            'documents_per_second': processed / elapsed if elapsed else 0.0
+        }
+        return {pdf_file: results[pdf_file] for pdf_file in pdf_files}
 
 
 def process_document(file_path: str, output_format: str = "html", output_dir: str = "output") -> str:
@@ -449,12 +1383,35 @@ def main():
     parser.add_argument("input", help="Ścieżka do pliku PDF lub katalogu z plikami PDF")
     parser.add_argument("-o", "--output", help="Katalog wyjściowy", default="output")
     parser.add_argument("-b", "--batch", help="Tryb wsadowy (przetwarzanie katalogu)", action="store_true")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Limit prób przetworzenia dokumentu przy wznawianiu partii (dziennik w katalogu wyjściowym)")
+    parser.add_argument("--batch-workers", type=int, default=1, help="Liczba procesów roboczych trybu wsadowego (dokumenty równolegle)")
     parser.add_argument("-v", "--view", help="Otwórz wygenerowany HTML w przeglądarce", action="store_true")
     parser.add_argument("--extractor-service", choices=["invoice", "receipt", "cv", "contract", "financial", "medical", "legal", "tax", "insurance", "education"], help="Zewnętrzna usługa ekstrakcji danych z dokumentu (np. invoice, receipt)")
     parser.add_argument("--adapter", choices=["invoice", "receipt", "cv", "contract", "financial", "medical", "legal", "tax", "insurance", "education"], help="Użyj adaptera do bezpośredniego połączenia z usługą (pomija gateway)")
     parser.add_argument("--adapter-port", type=int, help="Port usługi adaptera (np. 8001 dla invoice, 8002 dla receipt)")
     parser.add_argument("--format", choices=["html", "mhtml"], default="html", help="Format wyjściowy: html (jeden plik) lub mhtml (multipart)")
     parser.add_argument("--docker", help="Ścieżka do docker-compose.yml lub katalogu z docker-compose.yml; uruchomi automatycznie wymagane usługi w Dockerze", nargs="?", const=".")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Liczba procesów przetwarzających strony równolegle")
+    parser.add_argument("--cache-dir", help="Katalog cache wyrenderowanych i przetworzonych stron")
+    parser.add_argument("--cache-size-mb", type=int, default=2048, help="Limit rozmiaru cache stron w MB")
+    parser.add_argument("--denoise", choices=["adaptive", "nlmeans", "none"], default="adaptive", help="Strategia redukcji szumów stron")
+    parser.add_argument("--layout-dpi", type=int, help="Wykrywaj bloki na stronie w tej rozdzielczości (np. 96), a do OCR renderuj tylko obszary bloków")
+    parser.add_argument("--ocr-mode", choices=["page", "block"], default="page", help="OCR jednym przebiegiem na stronę (page) lub osobno dla każdego bloku (block)")
+    parser.add_argument("--tesseract-backend", choices=["pytesseract", "tesserocr"], default="pytesseract", help="Wywołania Tesseract: nowy proces na każde wywołanie (pytesseract) lub pula uchwytów API w procesie (tesserocr)")
+    parser.add_argument("--ocr-language", choices=["auto", "multi", "pl", "en", "de"], default="auto", help="Język OCR: wykryty raz dla dokumentu (auto), zawsze wszystkie (multi) lub wskazany")
+    parser.add_argument("--ocr-engine", choices=["tesseract", "easyocr", "cascade"], default="tesseract", help="Silnik OCR; cascade - Tesseract, a bloki niepewne ponownie EasyOCR")
+    parser.add_argument("--cascade-confidence", type=float, help="Próg pewności, poniżej którego blok jest eskalowany do EasyOCR (tryb cascade)")
+    parser.add_argument("--no-block-filter", help="Rozpoznawaj także bloki puste i graficzne (bez wstępnej klasyfikacji)", action="store_true")
+    parser.add_argument("--no-tables", help="Nie wykrywaj tabel (komórki rozpoznawane jak zwykłe bloki)", action="store_true")
+    parser.add_argument("--ocr-cache-dir", help="Katalog trwałego cache wyników OCR bloków (wspólny dla dokumentów)")
+    parser.add_argument("--layout-index-dir", help="Katalog indeksu szablonów układu dostawców (znane układy pomijają analizę układu i OCR stałych pól)")
+    parser.add_argument("--ocr-cache-memory", type=int, default=4096, help="Liczba wyników OCR bloków w pamięci (0 - bez cache w pamięci)")
+    parser.add_argument("--max-threads", type=int, help="Łączny limit wątków analizy stron i OCR bloków (domyślnie liczba rdzeni)")
+    parser.add_argument("--page-threads", type=int, default=2, help="Liczba wątków analizujących strony (układ i OCR) równolegle")
+    parser.add_argument("--render-workers", type=int, default=1, help="Liczba wątków renderujących strony w potoku (tylko backend poppler; PyMuPDF renderuje pojedynczo)")
+    parser.add_argument("--preprocess-workers", type=int, default=1, help="Liczba wątków przetwarzania wstępnego stron w potoku")
+    parser.add_argument("--queue-size", type=int, default=2, help="Pojemność kolejek między etapami potoku stron")
+    parser.add_argument("--text-layer", help="Użyj warstwy tekstowej PDF zamiast OCR, jeśli jest dostępna", action="store_true")
     parser.add_argument("--dockerfile", help="Ścieżka do Dockerfile konkretnej usługi; uruchomi pojedynczy kontener dla tej usługi", nargs="?")
     args = parser.parse_args()
     
@@ -529,7 +1486,29 @@ def main():
                 print(f"Błąd: {args.input} nie jest katalogiem")
                 sys.exit(1)
             
-            analyzer = AdvancedAnalyzer()
+            analyzer = AdvancedAnalyzer(
+                batch_workers=args.batch_workers,
+                max_attempts=args.max_attempts,
+                use_text_layer=args.text_layer, workers=args.workers,
+                cache_dir=args.cache_dir, cache_size_mb=args.cache_size_mb,
+                denoise=args.denoise,
+                page_threads=args.page_threads,
+                layout_dpi=args.layout_dpi,
+                ocr_mode=args.ocr_mode,
+                tesseract_backend=args.tesseract_backend,
+                max_threads=args.max_threads,
+                ocr_language=args.ocr_language,
+                ocr_cache_dir=args.ocr_cache_dir,
+                ocr_cache_memory=args.ocr_cache_memory,
+                ocr_engine_name=args.ocr_engine,
+                cascade_confidence=args.cascade_confidence,
+                block_filter=not args.no_block_filter,
+                detect_tables=not args.no_tables,
+                layout_index_dir=args.layout_index_dir,
+                render_workers=args.render_workers,
+                preprocess_workers=args.preprocess_workers,
+                pipeline_queue_size=args.queue_size
+            )
             results = analyzer.batch_analyze(args.input, args.output)
             
             print("\n--- Podsumowanie ---")
@@ -555,7 +1534,27 @@ def main():
                     print(f"Dane wyekstrahowane przez usługę {args.extractor_service}:\n{json.dumps(extracted_data, indent=2, ensure_ascii=False)}")
                     # Możesz tu dodać logikę dalszego przetwarzania tych danych
             
-            analyzer = DocumentAnalyzer()
+            analyzer = DocumentAnalyzer(
+                use_text_layer=args.text_layer, workers=args.workers,
+                cache_dir=args.cache_dir, cache_size_mb=args.cache_size_mb,
+                denoise=args.denoise,
+                page_threads=args.page_threads,
+                layout_dpi=args.layout_dpi,
+                ocr_mode=args.ocr_mode,
+                tesseract_backend=args.tesseract_backend,
+                max_threads=args.max_threads,
+                ocr_language=args.ocr_language,
+                ocr_cache_dir=args.ocr_cache_dir,
+                ocr_cache_memory=args.ocr_cache_memory,
+                ocr_engine_name=args.ocr_engine,
+                cascade_confidence=args.cascade_confidence,
+                block_filter=not args.no_block_filter,
+                detect_tables=not args.no_tables,
+                layout_index_dir=args.layout_index_dir,
+                render_workers=args.render_workers,
+                preprocess_workers=args.preprocess_workers,
+                pipeline_queue_size=args.queue_size
+            )
             html_path = analyzer.analyze_document(args.input, args.output)
             
             # Wybór formatu wyjściowego